@@ -0,0 +1,112 @@
+"""
+Compare the per-record lookups of the original suites against the join
+based implementation.
+
+    python -m bench.bench_joins [scale...]
+"""
+
+import sys
+
+from bsa.join import HASH
+from bsa.join import INDEX
+from bsa.suites import check_cname
+from bsa.suites import check_ptr
+from bsa.utils import generate_records
+from bsa.utils import reversed_address
+
+from bench.common import NullReporter
+from bench.common import build_db
+from bench.common import timed
+
+DEFAULT_SCALES = [1000, 10000, 100000]
+
+
+def nested_ptr(db, reporter):
+    for rr in generate_records(db, 'A'):
+        if not db.is_authoritative(rr.resolved_label):
+            continue
+
+        lookup = reversed_address(rr.address)
+
+        if db.query(lookup, record=['PTR', 'CNAME']):
+            continue
+
+        reporter.error(lookup)
+
+
+def nested_cname(db, reporter):
+    for rr in generate_records(db, 'CNAME'):
+        if not db.is_authoritative(rr.resolved_target):
+            continue
+
+        if db.query(rr.resolved_target, record=['A', 'NS', 'CNAME', 'PTR']):
+            continue
+
+        reporter.error(rr.resolved_target)
+
+
+def ptr_key(db):
+    def key(rr):
+        if not db.is_authoritative(rr.resolved_label):
+            return None
+
+        return reversed_address(rr.address)
+
+    return key
+
+
+def cname_key(db):
+    def key(rr):
+        if not db.is_authoritative(rr.resolved_target):
+            return None
+
+        return rr.resolved_target
+
+    return key
+
+
+def joined(source_type, key_fn, targets, strategy):
+    def run(db, reporter):
+        for rr, label in db.anti_join(source_type, key_fn(db), targets,
+                                      strategy=strategy):
+            reporter.error(label)
+
+    return run
+
+
+CASES = [
+    ("check_ptr", "nested", nested_ptr),
+    ("check_ptr", "hash", joined('A', ptr_key, check_ptr.TARGETS, HASH)),
+    ("check_ptr", "index", joined('A', ptr_key, check_ptr.TARGETS, INDEX)),
+    ("check_ptr", "suite", check_ptr.run),
+    ("check_cname", "nested", nested_cname),
+    ("check_cname", "hash",
+     joined('CNAME', cname_key, check_cname.TARGETS, HASH)),
+    ("check_cname", "index",
+     joined('CNAME', cname_key, check_cname.TARGETS, INDEX)),
+    ("check_cname", "suite", check_cname.run),
+]
+
+
+def main(args):
+    scales = map(int, args) or DEFAULT_SCALES
+
+    print "{0:>10} {1:>12} {2:>8} {3:>10} {4:>8}".format(
+        "records", "suite", "method", "seconds", "errors")
+
+    for scale in scales:
+        db = build_db(scale)
+
+        for suite, method, fn in CASES:
+            db.join_cache.clear()
+            reporter = NullReporter()
+            seconds, _ = timed(fn, db, reporter)
+
+            print "{0:>10} {1:>12} {2:>8} {3:>10.4f} {4:>8}".format(
+                scale, suite, method, seconds, reporter.count)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,107 @@
+"""
+Measure parser, configuration and cache throughput on generated BIND trees.
+
+    python -m bench.bench_parser [--full] [scale...]
+
+Scales are numbers of forward records. By default a quick set of scales is
+measured, --full measures 10k, 1M and 10M records, which takes a while and
+needs several gigabytes of disk and memory at the largest scale.
+
+Trees are generated into a temporary directory, which is removed afterwards.
+"""
+
+import os
+import sys
+import shutil
+import logging
+import tempfile
+
+from bsa.bind import FakeBind
+from bsa.named import BindConfig
+from bsa.named import parse_config
+from bsa.stats import max_rss
+from bsa.synthetic import generate_tree
+
+from bench.common import timed
+
+DEFAULT_SCALES = [10000, 100000]
+FULL_SCALES = [10000, 1000000, 10000000]
+
+
+def parse_zones(config, directory):
+    zones = config.parse_zones(root_directory=directory, fake_root=directory)
+    return zones, sum(len(zone) for (zone, _) in zones)
+
+
+def measure(scale, directory):
+    """
+    Generate a tree of the given scale and time every loading phase.
+
+    Returns a (tree, records, phases) tuple, where phases is a list of
+    (phase, seconds, peak rss before, peak rss after) tuples. Peak rss is in
+    kilobytes, or None where bsa.stats.max_rss is not available.
+    """
+    phases = list()
+
+    def phase(name, fn, *args):
+        rss = max_rss()
+        seconds, result = timed(fn, *args)
+        phases.append((name, seconds, rss, max_rss()))
+        return result
+
+    tree = phase("generate", generate_tree, directory, scale)
+
+    section = phase("parse_config", parse_config, tree.config, directory)
+    config = BindConfig(parser_cache=None)
+    phase("update_from_section", config.update_from_section, section)
+
+    zones, records = phase("parse_zones", parse_zones, config, directory)
+
+    cache_directory = os.path.join(directory, "cache")
+    os.mkdir(cache_directory)
+    config.parser_cache = cache_directory
+
+    phase("cache_write", parse_zones, config, directory)
+    phase("cache_load", parse_zones, config, directory)
+    phase("fakebind", FakeBind, zones)
+
+    return tree, records, phases
+
+
+def main(args):
+    logging.basicConfig(level=logging.WARNING)
+
+    if "--full" in args:
+        args.remove("--full")
+        scales = FULL_SCALES
+    else:
+        scales = DEFAULT_SCALES
+
+    scales = map(int, args) or scales
+
+    print "{0:>10} {1:>20} {2:>10} {3:>12} {4:>12}".format(
+        "records", "phase", "seconds", "records/s", "rss delta")
+
+    for scale in scales:
+        directory = tempfile.mkdtemp(prefix="bsa-bench-")
+
+        try:
+            tree, records, phases = measure(scale, directory)
+        finally:
+            shutil.rmtree(directory)
+
+        for name, seconds, before, after in phases:
+            rate = records / seconds if seconds > 0 else 0
+            rss = "-"
+
+            if before is not None:
+                rss = "{0}k".format(after - before)
+
+            print "{0:>10} {1:>20} {2:>10.3f} {3:>12.0f} {4:>12}".format(
+                records, name, seconds, rate, rss)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,235 @@
+"""
+Measure the latency of FakeBind operations.
+
+    python -m bench.bench_queries [--records N] [--output results.json]
+        [--baseline baseline.json] [--threshold 0.2]
+
+Every operation is run a number of times against a synthetic database, and
+its latency percentiles and throughput are reported. Results can be written
+as JSON and compared against a stored baseline, in which case the exit status
+is non-zero if any operation got slower than the threshold allows.
+"""
+
+import gc
+import sys
+import json
+import time
+import random
+import argparse
+
+from bsa.bind import FakeBind
+from bsa.named import BindConfig
+from bsa.named import BindView
+
+from bench.common import build_records
+
+PERCENTILES = (50, 90, 99)
+
+# operations are timed in batches, since single operations are close to the
+# resolution of the clock.
+BATCH = 10
+
+
+def build_zones(count):
+    """
+    Build the zones of bench.common, with the forward zone served by two
+    views.
+    """
+    root = BindConfig()
+    views = [BindView(root, "internal"), BindView(root, "external")]
+    (forward, _), reverse = build_records(count)
+    return [(forward, views), reverse]
+
+
+def operations(db, count, rng):
+    """
+    Build (name, callable) pairs for every measured operation, each callable
+    performs a single operation with random arguments.
+    """
+    def name():
+        return "host{0}.example.com.".format(rng.randint(0, count - 1))
+
+    def prefix():
+        return "host{0}*.example.com.".format(rng.randint(0, 9))
+
+    return [
+        ("query", lambda: db.query(name())),
+        ("query_missing", lambda: db.query("missing." + name())),
+        ("iquery_record",
+         lambda: list(db.iquery(name(), record=['A', 'AAAA']))),
+        ("iquery_view",
+         lambda: list(db.iquery(name(), view=['internal']))),
+        ("iquery_unique", lambda: list(db.iquery(name(), unique=True))),
+        ("wildcard", lambda: db.query(prefix(), record=['CNAME'])),
+        ("wildcard_unique",
+         lambda: db.query(prefix(), record=['CNAME'], unique=True)),
+        ("resolve", lambda: db.resolve("alias" + name())),
+    ]
+
+
+def percentile(samples, p):
+    index = min(len(samples) - 1, int(len(samples) * p / 100.0))
+    return samples[index]
+
+
+def summarize(samples):
+    samples = sorted(samples)
+    total = sum(samples)
+
+    result = {
+        "count": len(samples),
+        "throughput": len(samples) / total if total > 0 else 0.0,
+    }
+
+    for p in PERCENTILES:
+        result["p{0}".format(p)] = percentile(samples, p)
+
+    return result
+
+
+def measure(fn, batches):
+    """
+    Time batches of calls to fn, returning the average latency of each batch.
+
+    Like timeit, garbage collection is disabled while measuring. A full
+    collection over a large database takes long enough to dominate the
+    results otherwise.
+    """
+    samples = list()
+
+    gc.collect()
+    gc.disable()
+
+    try:
+        for _ in xrange(batches):
+            before = time.time()
+
+            for _ in xrange(BATCH):
+                fn()
+
+            samples.append((time.time() - before) / BATCH)
+    finally:
+        gc.enable()
+
+    return samples
+
+
+def run(count, iterations, seed=0, rounds=5):
+    rng = random.Random(seed)
+    zones = build_zones(count)
+
+    results = dict()
+
+    builds = list()
+    cache_builds = list()
+
+    for _ in range(3):
+        before = time.time()
+        db = FakeBind(zones)
+        builds.append(time.time() - before)
+
+        before = time.time()
+        db.build_cache(zones)
+        cache_builds.append(time.time() - before)
+
+    # building all indexes, and the name cache alone.
+    results["build"] = summarize(builds)
+    results["build_cache"] = summarize(cache_builds)
+
+    samples = dict()
+
+    # operations are measured round-robin, so that drift in the speed of the
+    # machine affects all of them alike.
+    for _ in range(rounds):
+        for name, fn in operations(db, count, rng):
+            # wildcard queries scan the whole zone, run fewer of them.
+            n = iterations // rounds
+
+            if name.startswith("wildcard"):
+                n //= 100
+
+            samples.setdefault(name, []).extend(
+                measure(fn, max(n // BATCH, 1)))
+
+    for name, values in samples.items():
+        results[name] = summarize(values)
+
+    return {"records": db.size, "operations": results}
+
+
+def compare(results, baseline, threshold):
+    """
+    Compare the median latency of all operations against a baseline.
+
+    Returns a list of (name, baseline, current, change) for every operation
+    that got slower by more than threshold (a fraction).
+    """
+    regressions = list()
+
+    for name, current in sorted(results["operations"].items()):
+        previous = baseline["operations"].get(name)
+
+        if previous is None or previous["p50"] <= 0:
+            continue
+
+        change = current["p50"] / previous["p50"] - 1
+
+        if change > threshold:
+            regressions.append((name, previous["p50"], current["p50"], change))
+
+    return regressions
+
+
+def print_results(results):
+    print "{0:>16} {1:>10} {2:>10} {3:>10} {4:>12}".format(
+        "operation", "p50 (us)", "p90 (us)", "p99 (us)", "ops/s")
+
+    for name, r in sorted(results["operations"].items()):
+        print "{0:>16} {1:>10.1f} {2:>10.1f} {3:>10.1f} {4:>12.0f}".format(
+            name, r["p50"] * 1e6, r["p90"] * 1e6, r["p99"] * 1e6,
+            r["throughput"])
+
+
+def main(args):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--records", type=int, default=100000)
+    parser.add_argument("--iterations", type=int, default=10000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None,
+                        help="Write results as JSON to this file.")
+    parser.add_argument("--baseline", default=None,
+                        help="Compare against results stored in this file.")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Allowed median slowdown against the baseline, "
+                             "as a fraction. Default: 0.2")
+
+    ns = parser.parse_args(args)
+
+    results = run(ns.records, ns.iterations, seed=ns.seed, rounds=ns.rounds)
+    print_results(results)
+
+    if ns.output is not None:
+        with open(ns.output, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if ns.baseline is None:
+        return 0
+
+    with open(ns.baseline) as f:
+        baseline = json.load(f)
+
+    regressions = compare(results, baseline, ns.threshold)
+
+    for name, previous, current, change in regressions:
+        print "REGRESSION {0}: {1:.1f}us -> {2:.1f}us (+{3:.0%})".format(
+            name, previous * 1e6, current * 1e6, change)
+
+    if regressions:
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,131 @@
+"""
+Measure how the built-in suites scale with the size of the database.
+
+    python -m bench.bench_suites [scale...]
+
+The time per record should stay roughly flat as the scale grows.
+"""
+
+import sys
+
+from bsa.bind import FakeBind
+from bsa.named import BindConfig
+from bsa.named import BindView
+from bsa.suites import check_cname
+from bsa.suites import check_cname_conflict
+from bsa.suites import check_duplicates
+from bsa.suites import check_glue
+from bsa.suites import check_ptr
+from bsa.suites import check_srv
+from bsa.suites import check_target_cname
+from bsa.suites import check_ttl
+from bsa.suites import check_views
+from bsa.zone import A
+from bsa.zone import CNAME
+from bsa.zone import MX
+from bsa.zone import NS
+from bsa.zone import TXT
+
+from bench.common import NullReporter
+from bench.common import build_records
+from bench.common import soa
+from bench.common import timed
+
+DEFAULT_SCALES = [1000, 10000, 100000]
+
+SUITES = [
+    check_ptr,
+    check_cname,
+    check_srv,
+    check_cname_conflict,
+    check_duplicates,
+    check_ttl,
+    check_target_cname,
+    check_glue,
+    check_views,
+]
+
+
+def build_faults(count, zones=100):
+    """
+    Build count records spread over a number of small zones, containing a
+    steady rate of the problems that the suite pack looks for.
+    """
+    records = list()
+
+    for z in xrange(zones):
+        origin = "zone{0}.example.net.".format(z)
+        records.append(soa(origin, "db.zone{0}".format(z)))
+
+    for i in xrange(count):
+        origin = "zone{0}.example.net.".format(i % zones)
+        path = "db.zone{0}".format(i % zones)
+        label = "host{0}".format(i)
+
+        def args(name, ttl=None):
+            return (name, ttl, None, origin, path)
+
+        records.append(A(args(label, 300 if i % 7 else 600), "10.0.0.1"))
+        records.append(A(args(label, 300), "10.0.0.2"))
+
+        if i % 5 == 0:
+            records.append(A(args(label, 300), "10.0.0.2"))
+
+        if i % 3 == 0:
+            records.append(CNAME(args("alias" + label), label))
+
+        if i % 11 == 0:
+            records.append(TXT(args("alias" + label), "conflict"))
+
+        if i % 13 == 0:
+            records.append(MX(args(label), "10", "alias" + label))
+
+        if i % 17 == 0:
+            records.append(NS(args("sub" + label), "ns.sub" + label))
+
+    return records
+
+
+def build_db(count):
+    """
+    Build a database with the synthetic zones of bench.common served by the
+    root configuration, and the faulty zones served by two views which only
+    differ by a single name server.
+    """
+    root = BindConfig()
+    internal = BindView(root, "internal")
+    external = BindView(root, "external")
+
+    extra = NS(("@", None, None, "zone0.example.net.", "db.zone0"), "ns2")
+
+    # separate records for each view, like two zone files parse to.
+    zones = build_records(count)
+    zones.append((build_faults(count), [internal]))
+    zones.append((build_faults(count) + [extra], [external]))
+    return FakeBind(zones)
+
+
+def main(args):
+    scales = map(int, args) or DEFAULT_SCALES
+
+    print "{0:>10} {1:>22} {2:>10} {3:>10} {4:>8}".format(
+        "records", "suite", "seconds", "us/record", "errors")
+
+    for scale in scales:
+        db = build_db(scale)
+
+        for module in SUITES:
+            db.join_cache.clear()
+            db.authority_cache.clear()
+            reporter = NullReporter()
+            seconds, _ = timed(module.run, db, reporter)
+
+            print "{0:>10} {1:>22} {2:>10.4f} {3:>10.2f} {4:>8}".format(
+                db.size, module.__name__.split(".")[-1], seconds,
+                seconds * 1e6 / db.size, reporter.count)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,72 @@
+import time
+
+from bsa.bind import FakeBind
+from bsa.named import BindConfig
+from bsa.reporter import Reporter
+from bsa.utils import reversed_address
+from bsa.zone import A
+from bsa.zone import CNAME
+from bsa.zone import PTR
+from bsa.zone import SOA
+
+
+def soa(origin, path):
+    return SOA(("@", None, None, origin, path),
+               "ns1", "hostmaster", "1", "2", "3", "4", "5")
+
+
+def build_records(count, ptr_ratio=0.5, cname_ratio=0.2):
+    """
+    Build an in-memory forward and reverse zone with count A records.
+
+    Every record gets a PTR with a probability of ptr_ratio, and a CNAME
+    pointing to it with a probability of cname_ratio (every other CNAME is
+    dangling). The result is deterministic.
+    """
+    forward = [soa("example.com.", "db.example")]
+    reverse = [soa("10.in-addr.arpa.", "db.10")]
+
+    ptr_every = int(1 / ptr_ratio) if ptr_ratio else None
+    cname_every = int(1 / cname_ratio) if cname_ratio else None
+
+    for i in xrange(count):
+        label = "host{0}".format(i)
+        address = "10.{0}.{1}.{2}".format(
+            (i >> 16) & 0xff, (i >> 8) & 0xff, i & 0xff)
+
+        forward.append(
+            A((label, None, None, "example.com.", "db.example"), address))
+
+        if ptr_every and i % ptr_every == 0:
+            reverse.append(PTR(
+                (reversed_address(address) + ".", None, None,
+                 "10.in-addr.arpa.", "db.10"),
+                label + ".example.com."))
+
+        if cname_every and i % cname_every == 0:
+            target = label if i % (cname_every * 2) == 0 else "gone" + label
+            forward.append(CNAME(
+                ("alias" + label, None, None, "example.com.", "db.example"),
+                target))
+
+    config = BindConfig()
+    return [(forward, [config]), (reverse, [config])]
+
+
+def build_db(count, **kw):
+    return FakeBind(build_records(count, **kw))
+
+
+class NullReporter(Reporter):
+    def __init__(self, name=None):
+        super(NullReporter, self).__init__(name=name)
+        self.count = 0
+
+    def emit(self, finding):
+        self.count += 1
+
+
+def timed(fn, *args, **kw):
+    before = time.time()
+    result = fn(*args, **kw)
+    return time.time() - before, result
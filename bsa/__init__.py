@@ -3,49 +3,30 @@ import os
 import logging
 import contextlib
 import argparse
+import collections
 
 from bsa.named import parse_config
 from bsa.named import BindConfig
+from bsa.reporter import DefaultReporter
+from bsa.reporter import MaxErrorsReached
+from bsa.reporter import ReportContext
+from bsa.reporter import SINKS
+from bsa.memory import MEMORY_FORMATS
+from bsa.memory import MemoryReport
+from bsa.memory import start_tracing
+from bsa.profiling import Profiler
+from bsa.stats import PhaseStats
+from bsa.stats import STATS_FORMATS
+from bsa.stats import SuiteMeasurement
+from bsa.suite import get_suite
+from bsa.suite import run_fused
+from bsa.suite import run_suite
 
 LOGGING_FORMAT = "%(levelname)-7s %(asctime)s [%(name)20s] %(message)s"
 
 __version__ = '0.2.1'
 
 
-class DefaultReporter(object):
-    ERROR = "error"
-    WARNING = "warning"
-    WARNING = "info"
-
-    def __init__(self, name=None):
-        self.messages = list()
-        if name is None:
-            self.name = "SUITE"
-        else:
-            self.name = name
-
-    def error(self, message):
-        self.messages.append((self.ERROR, message))
-
-    def print_all(self):
-        log = logging.getLogger(self.name)
-
-        for (level, message) in self.messages:
-            if level == self.ERROR:
-                log.error(message)
-                continue
-
-            if level == self.WARNING:
-                log.warning(message)
-                continue
-
-            if level == self.INFO:
-                log.info(message)
-                continue
-
-        self.messages = []
-
-
 class DefaultBootstrap(object):
     """
     Allow a user to interactively bootstrap and rerun tests.
@@ -63,6 +44,19 @@ class DefaultBootstrap(object):
             self.reporter_type = self.default_reporter_type
 
         self.name = name
+        # a list collecting bsa.stats.SuiteStats for every module run, or
+        # None when not collecting.
+        self.suite_stats = None
+        # a bsa.profiling.Profiler to profile every module run with, or None.
+        self.profiler = None
+
+    def get_module(self, module):
+        mod = self.modcache.get(module)
+
+        if mod is not None:
+            return mod
+
+        return self.get_refresh_module(module)
 
     def get_refresh_module(self, module):
         mod = self.modcache.get(module)
@@ -79,17 +73,112 @@ class DefaultBootstrap(object):
         self.modcache[module] = mod
         return mod
 
+    def run_module(self, module, reporter, shard=None):
+        """
+        Run a module against the given reporter.
+
+        shard - If specified, only run the given bsa.utils.Shard of the
+                module, see bsa.suite.is_shardable.
+        """
+        if self.profiler is not None:
+            with self.profiler.phase("suite-" + module):
+                return self._measure_module(module, reporter, shard)
+
+        return self._measure_module(module, reporter, shard)
+
+    def _measure_module(self, module, reporter, shard):
+        if self.suite_stats is not None:
+            with SuiteMeasurement(self.db, module) as stats:
+                stats.result = self._run_module(module, reporter, shard)
+
+            self.suite_stats.append(stats)
+            return stats.result
+
+        return self._run_module(module, reporter, shard)
+
+    def _run_module(self, module, reporter, shard):
+        mod = self.get_module(module)
+        suite_type = get_suite(mod)
+
+        if suite_type is not None:
+            return run_suite(suite_type, self.db, reporter, shard=shard)
+
+        if shard is not None:
+            return mod.run_shard(self.db, reporter, shard)
+
+        return mod.run(self.db, reporter)
+
     def execute(self, module, no_report=False):
-        mod = self.get_refresh_module(module)
+        self.get_refresh_module(module)
 
         reporter = self.reporter_type(name=module)
-        result = mod.run(self.db, reporter)
+        result = self.run_module(module, reporter)
 
         if not no_report:
             reporter.print_all()
 
         return result
 
+    def execute_all(self, modules, no_report=False, jobs=1,
+                    state_dir=None, max_errors=None):
+        """
+        Execute a number of modules.
+
+        All visitor style suites are run together in a single pass over the
+        database, old-style modules are run one after another. When
+        collecting suite statistics or profiling, every suite is run on its
+        own.
+
+        If jobs is larger than one, modules are instead distributed over that
+        many forked worker processes sharing the database.
+
+        If state_dir is specified, results are stored there and reused by
+        later runs for everything that did not change, see
+        bsa.incremental.
+
+        max_errors - The error limit of the reporters, passed on to workers
+                     so that they stop early.
+
+        Returns a list of results in the same order as the modules.
+        """
+        if state_dir is not None:
+            from bsa.incremental import execute_incremental
+            return execute_incremental(self, modules, state_dir,
+                                       no_report=no_report)
+
+        if jobs > 1:
+            from bsa.parallel import execute_parallel
+            return execute_parallel(self, modules, jobs, no_report=no_report,
+                                    max_errors=max_errors)
+
+        reporters = [self.reporter_type(name=module) for module in modules]
+        results = [None] * len(modules)
+
+        fused = list()
+
+        for i, module in enumerate(modules):
+            mod = self.get_refresh_module(module)
+            suite_type = get_suite(mod)
+
+            if suite_type is None or self.suite_stats is not None or \
+                    self.profiler is not None:
+                results[i] = self.run_module(module, reporters[i])
+                continue
+
+            fused.append((i, suite_type(self.db, reporters[i])))
+
+        if fused:
+            fused_results = run_fused(self.db, [s for (_, s) in fused])
+
+            for (i, _), result in zip(fused, fused_results):
+                results[i] = result
+
+        if not no_report:
+            for reporter in reporters:
+                reporter.print_all()
+
+        return results
+
 
 def run_interactive(zones):
     """
@@ -143,24 +232,82 @@ def run_interactive(zones):
     return 0
 
 
-def run_modules(zones, modules):
+def run_modules(zones, modules, jobs=1, state_dir=None, context=None,
+                suite_stats=None, stats_file=None, stats=None,
+                memory=None):
+    """
+    context - The bsa.reporter.ReportContext that findings are streamed to,
+              by default they are logged.
+    suite_stats - Write statistics for every suite to stats_file in this
+                  format, see bsa.stats.STATS_FORMATS.
+    stats_file - The file statistics are written to, sys.stderr by default.
+    stats - A bsa.stats.PhaseStats to record the index build and suite
+            phases in. If it has a profiler, every suite is also profiled.
+    memory - A bsa.memory.MemoryReport to add the indexes and caches of the
+             database to, once all suites have run.
+    """
     import bsa.bind
 
     log = logging.getLogger("modules")
 
+    if stats is None:
+        stats = PhaseStats()
+
     try:
-        b = bsa.bind.FakeBind(zones)
+        with stats.phase("fakebind"):
+            b = bsa.bind.FakeBind(zones)
     except:
         log.error("FakeBind setup failed", exc_info=sys.exc_info())
         return 1
 
-    bootstrap = DefaultBootstrap(b)
+    stats.update(index_counters(b), prefix="index.")
+
+    if context is None:
+        context = ReportContext()
 
-    result = list()
+    bootstrap = DefaultBootstrap(b, reporter_type=context.reporter)
 
-    for m in modules:
-        log.info("[running module: {0}]".format(m))
-        result.append(bootstrap.execute(m))
+    log.info("[running modules: {0}]".format(", ".join(modules)))
+
+    if state_dir is not None and jobs > 1:
+        log.warning("incremental runs are not parallel, ignoring jobs")
+
+    if suite_stats is not None:
+        if state_dir is not None or jobs > 1:
+            log.warning("suite statistics are only collected for serial, "
+                        "non-incremental runs")
+        else:
+            bootstrap.suite_stats = list()
+
+    if stats.profiler is not None:
+        if jobs > 1:
+            log.warning("suites are only profiled one by one in serial runs")
+        else:
+            bootstrap.profiler = stats.profiler
+
+    try:
+        with stats.phase("suites"):
+            result = bootstrap.execute_all(
+                modules, jobs=jobs, state_dir=state_dir,
+                max_errors=context.max_errors)
+    except MaxErrorsReached as e:
+        log.error("Stopped early: {0}".format(str(e)))
+        return 1
+    finally:
+        context.close()
+
+        if memory is not None:
+            memory.add_database(b)
+
+        for code, count in sorted(context.counts.items()):
+            log.info("{0}: {1}".format(code, count))
+
+        if bootstrap.suite_stats is not None:
+            if stats_file is None:
+                stats_file = sys.stderr
+
+            stats_file.write(STATS_FORMATS[suite_stats](bootstrap.suite_stats))
+            stats_file.write("\n")
 
     if not all(result):
         log.error("All test suites did not pass!")
@@ -170,6 +317,32 @@ def run_modules(zones, modules):
     return 0
 
 
+def index_counters(db):
+    """
+    Count the entries of the indexes of a FakeBind database.
+    """
+    return {
+        "records": db.size,
+        "names": len(db.cache),
+        "references": len(db.reverse_cache),
+        "addresses": sum(len(i.keys) for i in db.address_cache.values()),
+        "zones": len(db.zone_index.origins),
+    }
+
+
+def record_counters(zones):
+    """
+    Count the records of every type in the parsed zones.
+    """
+    counters = collections.Counter()
+
+    for (zone, configs) in zones:
+        for rr in zone:
+            counters[rr.record_type] += 1
+
+    return counters
+
+
 @contextlib.contextmanager
 def prefix_file_reader(root_directory, path):
     generated_path = os.path.join(root_directory, 'generated')
@@ -183,10 +356,33 @@ def prefix_file_reader(root_directory, path):
         yield f
 
 
-def bsa_main(args):
+@contextlib.contextmanager
+def report_context(ns):
+    sink_type = SINKS[ns.report_format]
+
+    if sink_type is SINKS["log"]:
+        yield ReportContext(max_errors=ns.max_errors)
+        return
+
+    if ns.report_file is None:
+        yield ReportContext([sink_type()], max_errors=ns.max_errors)
+        return
+
+    with open(ns.report_file, "w") as f:
+        yield ReportContext([sink_type(f)], max_errors=ns.max_errors)
+
+
+def bsa_main(args, stats=None):
+    """
+    stats - A bsa.stats.PhaseStats to collect the timing of every phase, and
+            the counters of what was read and built, into.
+    """
+
+    if args and args[0] in COMMANDS:
+        return COMMANDS[args[0]](args[1:])
 
     parser = argparse.ArgumentParser(version="bsa " + __version__)
-    parser.add_argument("config", nargs='+')
+    add_load_arguments(parser)
 
     parser.add_argument(
         "-i", "--interactive", dest="interactive",
@@ -199,6 +395,149 @@ def bsa_main(args):
         help="Run the specified test suites.",
         default=[])
 
+    parser.add_argument(
+        "-j", "--suite-jobs", dest="suite_jobs", type=int,
+        default=1,
+        metavar="<jobs>",
+        help="Run test suites in <jobs> parallel worker processes, "
+             "sharing the loaded database. Default: 1")
+
+    parser.add_argument(
+        "-I", "--incremental", dest="incremental",
+        default=None,
+        metavar="<directory>",
+        help="Store suite results in <directory> and only re-evaluate what "
+             "changed since the last run.")
+
+    parser.add_argument(
+        "--report-format", dest="report_format",
+        default="log",
+        choices=sorted(SINKS),
+        help="Write findings through the logging system (log), as lines of "
+             "text (text) or as JSON objects, one per line (jsonl). "
+             "Default: log")
+
+    parser.add_argument(
+        "--report-file", dest="report_file",
+        default=None,
+        metavar="<file>",
+        help="Write findings to <file> instead of standard output.")
+
+    parser.add_argument(
+        "--max-errors", dest="max_errors", type=int,
+        default=None,
+        metavar="<count>",
+        help="Stop running test suites after <count> errors.")
+
+    parser.add_argument(
+        "--suite-stats", dest="suite_stats",
+        default=None,
+        choices=sorted(STATS_FORMATS),
+        help="Print time, query and memory statistics for every test suite "
+             "to standard error, as a table or as JSON.")
+
+    parser.add_argument(
+        "--stats", dest="stats",
+        nargs="?", const="table", default=None,
+        choices=sorted(STATS_FORMATS),
+        help="Print the time taken by every phase of loading and running, "
+             "and counters for files read, records and cache use, to "
+             "standard error. Default format: table")
+
+    parser.add_argument(
+        "--memory-report", dest="memory_report",
+        nargs="?", const="table", default=None,
+        choices=sorted(MEMORY_FORMATS),
+        help="Print the memory used by zones, record types, strings, "
+             "indexes and parser caches to standard error, largest "
+             "consumers first. Default format: table")
+
+    parser.add_argument(
+        "--profile", dest="profile",
+        default=None,
+        metavar="<directory>",
+        help="Profile every phase of loading, and every test suite, writing "
+             "one pstats file each to <directory>.")
+
+    parser.add_argument(
+        "--profile-sample", dest="profile_sample",
+        type=float, default=None,
+        metavar="<seconds>",
+        help="When profiling, also sample the stack every <seconds> of CPU "
+             "time and write the samples as collapsed stacks, suitable for "
+             "flame graphs.")
+
+    ns = parser.parse_args(args)
+    setup_logging(ns)
+
+    # record counters are only worth collecting if someone reads them.
+    count_records = stats is not None or ns.stats is not None
+
+    if stats is None:
+        stats = PhaseStats()
+
+    memory = None
+
+    if ns.memory_report is not None:
+        start_tracing()
+        memory = MemoryReport()
+
+    if ns.profile is not None:
+        stats.profiler = Profiler(ns.profile, interval=ns.profile_sample)
+        stats.profiler.start()
+
+    try:
+        return bsa_run(ns, stats, memory, count_records=count_records)
+    finally:
+        if stats.profiler is not None:
+            stats.profiler.stop()
+
+        if ns.stats == "json":
+            sys.stderr.write(stats.format_json() + "\n")
+        elif ns.stats is not None:
+            sys.stderr.write(stats.format_table() + "\n")
+
+        if memory is not None:
+            memory.add_parser_caches()
+            sys.stderr.write(MEMORY_FORMATS[ns.memory_report](memory))
+            sys.stderr.write("\n")
+
+
+def bsa_run(ns, stats, memory, count_records=False):
+    """
+    count_records - Count the loaded records by type into stats.
+    """
+    zones = load_zones(ns, stats)
+
+    if count_records:
+        stats.update(record_counters(zones), prefix="records.")
+
+    if memory is not None:
+        memory.add_zones(zones)
+
+    if ns.modules:
+        with report_context(ns) as context:
+            return run_modules(zones, ns.modules, jobs=ns.suite_jobs,
+                               state_dir=ns.incremental, context=context,
+                               suite_stats=ns.suite_stats, stats=stats,
+                               memory=memory)
+
+    if memory is not None:
+        import bsa.bind
+        memory.add_database(bsa.bind.FakeBind(zones))
+
+    if ns.interactive:
+        return run_interactive(zones)
+
+    return 0
+
+
+def add_load_arguments(parser):
+    """
+    Add the arguments used to load configurations, shared by all commands.
+    """
+    parser.add_argument("config", nargs='+')
+
     parser.add_argument(
         "-R", "--fake-root",
         dest="fake_root",
@@ -219,41 +558,343 @@ def bsa_main(args):
         metavar="<level>",
         help="Set log level. default: ERROR")
 
-    ns = parser.parse_args(args)
 
+def setup_logging(ns):
     logging.basicConfig(level=getattr(logging, ns.log_level),
                         format=LOGGING_FORMAT)
 
-    config = BindConfig(parser_cache=ns.parser_cache)
+
+def load_zones(ns, stats=None, config=None):
+    """
+    Parse the configurations given on the command line and all their zones.
+
+    config - The BindConfig to load into, by default a new one using the
+             parser cache given on the command line.
+
+    Returns a list of (records, configs) tuples.
+    """
+    if stats is None:
+        stats = PhaseStats()
+
+    if config is None:
+        config = BindConfig(parser_cache=ns.parser_cache)
 
     if not ns.config:
         raise Exception("No configurations specified")
 
     root_directory = os.path.dirname(ns.config[0])
+    file_reader = stats.file_reader(prefix_file_reader)
 
     for path in ns.config:
-        root_section = parse_config(
-            path, ns.fake_root,
-            root_directory=root_directory,
-            file_reader=prefix_file_reader)
+        stats.count("files")
+        stats.count("bytes", os.path.getsize(path))
+
+        with stats.phase("parse_config"):
+            root_section = parse_config(
+                path, ns.fake_root,
+                root_directory=root_directory,
+                file_reader=file_reader)
 
-        config.update_from_section(root_section)
+        with stats.phase("update_from_section"):
+            config.update_from_section(root_section)
 
     def zone_reporter(i, config, zone):
         logging.info(
             "{0:05}: {zone.file} ({zone.origin})".format(i, zone=zone)
         )
 
-    zones = config.parse_zones(
-        root_directory=root_directory,
-        fake_root=ns.fake_root,
-        file_reader=prefix_file_reader,
-        reporter=zone_reporter)
+    with stats.phase("parse_zones"):
+        zones = config.parse_zones(
+            root_directory=root_directory,
+            fake_root=ns.fake_root,
+            file_reader=file_reader,
+            reporter=zone_reporter)
 
-    if ns.modules:
-        return run_modules(zones, ns.modules)
+    stats.update(config.counters)
+    return zones
 
-    if ns.interactive:
-        return run_interactive(zones)
 
+def bsa_export(args):
+    """
+    Export the records of a configuration, see bsa.export.
+    """
+    from bsa.export import export_sqlite
+
+    parser = argparse.ArgumentParser(prog="bsa export")
+    add_load_arguments(parser)
+
+    parser.add_argument(
+        "--sqlite", dest="sqlite",
+        required=True,
+        metavar="<file>",
+        help="Write all records, zones and views to the SQLite database "
+             "<file>, replacing it if it exists.")
+
+    ns = parser.parse_args(args)
+    setup_logging(ns)
+
+    zones = load_zones(ns)
+    count = export_sqlite(zones, ns.sqlite)
+    logging.info("exported {0} record(s) to {1}".format(count, ns.sqlite))
+    return 0
+
+
+def bsa_sql(args):
+    """
+    Run SQL queries against an export, see bsa.export.
+    """
+    from bsa.export import SQL_FORMATS
+    from bsa.export import run_sql
+
+    parser = argparse.ArgumentParser(prog="bsa sql")
+    parser.add_argument("database", metavar="<file>")
+
+    parser.add_argument(
+        "query", nargs="?", default=None,
+        help="The query to run, read from standard input if not specified.")
+
+    parser.add_argument(
+        "--format", dest="format",
+        default="text",
+        choices=sorted(SQL_FORMATS),
+        help="Print rows as tab separated text with a header, or as JSON "
+             "objects, one per line. Default: text")
+
+    ns = parser.parse_args(args)
+
+    if not os.path.isfile(ns.database):
+        raise Exception("No such database: {0}".format(ns.database))
+
+    query = ns.query
+
+    if query is None:
+        query = sys.stdin.read()
+
+    run_sql(ns.database, query, SQL_FORMATS[ns.format](sys.stdout))
+    return 0
+
+
+def bsa_normalize(args):
+    """
+    Write all zones in canonical form, see bsa.writer.
+    """
+    from bsa.writer import write_zones
+
+    parser = argparse.ArgumentParser(prog="bsa normalize")
+    add_load_arguments(parser)
+
+    parser.add_argument(
+        "-o", "--output", dest="output",
+        required=True,
+        metavar="<directory>",
+        help="Write one zone file for every zone to <directory>.")
+
+    ns = parser.parse_args(args)
+    setup_logging(ns)
+
+    paths = write_zones(load_zones(ns), ns.output)
+    logging.info("wrote {0} zone(s) to {1}".format(len(paths), ns.output))
     return 0
+
+
+def bsa_diff(args):
+    """
+    Compare the records of two configurations, see bsa.diff.
+
+    Returns 1 if they differ, like diff(1).
+    """
+    import json
+    from bsa.diff import diff
+    from bsa.diff import load_sources
+
+    parser = argparse.ArgumentParser(prog="bsa diff")
+    parser.add_argument("old", metavar="<old-config>")
+    parser.add_argument("new", metavar="<new-config>")
+
+    parser.add_argument(
+        "-R", "--fake-root", dest="fake_root",
+        default="/etc/bind",
+        metavar="<directory>",
+        help="The fake root of both configurations, see bsa --help. "
+             "Default: /etc/bind")
+
+    parser.add_argument(
+        "--old-fake-root", dest="old_fake_root",
+        default=None,
+        metavar="<directory>",
+        help="The fake root of the old configuration, if it differs.")
+
+    parser.add_argument(
+        "--new-fake-root", dest="new_fake_root",
+        default=None,
+        metavar="<directory>",
+        help="The fake root of the new configuration, if it differs.")
+
+    parser.add_argument(
+        "-C", "--parser-cache", dest="parser_cache",
+        default=None,
+        metavar="<directory>",
+        help="Store pickled ASTs and zone digests to speed up subsequent "
+             "comparisons.")
+
+    parser.add_argument(
+        "--format", dest="format",
+        default="text",
+        choices=["jsonl", "text"],
+        help="Print changed RRsets as text, or as JSON objects, one per "
+             "line. Default: text")
+
+    parser.add_argument(
+        "-l", "--log-level", dest="log_level",
+        default="ERROR",
+        metavar="<level>",
+        help="Set log level. default: ERROR")
+
+    ns = parser.parse_args(args)
+    setup_logging(ns)
+
+    old = load_sources(ns.old, ns.old_fake_root or ns.fake_root,
+                       parser_cache=ns.parser_cache,
+                       file_reader=prefix_file_reader)
+    new = load_sources(ns.new, ns.new_fake_root or ns.fake_root,
+                       parser_cache=ns.parser_cache,
+                       file_reader=prefix_file_reader)
+
+    counters = collections.Counter()
+    result = 0
+
+    for change in diff(old, new, counters=counters):
+        if ns.format == "jsonl":
+            sys.stdout.write(json.dumps(change.to_dict(), sort_keys=True))
+        else:
+            sys.stdout.write(change.format())
+
+        sys.stdout.write("\n")
+        result = 1
+
+    logging.info("{0} zone(s) compared, {1} skipped".format(
+        counters["zones.compared"], counters["zones.skipped"]))
+    return result
+
+
+def bsa_serve(args):
+    """
+    Load a configuration once and serve queries over a local socket, see
+    bsa.server.
+    """
+    from bsa.server import Database
+    from bsa.server import Service
+    from bsa.server import make_server
+    from bsa.server import watch
+
+    parser = argparse.ArgumentParser(prog="bsa serve")
+    add_load_arguments(parser)
+
+    parser.add_argument(
+        "-s", "--socket", dest="socket",
+        default=None,
+        metavar="<path>",
+        help="Listen on the unix socket <path>.")
+
+    parser.add_argument(
+        "-p", "--port", dest="port", type=int,
+        default=None,
+        metavar="<port>",
+        help="Listen on localhost:<port> instead of a unix socket.")
+
+    parser.add_argument(
+        "--reload-interval", dest="reload_interval", type=float,
+        default=None,
+        metavar="<seconds>",
+        help="Check for changed files every <seconds>, and reload the zones "
+             "that changed.")
+
+    parser.add_argument(
+        "--allow-module", dest="allowed_modules", action="append",
+        default=None,
+        metavar="<pattern>",
+        help="Allow clients to run the modules matching <pattern>, can be "
+             "given multiple times (default: bsa.suites.*).")
+
+    ns = parser.parse_args(args)
+    setup_logging(ns)
+
+    if ns.socket is None and ns.port is None:
+        parser.error("either --socket or --port is required")
+
+    database = Database(
+        lambda config, stats: load_zones(ns, stats=stats, config=config),
+        paths=ns.config, parser_cache=ns.parser_cache)
+    database.reload()
+
+    service = Service(database, allowed_modules=ns.allowed_modules)
+    server = make_server(service, path=ns.socket, port=ns.port)
+
+    if ns.reload_interval is not None:
+        watch(database, ns.reload_interval)
+
+    logging.info("serving on {0}".format(ns.socket or ns.port))
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+        if ns.socket is not None and os.path.exists(ns.socket):
+            os.unlink(ns.socket)
+
+    return 0
+
+
+def bsa_dns_serve(args):
+    """
+    Answer DNS queries on localhost with the loaded records, see bsa.dns.
+    """
+    from bsa.bind import FakeBind
+    from bsa.dns import Responder
+    from bsa.dns import make_servers
+    from bsa.dns import serve
+
+    parser = argparse.ArgumentParser(prog="bsa dns-serve")
+    add_load_arguments(parser)
+
+    parser.add_argument(
+        "-p", "--port", dest="port", type=int,
+        default=5353,
+        metavar="<port>",
+        help="Listen for UDP and TCP queries on <port> (default: 5353).")
+
+    parser.add_argument(
+        "-a", "--address", dest="address",
+        default="127.0.0.1",
+        metavar="<address>",
+        help="Listen on <address> (default: 127.0.0.1).")
+
+    ns = parser.parse_args(args)
+    setup_logging(ns)
+
+    db = FakeBind(load_zones(ns))
+    responder = Responder(db)
+    servers = make_servers(responder, address=ns.address, port=ns.port)
+
+    logging.info("answering {0} record(s) on {1}:{2}".format(
+        db.size, ns.address, ns.port))
+
+    try:
+        serve(servers)
+    except KeyboardInterrupt:
+        pass
+
+    return 0
+
+
+COMMANDS = {
+    "diff": bsa_diff,
+    "dns-serve": bsa_dns_serve,
+    "export": bsa_export,
+    "normalize": bsa_normalize,
+    "serve": bsa_serve,
+    "sql": bsa_sql,
+}
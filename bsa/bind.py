@@ -1,9 +1,28 @@
-from bsa.named import BindConfig
+from bsa.cursor import Cursor
+from bsa.index import AddressIndex
+from bsa.index import NameIndex
+from bsa.index import ZoneIndex
+from bsa.join import Join
+from bsa.join import PROBE_COST
+from bsa.join import join
+from bsa.join import semi_join
+from bsa.join import anti_join
+from bsa.named import BindView
+from bsa.query import Select
+from bsa.utils import BoundedCache
 from bsa.utils import normalize_label
 from bsa.zone import Record
 
 
 import fnmatch
+import struct
+import hashlib
+import logging
+import collections
+
+import ipaddr
+
+log = logging.getLogger(__name__)
 
 
 class record_filter(object):
@@ -63,7 +82,7 @@ class config_filter(object):
             return True
 
         # root configuration
-        if type(config) == BindConfig:
+        if not isinstance(config, BindView):
             return True
 
         # view configuration.
@@ -73,6 +92,50 @@ class config_filter(object):
         return False
 
 
+class Resolution(object):
+    """
+    The outcome of resolving a name through FakeBind.resolve.
+
+    path - Every record traversed to reach the answer, in order. This
+           includes CNAMEs, delegation NS records and their glue, and
+           finally the answer itself.
+    answer - The records matching the requested type (empty unless status is
+             NOERROR).
+    """
+
+    NOERROR = "NOERROR"
+    NODATA = "NODATA"
+    NXDOMAIN = "NXDOMAIN"
+    REFERRAL = "REFERRAL"
+    LOOP = "LOOP"
+
+    __slots__ = ("name", "record_type", "status", "path", "answer")
+
+    def __init__(self, name, record_type, status, path=(), answer=()):
+        self.name = name
+        self.record_type = record_type
+        self.status = status
+        self.path = tuple(path)
+        self.answer = tuple(answer)
+
+    def chain(self, name, rr):
+        """
+        Build the resolution for name by prefixing the path with the record
+        that lead here.
+        """
+        return Resolution(name, self.record_type, self.status,
+                          (rr,) + self.path, self.answer)
+
+    def __nonzero__(self):
+        return self.status == self.NOERROR
+
+    def __repr__(self):
+        return (
+            "<Resolution {self.name} {self.record_type} {self.status} "
+            "path={self.path!r}>"
+        ).format(self=self)
+
+
 class FakeBind(object):
     """
     Pretend to be a bind daemon, giving the programmer some nifty tools to
@@ -81,6 +144,13 @@ class FakeBind(object):
 
     ANY = object()
 
+    REFERENCE_TYPES = set(["CNAME", "NS", "MX", "SRV", "PTR"])
+    ADDRESS_TYPES = set(["A", "AAAA"])
+
+    # The most entries kept by each of the memoizing caches (resolve,
+    # authority and delegation), they are emptied when full.
+    MEMO_LIMIT = 100000
+
     @classmethod
     def map_label(cls, label):
         """
@@ -102,38 +172,347 @@ class FakeBind(object):
     def __init__(self, zones):
         self.zones = zones
         self.cache = self.build_cache(zones)
+        self.size = sum(len(values) for values in self.cache.itervalues())
+        self.type_cache = self.build_type_cache(self.cache)
+        self.view_cache = self.build_view_cache(self.cache)
+        self.name_index = self.build_name_index(self.cache)
+        self.reverse_cache = self.build_reverse_cache(zones)
+        self.address_cache = self.build_address_cache(self.reverse_cache)
+        self.zone_index = self.build_zone_index(zones)
+        self.resolve_cache = BoundedCache(self.MEMO_LIMIT)
+        self.join_cache = dict()
+        # number of exists probes made per join cache key, see exists.
+        self.probe_counts = dict()
+        self.authority_cache = BoundedCache(self.MEMO_LIMIT)
+        # the result of the last call to rrsets.
+        self.last_rrsets = (None, None)
+        self.delegation_cache = BoundedCache(self.MEMO_LIMIT)
+        # query instrumentation, see bsa.stats.
+        self.counters = collections.Counter()
+        self._content_digest = None
 
     def build_cache(self, zones):
         cache = dict()
 
         for (zone, configs) in zones:
             for rr in zone:
+                # up front, instead of in the pages shared with forked
+                # workers.
+                rr.compute_id()
                 k = self.map_label(rr.resolved_label)
                 values = cache.setdefault(tuple(k), [])
                 values.append((rr, configs))
 
         return cache
 
-    def wildcard_records(self, name):
-        for (zone, configs) in self.zones:
+    def build_type_cache(self, cache):
+        """
+        Build a cache mapping record types to all records of that type.
+        """
+        type_cache = dict()
+
+        for values in cache.itervalues():
+            for entry in values:
+                type_cache.setdefault(entry[0].record_type, []).append(entry)
+
+        return type_cache
+
+    @classmethod
+    def config_name(cls, config):
+        """
+        Get the view name of a configuration, None for the root
+        configuration.
+        """
+        if not isinstance(config, BindView):
+            return None
+
+        return config.name
+
+    def build_view_cache(self, cache):
+        """
+        Build a cache mapping view names to all records served by that view.
+
+        Records in the root configuration are stored under None.
+        """
+        view_cache = dict()
+
+        for values in cache.itervalues():
+            for entry in values:
+                for config in entry[1]:
+                    name = self.config_name(config)
+                    view_cache.setdefault(name, []).append(entry)
+
+        return view_cache
+
+    def build_name_index(self, cache):
+        """
+        Build an index of all records sorted by name, allowing for subtree
+        queries.
+        """
+        return NameIndex(
+            (values[0][0].resolved_label, values)
+            for values in cache.itervalues())
+
+    @classmethod
+    def reference_key(cls, rr):
+        """
+        Build the key that a record refers to, either the resolved target name
+        or the address of A/AAAA records.
+
+        Returns None if the record does not refer to anything.
+        """
+        if rr.record_type in cls.REFERENCE_TYPES:
+            return rr.resolved_target
+
+        if rr.record_type in cls.ADDRESS_TYPES:
+            return ipaddr.IPAddress(rr.address)
+
+        return None
+
+    @classmethod
+    def lookup_reference_key(cls, target):
+        """
+        Map a user supplied name or address to a reverse cache key.
+        """
+        if not isinstance(target, basestring):
+            return target
+
+        try:
+            return ipaddr.IPAddress(target)
+        except ValueError:
+            return normalize_label(target)
+
+    def build_reverse_cache(self, zones):
+        """
+        Build a cache mapping referenced names and addresses to the records
+        that reference them.
+        """
+        cache = dict()
+
+        for (zone, configs) in zones:
             for rr in zone:
-                if not fnmatch.fnmatch(rr.resolved_label, name):
+                try:
+                    k = self.reference_key(rr)
+                except ValueError:
+                    log.warning("invalid address: {0!r}".format(rr))
                     continue
 
-                yield (rr, configs)
+                if k is None:
+                    continue
+
+                values = cache.setdefault(k, [])
+                values.append((rr, configs))
+
+        return cache
+
+    def build_address_cache(self, reverse_cache):
+        """
+        Build sorted address indexes, one for each IP version, out of the
+        addresses available in the reverse cache.
+        """
+        entries = {4: [], 6: []}
+
+        for k, values in reverse_cache.iteritems():
+            if isinstance(k, basestring):
+                continue
 
-    def wildcard_iquery(self, label, record=None, view=None):
+            entries[k.version].extend((int(k), v) for v in values)
+
+        return {
+            4: AddressIndex(entries[4], typecode='I'),
+            6: AddressIndex(entries[6]),
+        }
+
+    def build_zone_index(self, zones):
+        """
+        Build an index of all zone cuts, as defined by available SOA records.
+        """
+        index = ZoneIndex()
+
+        for (zone, configs) in zones:
+            for rr in zone:
+                if rr.record_type == 'SOA':
+                    index.add(rr.resolved_label, configs)
+
+        return index
+
+    def authoritative_zone(self, label, view=None):
+        """
+        Find the closest enclosing zone that the database is authoritative for.
+
+        Results are memoized per parent name, so siblings only walk the zone
+        index once.
+
+        Returns a tuple (origin, configs) where configs are the configurations
+        (views) serving the zone, or None if no zone encloses the label.
+        """
         label = normalize_label(label)
+        configs = self.zone_index.origins.get(label)
+
+        if configs is not None:
+            configs = filter(config_filter(view), configs)
+
+            if configs:
+                return label, configs
+
+        if label == ".":
+            return None
+
+        parent = label[label.find(".") + 1:] or "."
+        key = (parent, self.view_key(view))
+
+        if key in self.authority_cache:
+            self.counters["authority_cache.hit"] += 1
+            return self.authority_cache[key]
+
+        self.counters["authority_cache.miss"] += 1
+        result = self.authoritative_zone(parent, view=view)
+        self.authority_cache[key] = result
+        return result
+
+    def is_authoritative(self, label, view=None):
+        return self.authoritative_zone(label, view=view) is not None
+
+    def irrsets(self, keys=None):
+        """
+        Generate (view, rrsets) for every name in the database, where rrsets
+        maps record types to the records of that type at the name, as served
+        by the view.
+
+        Records served by several views are part of the RRsets of each view,
+        records in the root configuration are served by the view None.
+
+        keys - Only generate the names with these cache keys, used when
+               sharding or when only a few names are interesting.
+        """
+        if keys is None:
+            groups = self.cache.itervalues()
+        else:
+            groups = (self.cache.get(k, []) for k in keys)
+
+        config_name = self.config_name
+
+        for values in groups:
+            views = dict()
+
+            for (rr, configs) in values:
+                for name in set(map(config_name, configs)):
+                    rrsets = views.setdefault(name, dict())
+                    rrsets.setdefault(rr.record_type, []).append(rr)
+
+            for item in views.iteritems():
+                yield item
+
+    def rrsets(self, label, record=None):
+        """
+        Get a list of (view, rrsets) for a single name, see irrsets.
+
+        record - Only include records of these types.
+        """
+        key = (label, record)
+
+        # visitors ask for every record of a name in turn, and the records
+        # of a name are usually next to each other in a zone.
+        if self.last_rrsets[0] == key:
+            self.counters["rrsets_cache.hit"] += 1
+            return self.last_rrsets[1]
+
+        self.counters["rrsets_cache.miss"] += 1
+
+        config_name = self.config_name
+        views = dict()
+
+        for (rr, configs) in self.cache.get(tuple(self.map_label(label)), []):
+            if record is not None and rr.record_type not in record:
+                continue
 
-        result = list(self.wildcard_records(label))
+            for name in set(map(config_name, configs)):
+                rrsets = views.setdefault(name, dict())
+                rrsets.setdefault(rr.record_type, []).append(rr)
 
+        views = views.items()
+        self.last_rrsets = (key, views)
+        return views
+
+    def exists(self, label, record, view=None):
+        """
+        Check if a label, or the wildcard which would answer for it, has a
+        record of any of the given types.
+
+        Meant for visitors checking every record of a type against the same
+        targets. The first lookups probe the name cache, once they add up to
+        the cost of a hash join (see bsa.join.Join) the set of all target
+        names is built and shared by all further lookups.
+        """
+        self.counters["query.exists"] += 1
+
+        join = Join(self, (), None, record, view=view)
+        cache_key = (join.target_types, self.view_key(view))
+
+        if cache_key not in self.join_cache:
+            probes = self.probe_counts.get(cache_key, 0) + 1
+            self.probe_counts[cache_key] = probes
+
+            if join.count_targets() > probes * PROBE_COST:
+                return join.index_match()(label)
+
+        return join.hash_match()(label)
+
+    def ireferences(self, target, record=None, view=None):
+        """
+        Find all records that refer to the given name or address.
+        """
         rec_filter = record_filter(record)
         cfg_filter = config_filter(view)
 
-        for (rr, configs) in filter(rec_filter, result):
+        key = self.lookup_reference_key(target)
+        result = filter(rec_filter, self.reverse_cache.get(key, []))
+
+        for (rr, configs) in result:
             if any(filter(cfg_filter, configs)):
                 yield rr
 
+    def references(self, target, **kw):
+        return list(self.ireferences(target, **kw))
+
+    def iquery_network(self, network, record=None, view=None):
+        """
+        Find all A and AAAA records with an address inside of the given
+        network, in address order.
+
+        network - A network in CIDR notation, like 10.20.0.0/16.
+        """
+        if isinstance(network, basestring):
+            network = ipaddr.IPNetwork(network)
+
+        rec_filter = record_filter(record)
+        cfg_filter = config_filter(view)
+
+        index = self.address_cache[network.version]
+        result = index.range(int(network.network), int(network.broadcast))
+
+        for (rr, configs) in result:
+            if not rec_filter((rr, configs)):
+                continue
+
+            if any(filter(cfg_filter, configs)):
+                yield rr
+
+    def query_network(self, network, **kw):
+        return list(self.iquery_network(network, **kw))
+
+    def wildcard_records(self, name):
+        for (zone, configs) in self.zones:
+            for rr in zone:
+                if not fnmatch.fnmatch(rr.resolved_label, name):
+                    continue
+
+                yield (rr, configs)
+
+    def wildcard_iquery(self, label, record=None, view=None, unique=False):
+        return iter(self.cursor(label, record=record, view=view,
+                                unique=unique))
+
     def regular_iquery(self, label, record=None, view=None):
         rec_filter = record_filter(record)
         cfg_filter = config_filter(view)
@@ -141,7 +520,9 @@ class FakeBind(object):
         found_any = False
 
         for direct, key in self.build_keys(label):
-            result = filter(rec_filter, self.cache.get(key, []))
+            values = self.cache.get(key, [])
+            self.counters["scanned"] += len(values)
+            result = filter(rec_filter, values)
 
             for (rr, configs) in result:
                 if not any(filter(cfg_filter, configs)):
@@ -157,16 +538,20 @@ class FakeBind(object):
         unique = set()
 
         for r in gen:
-            if r in unique:
+            if r.id in unique:
                 continue
             yield r
-            unique.add(r)
+            unique.add(r.id)
 
     def iquery(self, label, record=None, view=None, unique=False):
         if '*' in label:
-            gen = self.wildcard_iquery(label, record=record, view=view)
-        else:
-            gen = self.regular_iquery(label, record=record, view=view)
+            self.counters["query.wildcard"] += 1
+            # cursors de-duplicate using the order of the name index.
+            return self.wildcard_iquery(label, record=record, view=view,
+                                        unique=unique)
+
+        self.counters["query.regular"] += 1
+        gen = self.regular_iquery(label, record=record, view=view)
 
         if unique:
             return self.unqiue_generator(gen)
@@ -176,6 +561,181 @@ class FakeBind(object):
     def query(self, label, **kw):
         return list(self.iquery(label, **kw))
 
+    @property
+    def content_digest(self):
+        """
+        A digest of all records and the views serving them, computed once.
+        """
+        if self._content_digest is None:
+            digest = hashlib.sha1()
+            config_name = self.config_name
+
+            for (rr, configs) in self.name_index.values:
+                digest.update(struct.pack(">q", rr.id))
+                digest.update(repr(map(config_name, configs)))
+
+            self._content_digest = digest.hexdigest()
+
+        return self._content_digest
+
+    def cursor(self, label=None, **kw):
+        """
+        Build a lazy, resumable cursor, see bsa.cursor.Cursor.
+
+            db.cursor("*.example.com", limit=100, offset=200)
+            db.cursor(under="example.com", record=["A"], token=token)
+        """
+        return Cursor(self, label, **kw)
+
+    def join(self, source_type, key_fn, target_types, **kw):
+        """
+        Join records of source_type against the names of records of
+        target_types, see bsa.join.Join.
+
+        Generates (rr, label, matched) tuples.
+        """
+        return join(self, source_type, key_fn, target_types, **kw)
+
+    def semi_join(self, source_type, key_fn, target_types, **kw):
+        return semi_join(self, source_type, key_fn, target_types, **kw)
+
+    def anti_join(self, source_type, key_fn, target_types, **kw):
+        """
+        Find all dangling references.
+
+            db.anti_join('CNAME', lambda rr: rr.resolved_target,
+                         ['A', 'CNAME'])
+
+        Generates (rr, label) for every source record whose key_fn label has
+        no record of any of target_types.
+        """
+        return anti_join(self, source_type, key_fn, target_types, **kw)
+
+    def select(self, **predicates):
+        """
+        Declaratively select records, see bsa.query.Select for the
+        available predicates.
+
+            db.select(type='A', name_under='corp.', ttl_lt=300)
+        """
+        return Select(self, **predicates)
+
+    @classmethod
+    def view_key(cls, view):
+        if isinstance(view, list):
+            return tuple(view)
+
+        return view
+
+    def find_delegation(self, label, view=None):
+        """
+        Find the closest delegation enclosing the given label.
+
+        A delegation is a set of NS records at a name for which there is no
+        SOA in the database, meaning that the data for the child zone is not
+        available here.
+
+        Returns a tuple of the NS records and their glue, or None if the label
+        is covered by an authoritative zone (or nothing at all).
+        """
+        key = (label, self.view_key(view))
+
+        if key in self.delegation_cache:
+            self.counters["delegation_cache.hit"] += 1
+            return self.delegation_cache[key]
+
+        self.counters["delegation_cache.miss"] += 1
+
+        parts = label.split(".")
+        result = None
+
+        for i in range(len(parts) - 1):
+            suffix = ".".join(parts[i:])
+
+            ns = self.query(suffix, record=['NS'], view=view)
+
+            if not ns:
+                continue
+
+            if self.query(suffix, record=['SOA'], view=view):
+                break
+
+            glue = list()
+
+            for rr in ns:
+                glue.extend(self.query(
+                    rr.resolved_target, record=['A', 'AAAA'], view=view))
+
+            result = tuple(ns + glue)
+            break
+
+        self.delegation_cache[key] = result
+        return result
+
+    def resolve(self, name, record_type='A', view=None):
+        """
+        Resolve a name the way a recursive resolver would, following CNAME
+        chains and NS delegations across all zones in the database.
+
+        Results are memoized per (name, record_type, view), so shared
+        segments of CNAME chains are only ever resolved once.
+
+        Returns a Resolution containing the full answer path.
+        """
+        return self._resolve(normalize_label(name), record_type, view, ())
+
+    def _resolve(self, label, record_type, view, seen):
+        key = (label, record_type, self.view_key(view))
+
+        result = self.resolve_cache.get(key)
+
+        if result is not None:
+            self.counters["resolve_cache.hit"] += 1
+            return result
+
+        self.counters["resolve_cache.miss"] += 1
+
+        result = self._resolve_uncached(label, record_type, view, seen)
+
+        # loop results depend on where the chain was entered.
+        if result.status != Resolution.LOOP or not seen:
+            self.resolve_cache[key] = result
+
+        return result
+
+    def _resolve_uncached(self, label, record_type, view, seen):
+        answer = self.query(label, record=[record_type], view=view)
+
+        if answer:
+            return Resolution(label, record_type, Resolution.NOERROR,
+                              answer, answer)
+
+        cnames = self.query(label, record=['CNAME'], view=view)
+
+        if cnames:
+            cname = cnames[0]
+            target = cname.resolved_target
+
+            if target in seen or target == label:
+                return Resolution(label, record_type, Resolution.LOOP,
+                                  (cname,))
+
+            result = self._resolve(
+                target, record_type, view, seen + (label,))
+
+            return result.chain(label, cname)
+
+        delegation = self.find_delegation(label, view=view)
+
+        if delegation is not None:
+            return Resolution(label, record_type, Resolution.REFERRAL,
+                              delegation)
+
+        if self.query(label, view=view):
+            return Resolution(label, record_type, Resolution.NODATA)
+
+        return Resolution(label, record_type, Resolution.NXDOMAIN)
+
     def q(self, name, **kw):
         """
         Helper function that prints the results directly.
@@ -0,0 +1,136 @@
+"""
+A client for databases served with 'bsa serve', see bsa.server.
+
+    with Client(path="/tmp/bsa.sock") as client:
+        for record in client.iquery("*.example.com", record="A"):
+            print record["text"]
+"""
+
+import json
+import socket
+import itertools
+
+
+class ServerError(Exception):
+    pass
+
+
+class Client(object):
+    """
+    Connect to a server over the unix socket path, or localhost:port.
+    """
+
+    def __init__(self, path=None, port=None, timeout=None):
+        if path is not None:
+            self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            address = path
+        elif port is not None:
+            self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            address = ("127.0.0.1", port)
+        else:
+            raise ValueError("Either a socket path or a port is required")
+
+        self.socket.settimeout(timeout)
+        self.socket.connect(address)
+        self.f = self.socket.makefile("rw")
+        self.ids = itertools.count(1)
+        # the id of the request whose response is being read.
+        self.pending = None
+
+    def messages(self, method, **params):
+        """
+        Send a request, and generate every message of the response up to and
+        including the one with the result.
+
+        If the caller stops early, the rest of the response is skipped when
+        the generator is closed, so that the connection can be used for the
+        next request.
+        """
+        request_id = next(self.ids)
+        self.f.write(json.dumps(
+            {"id": request_id, "method": method, "params": params}))
+        self.f.write("\n")
+        self.f.flush()
+
+        self.pending = request_id
+
+        try:
+            while self.pending is not None:
+                yield self.receive()
+        finally:
+            self.drain()
+
+    def receive(self):
+        """
+        Receive the next message of the pending response.
+        """
+        line = self.f.readline()
+
+        if not line:
+            self.pending = None
+            raise ServerError("Connection closed by server")
+
+        message = json.loads(line)
+
+        if message.get("id") != self.pending:
+            self.pending = None
+            raise ServerError("Unexpected response: {0!r}".format(message))
+
+        if "error" in message:
+            self.pending = None
+            raise ServerError(message["error"])
+
+        if "result" in message:
+            self.pending = None
+
+        return message
+
+    def drain(self):
+        """
+        Skip the rest of a response which was not read to the end.
+        """
+        while self.pending is not None:
+            try:
+                self.receive()
+            except ServerError:
+                pass
+
+    def call(self, method, **params):
+        for message in self.messages(method, **params):
+            if "result" in message:
+                return message["result"]
+
+    def query(self, label, record=None, view=None):
+        return self.call("query", label=label, record=record, view=view)
+
+    def iquery(self, label, record=None, view=None):
+        """
+        Generate records one by one, as they are sent by the server.
+        """
+        for message in self.messages("iquery", label=label, record=record,
+                                     view=view):
+            if "record" in message:
+                yield message["record"]
+
+    def resolve(self, name, record_type="A", view=None):
+        return self.call("resolve", name=name, record_type=record_type,
+                         view=view)
+
+    def run(self, modules):
+        return self.call("run", modules=modules)
+
+    def reload(self):
+        return self.call("reload")
+
+    def stats(self):
+        return self.call("stats")
+
+    def close(self):
+        self.f.close()
+        self.socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,210 @@
+import fnmatch
+import zlib
+
+from bsa.utils import normalize_label
+
+WILDCARD_CHARACTERS = "*?["
+
+
+def literal_suffix(label):
+    """
+    Get the longest suffix of whole labels in a pattern that does not contain
+    any wildcards.
+
+        *.example.com. -> example.com.
+    """
+    parts = label.split(".")
+    suffix = list()
+
+    for part in reversed(parts):
+        if any(c in part for c in WILDCARD_CHARACTERS):
+            break
+
+        suffix.insert(0, part)
+
+    return ".".join(suffix)
+
+
+class Cursor(object):
+    """
+    A lazy, resumable cursor over the name ordered index of a FakeBind
+    database.
+
+    Only the subtree of the index which can match the label is scanned, and
+    memory use is bounded regardless of how many rows are produced.
+
+    Since the index is ordered by name, duplicate records are always
+    adjacent, so de-duplication only has to remember the records of the
+    current name.
+
+        cursor = db.cursor("*.example.com", limit=1000)
+        page = cursor.fetch()
+        # later...
+        cursor = db.cursor("*.example.com", limit=1000, token=cursor.token)
+
+    label - Owner name, may contain fnmatch-style wildcards.
+    under - Instead of a label, match all names at or under this domain.
+    limit - Maximum number of rows to produce, None for no limit.
+    offset - Number of matching rows to skip, only for the first page.
+    token - A continuation token from a previous cursor over the same query,
+            only valid as long as the content of the database is the same.
+    """
+
+    def __init__(self, db, label=None, under=None, record=None, view=None,
+                 unique=False, limit=None, offset=0, token=None):
+        from bsa.bind import record_filter
+        from bsa.bind import config_filter
+
+        if (label is None) == (under is None):
+            raise ValueError("Exactly one of label or under must be given")
+
+        # the offset is already accounted for in the position of the token.
+        if offset and token is not None:
+            raise ValueError("An offset can not be used with a token")
+
+        self.db = db
+        self.record = record
+        self.view = view
+        self.unique = unique
+        self.limit = limit
+        self.offset = offset
+
+        self.rec_filter = record_filter(record)
+        self.cfg_filter = config_filter(view)
+
+        if under is not None:
+            self.label = None
+            self.scope = normalize_label(under)
+        else:
+            self.label = normalize_label(label)
+            self.scope = literal_suffix(self.label)
+
+        self.lo, self.hi = db.name_index.subtree_range(self.scope)
+        self.checksum = self.build_checksum()
+
+        if token is not None:
+            self.position = self.decode_token(token)
+        else:
+            self.position = self.lo
+
+    def build_checksum(self):
+        query = (self.label, self.scope, self.record, self.view, self.unique,
+                 self.db.content_digest)
+        return zlib.crc32(repr(query)) & 0xffffffff
+
+    def decode_token(self, token):
+        try:
+            checksum, position = token.split("-", 1)
+            checksum, position = int(checksum, 16), int(position)
+        except ValueError:
+            raise ValueError("Invalid continuation token: {0}".format(token))
+
+        if checksum != self.checksum or not self.lo <= position <= self.hi:
+            raise ValueError("Stale continuation token: {0}".format(token))
+
+        return position
+
+    @property
+    def token(self):
+        """
+        A token to resume from where this cursor stopped, or None if it has
+        been exhausted.
+        """
+        if self.position >= self.hi:
+            return None
+
+        return "{0:x}-{1}".format(self.checksum, self.position)
+
+    def match(self, entry):
+        rr, configs = entry
+
+        if self.label is not None:
+            label = rr.resolved_label
+
+            if label != self.label and \
+                    not fnmatch.fnmatchcase(label, self.label):
+                return False
+
+        if not self.rec_filter(entry):
+            return False
+
+        return any(filter(self.cfg_filter, configs))
+
+    def seen_in_group(self, position):
+        """
+        Rebuild the set of already produced records for the name at position,
+        used when resuming in the middle of a name.
+        """
+        keys, values = self.db.name_index.keys, self.db.name_index.values
+
+        seen = set()
+        i = position
+
+        while i > self.lo and keys[i - 1] == keys[position]:
+            i -= 1
+
+            if self.match(values[i]):
+                seen.add(values[i][0].id)
+
+        return seen
+
+    def __iter__(self):
+        start = self.position
+
+        try:
+            for rr in self.iter_matches():
+                yield rr
+        finally:
+            self.db.counters["scanned"] += self.position - start
+
+    def iter_matches(self):
+        keys, values = self.db.name_index.keys, self.db.name_index.values
+
+        remaining = self.limit
+
+        group = None
+        seen = set()
+
+        if self.unique and self.position < self.hi:
+            group = keys[self.position]
+            seen = self.seen_in_group(self.position)
+
+        while self.position < self.hi:
+            if remaining is not None and remaining <= 0:
+                return
+
+            position = self.position
+            self.position += 1
+
+            entry = values[position]
+
+            if not self.match(entry):
+                continue
+
+            if self.unique:
+                if keys[position] != group:
+                    group = keys[position]
+                    seen = set()
+
+                if entry[0].id in seen:
+                    continue
+
+                seen.add(entry[0].id)
+
+            if self.offset > 0:
+                self.offset -= 1
+                continue
+
+            if remaining is not None:
+                remaining -= 1
+
+            yield entry[0]
+
+    def fetch(self):
+        return list(self)
+
+    def __repr__(self):
+        return (
+            "<Cursor label={self.label} scope={self.scope} "
+            "position={self.position} range=({self.lo}, {self.hi})>"
+        ).format(self=self)
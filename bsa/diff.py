@@ -0,0 +1,321 @@
+"""
+Compare the records of two configurations.
+
+Every zone is summarized as a Merkle tree of digests: a digest for every
+name, computed from its records, and a digest for the zone computed from the
+digests of its names. Zones with equal digests are skipped without looking
+at their records, and only the names with differing digests are compared
+record by record.
+
+When a parser cache is used, the digests of every zone are cached next to
+its AST, so unchanged zones are neither parsed nor loaded at all.
+
+    old = load_sources("old/named.conf", "/etc/bind")
+    new = load_sources("new/named.conf", "/etc/bind")
+
+    for change in diff(old, new):
+        print change.kind, change.name, change.record_type
+"""
+
+import os
+import logging
+
+try:
+    import cPickle as pickle
+    assert pickle
+except ImportError:
+    import pickle
+
+from bsa.bind import FakeBind
+from bsa.incremental import short_digest
+from bsa.named import BindConfig
+from bsa.named import parse_config
+from bsa.utils import in_view
+from bsa.utils import normalize_label
+from bsa.writer import RDATA_FORMATS
+from bsa.writer import default_rdata
+
+log = logging.getLogger(__name__)
+
+# Bumped whenever the format of cached digests changes.
+DIGEST_VERSION = 2
+
+ADDED = "added"
+REMOVED = "removed"
+CHANGED = "changed"
+
+
+def record_key(rr):
+    """
+    The content of a record with all names fully qualified, so records
+    compare equal regardless of how they were written.
+    """
+    rdata = RDATA_FORMATS.get(rr.record_type, default_rdata)(rr, ".")
+    return (rr.resolved_label, rr.record_type, rr.ttl, rr.class_type, rdata)
+
+
+def format_key(key):
+    (name, record_type, ttl, class_type, rdata) = key
+    return "{0} {1} {2} {3} {4}".format(
+        name, ttl, class_type, record_type, rdata)
+
+
+def zone_digests(records):
+    """
+    Compute the digest of a zone, and of every name in it.
+
+    Returns a (digest, {name: digest}) tuple.
+    """
+    keys = dict()
+
+    for rr in records:
+        key = record_key(rr)
+        keys.setdefault(key[0], []).append(key)
+
+    names = dict(
+        (name, short_digest(sorted(values)))
+        for (name, values) in keys.iteritems())
+
+    return short_digest(sorted(names.items())), names
+
+
+class ZoneSource(object):
+    """
+    A zone of a configuration, which is only parsed when its records are
+    needed.
+    """
+
+    def __init__(self, config, zone, root_directory, fake_root,
+                 file_reader=None):
+        self.config = config
+        self.zone = zone
+        self.root_directory = root_directory
+        self.fake_root = fake_root
+        self.file_reader = file_reader
+        self._records = None
+        self._digests = None
+        # every file the records were read from, including $INCLUDEs.
+        self._paths = None
+
+    @property
+    def records(self):
+        if self._records is None:
+            paths = list()
+            self._records = self.config.load_zone(
+                self.zone, self.root_directory, self.fake_root,
+                file_reader=self.file_reader, paths=paths)
+            self._paths = paths
+
+        return self._records
+
+    def get_digest_path(self):
+        if self.config.parser_cache is None:
+            return None
+
+        return self.config.get_cache_path(self.zone) + ".digest"
+
+    def get_cached_digests(self, path):
+        if not os.path.isfile(path):
+            return None
+
+        if self.config.is_newer(self.zone.file, path):
+            return None
+
+        try:
+            with open(path) as f:
+                value = pickle.load(f)
+        except Exception as e:
+            log.warning("ignoring broken digest file: {0}: {1}".format(
+                path, str(e)))
+            return None
+
+        if value[0] != DIGEST_VERSION:
+            return None
+
+        (_, paths, digests) = value
+
+        try:
+            if any(self.config.is_newer(p, path) for p in paths):
+                return None
+        except OSError:
+            return None
+
+        return digests
+
+    @property
+    def digests(self):
+        if self._digests is not None:
+            return self._digests
+
+        path = self.get_digest_path()
+
+        if path is not None:
+            self._digests = self.get_cached_digests(path)
+
+        if self._digests is None:
+            self._digests = zone_digests(self.records)
+
+            if path is not None:
+                with open(path, "w") as f:
+                    pickle.dump(
+                        (DIGEST_VERSION, self._paths, self._digests), f)
+
+        return self._digests
+
+    @property
+    def digest(self):
+        return self.digests[0]
+
+    @property
+    def names(self):
+        return self.digests[1]
+
+
+def load_sources(path, fake_root, parser_cache=None, file_reader=None):
+    """
+    Load a configuration, without parsing any zones.
+
+    Returns a dict mapping (view, origin) to a ZoneSource for every zone,
+    views serving the same zone file share a source.
+    """
+    config = BindConfig(parser_cache=parser_cache)
+    root_directory = os.path.dirname(path)
+
+    config.update_from_section(parse_config(
+        path, fake_root, root_directory=root_directory,
+        file_reader=file_reader))
+
+    root_directory = os.path.abspath(root_directory)
+    sources = dict()
+    shared = dict()
+
+    for (zone_config, zone) in config.all_zones:
+        source = shared.get((zone.file, zone.origin))
+
+        if source is None:
+            source = shared[(zone.file, zone.origin)] = ZoneSource(
+                config, zone, root_directory, fake_root,
+                file_reader=file_reader)
+
+        key = (FakeBind.config_name(zone_config), normalize_label(zone.origin))
+        sources[key] = source
+
+    return sources
+
+
+class Change(object):
+    """
+    A changed RRset, old and new are sorted lists of record keys, see
+    record_key.
+    """
+
+    __slots__ = ("view", "origin", "name", "record_type", "old", "new")
+
+    def __init__(self, view, origin, name, record_type, old, new):
+        self.view = view
+        self.origin = origin
+        self.name = name
+        self.record_type = record_type
+        self.old = old
+        self.new = new
+
+    @property
+    def kind(self):
+        if not self.old:
+            return ADDED
+
+        if not self.new:
+            return REMOVED
+
+        return CHANGED
+
+    def to_dict(self):
+        return {
+            "view": self.view,
+            "zone": self.origin,
+            "name": self.name,
+            "type": self.record_type,
+            "change": self.kind,
+            "old": map(format_key, self.old),
+            "new": map(format_key, self.new),
+        }
+
+    def format(self):
+        lines = ["{0} {1} {2}{3}".format(
+            self.kind, self.name, self.record_type, in_view(self.view))]
+        lines.extend("- " + format_key(key) for key in self.old)
+        lines.extend("+ " + format_key(key) for key in self.new)
+        return "\n".join(lines)
+
+    def __repr__(self):
+        return "<Change {0} {1} {2}>".format(
+            self.kind, self.name, self.record_type)
+
+
+def rrsets(source, names):
+    """
+    Group the records of a source with any of the given names by name and
+    type.
+    """
+    result = dict()
+
+    if source is None:
+        return result
+
+    for rr in source.records:
+        key = record_key(rr)
+
+        if key[0] in names:
+            result.setdefault(key[:2], []).append(key)
+
+    return result
+
+
+def diff(old, new, counters=None):
+    """
+    Generate a Change for every RRset that differs between two sets of
+    sources, as returned by load_sources.
+
+    counters - If specified, a dict-like which counts the zones compared
+               and skipped.
+    """
+    if counters is None:
+        counters = dict()
+
+    counters.setdefault("zones.skipped", 0)
+    counters.setdefault("zones.compared", 0)
+
+    for key in sorted(set(old) | set(new)):
+        old_source = old.get(key)
+        new_source = new.get(key)
+
+        if old_source is not None and new_source is not None:
+            if old_source.digest == new_source.digest:
+                counters["zones.skipped"] += 1
+                continue
+
+        counters["zones.compared"] += 1
+
+        old_names = old_source.names if old_source is not None else {}
+        new_names = new_source.names if new_source is not None else {}
+
+        names = set(
+            name for name in set(old_names) | set(new_names)
+            if old_names.get(name) != new_names.get(name))
+
+        if not names:
+            continue
+
+        old_sets = rrsets(old_source, names)
+        new_sets = rrsets(new_source, names)
+
+        view, origin = key
+
+        for (name, record_type) in sorted(set(old_sets) | set(new_sets)):
+            old_keys = sorted(old_sets.get((name, record_type), []))
+            new_keys = sorted(new_sets.get((name, record_type), []))
+
+            if old_keys == new_keys:
+                continue
+
+            yield Change(view, origin, name, record_type, old_keys, new_keys)
@@ -0,0 +1,557 @@
+"""
+Answer DNS queries over UDP and TCP with the records of a FakeBind database.
+
+All answers are computed up front: for every view, name and record type the
+answer section is encoded once in wire format, using a compression pointer
+to the question for the owner name. Answering a query is then a dictionary
+lookup and a concatenation, which keeps the responder fast enough for load
+testing.
+
+The view is selected from the address of the client using the
+match-clients statements of the views, in the order they are defined.
+
+Answers follow FakeBind semantics: a name which has no records is answered
+with the records of the wildcard directly above it, CNAMEs are returned
+for queries of any type but are not followed, and negative answers carry
+the SOA of the enclosing zone. Names outside of all zones are refused.
+
+    responder = Responder(db)
+    serve(make_servers(responder, port=5353))
+"""
+
+import socket
+import struct
+import logging
+import threading
+import SocketServer
+
+import ipaddr
+
+from bsa.bind import FakeBind
+from bsa.named import BindView
+from bsa.utils import join_origin
+
+log = logging.getLogger(__name__)
+
+TYPES = {
+    "A": 1,
+    "NS": 2,
+    "CNAME": 5,
+    "SOA": 6,
+    "PTR": 12,
+    "MX": 15,
+    "TXT": 16,
+    "AAAA": 28,
+    "SRV": 33,
+    "AFSDB": 18,
+}
+
+CLASSES = {
+    "IN": 1,
+    "CH": 3,
+}
+
+TYPE_CNAME = TYPES["CNAME"]
+TYPE_ANY = 255
+
+NOERROR = 0
+FORMERR = 1
+SERVFAIL = 2
+NXDOMAIN = 3
+NOTIMP = 4
+REFUSED = 5
+
+FLAG_QR = 0x8000
+FLAG_AA = 0x0400
+FLAG_TC = 0x0200
+FLAG_RD = 0x0100
+OPCODE_MASK = 0x7800
+
+# the question name always follows the header.
+QUESTION_POINTER = struct.pack("!H", 0xc000 | 12)
+
+HEADER = struct.Struct("!HHHHHH")
+RR_HEADER = struct.Struct("!HHIH")
+
+# UDP responses larger than this are truncated, see RFC 1035.
+MAX_UDP_SIZE = 512
+
+LOOPBACK = [ipaddr.IPNetwork("127.0.0.0/8"), ipaddr.IPNetwork("::1/128")]
+
+
+def encode_name(name):
+    """
+    Encode a fully qualified name in wire format, without compression.
+    """
+    labels = [l for l in name.rstrip(".").split(".") if l]
+    return "".join(chr(len(l)) + l for l in labels) + "\0"
+
+
+def encode_txt(labels):
+    result = list()
+
+    for label in labels:
+        for i in xrange(0, max(len(label), 1), 255):
+            chunk = label[i:i + 255]
+            result.append(chr(len(chunk)) + chunk)
+
+    return "".join(result)
+
+
+def encode_rdata(rr):
+    """
+    Encode the data of a record, or return None if its type is not supported.
+    """
+    record_type = rr.record_type
+
+    if record_type == "A":
+        return ipaddr.IPv4Address(rr.address).packed
+
+    if record_type == "AAAA":
+        return ipaddr.IPv6Address(rr.address).packed
+
+    if record_type in ("NS", "CNAME", "PTR"):
+        return encode_name(rr.resolved_target)
+
+    if record_type in ("MX", "AFSDB"):
+        return struct.pack("!H", int(rr.priority)) + \
+            encode_name(join_origin(rr.target, rr.origin))
+
+    if record_type == "SRV":
+        return struct.pack("!HHH", int(rr.priority), int(rr.weight),
+                           int(rr.port)) + encode_name(rr.resolved_target)
+
+    if record_type == "TXT":
+        return encode_txt(rr.labels)
+
+    if record_type == "SOA":
+        return encode_name(rr.resolved_primary) + \
+            encode_name(join_origin(rr.mail, rr.origin)) + \
+            struct.pack("!IIIII", *map(int, rr.numbers))
+
+    return None
+
+
+def encode_rr(owner, rr, ttl=None):
+    """
+    Encode a complete resource record, owner is the encoded owner name.
+    """
+    rdata = encode_rdata(rr)
+
+    if rdata is None:
+        return None
+
+    if ttl is None:
+        ttl = rr.ttl
+
+    return owner + RR_HEADER.pack(
+        TYPES[rr.record_type], CLASSES.get(rr.class_type, 1), int(ttl),
+        len(rdata)) + rdata
+
+
+def parse_query(packet):
+    """
+    Parse the header and single question of a query.
+
+    Returns (id, flags, name, qtype, end of question), or raises ValueError.
+    """
+    if len(packet) < HEADER.size:
+        raise ValueError("Short packet")
+
+    (query_id, flags, qdcount, _, _, _) = HEADER.unpack_from(packet)
+
+    if qdcount != 1:
+        raise ValueError("Expected a single question")
+
+    labels = list()
+    offset = HEADER.size
+
+    while True:
+        length = ord(packet[offset])
+        offset += 1
+
+        if length == 0:
+            break
+
+        if length & 0xc0:
+            raise ValueError("Compressed question")
+
+        labels.append(packet[offset:offset + length])
+        offset += length
+
+    (qtype, _) = struct.unpack_from("!HH", packet, offset)
+    name = ".".join(labels).lower() + "."
+    return query_id, flags, name, qtype, offset + 4
+
+
+def build_query(name, qtype, query_id=0, flags=FLAG_RD):
+    """
+    Build a query packet, qtype is a type name or number.
+    """
+    if qtype == "ANY":
+        qtype = TYPE_ANY
+
+    qtype = TYPES.get(qtype, qtype)
+    return HEADER.pack(query_id, flags, 1, 0, 0, 0) + \
+        encode_name(name) + struct.pack("!HH", qtype, 1)
+
+
+class ClientMatcher(object):
+    """
+    Match client addresses against an address match list, as used by
+    match-clients.
+
+    acls - A dict mapping acl names to address match lists.
+    """
+
+    def __init__(self, elements, acls):
+        self.rules = list()
+
+        for element in elements:
+            negated = element.startswith("!")
+            element = element.lstrip("!")
+            self.rules.append((negated, self.build(element, acls)))
+
+    @classmethod
+    def build(cls, element, acls):
+        if element == "any":
+            return True
+
+        if element == "none":
+            return False
+
+        if element in ("localhost", "localnets"):
+            return LOOPBACK
+
+        if element in acls:
+            return ClientMatcher(acls[element], acls)
+
+        try:
+            return [ipaddr.IPNetwork(element)]
+        except ValueError:
+            log.warning("unsupported match-clients element: {0}".format(
+                element))
+            return False
+
+    def match(self, address):
+        """
+        Returns True if the address is accepted, False if it is rejected and
+        None if nothing matched.
+        """
+        for negated, rule in self.rules:
+            if isinstance(rule, ClientMatcher):
+                result = rule.match(address)
+
+                if result is None:
+                    continue
+
+                return result != negated
+
+            if rule is True:
+                return not negated
+
+            if rule is False:
+                continue
+
+            for network in rule:
+                if network.version == address.version and address in network:
+                    return not negated
+
+        return None
+
+
+class Responder(object):
+    """
+    Precomputed answers for all views of a database.
+    """
+
+    def __init__(self, db):
+        self.views = self.build_views(db)
+        # view -> {(name, qtype): (count, encoded records)}
+        self.answers = dict()
+        # view -> all names with records
+        self.names = dict()
+        # view -> {origin: encoded SOA record}
+        self.authority = dict()
+
+        for view in self.view_names():
+            self.answers[view] = dict()
+            self.names[view] = set()
+
+        self.build_answers(db)
+        self.build_authority(db)
+
+    def view_names(self):
+        if not self.views:
+            return [None]
+
+        return [name for (name, _) in self.views]
+
+    @classmethod
+    def build_views(cls, db):
+        """
+        Find all views and build a matcher for each, in configuration order.
+        """
+        root = None
+
+        for (zone, configs) in db.zones:
+            for config in configs:
+                while isinstance(config, BindView):
+                    config = config.parent
+
+                root = config
+
+        if root is None:
+            return []
+
+        # views without match-clients match every client, as in named.
+        return [
+            (view.name, ClientMatcher(view.match_clients or ["any"], root.acl))
+            for view in root.views.values()]
+
+    def visible_views(self, configs):
+        views = set()
+
+        for config in configs:
+            name = FakeBind.config_name(config)
+
+            if name is None:
+                return self.view_names()
+
+            views.add(name)
+
+        return views
+
+    def build_answers(self, db):
+        rrsets = dict()
+
+        for values in db.cache.itervalues():
+            for (rr, configs) in values:
+                if rr.record_type not in TYPES:
+                    continue
+
+                name = rr.resolved_label.lower()
+
+                for view in self.visible_views(configs):
+                    if view not in self.answers:
+                        continue
+
+                    rrsets.setdefault((view, name), dict()).setdefault(
+                        TYPES[rr.record_type], []).append(rr)
+
+        for (view, name), types in rrsets.iteritems():
+            answers = self.answers[view]
+            self.names[view].add(name)
+            everything = list()
+
+            for qtype, records in types.iteritems():
+                encoded = [encode_rr(QUESTION_POINTER, rr) for rr in records]
+                answers[(name, qtype)] = (len(encoded), "".join(encoded))
+                everything.extend(encoded)
+
+            answers[(name, TYPE_ANY)] = (len(everything), "".join(everything))
+
+    def build_authority(self, db):
+        """
+        Encode the SOA of every zone, used in negative answers.
+        """
+        for view in self.view_names():
+            self.authority[view] = dict()
+
+        for (zone, configs) in db.zones:
+            for rr in zone:
+                if rr.record_type != "SOA":
+                    continue
+
+                origin = rr.resolved_label
+                encoded = encode_rr(encode_name(origin), rr,
+                                    ttl=min(int(rr.ttl), int(rr.minimum)))
+
+                for view in self.visible_views(configs):
+                    if view in self.authority:
+                        self.authority[view].setdefault(
+                            origin.lower(), encoded)
+
+    def select_view(self, address):
+        if not self.views:
+            return None
+
+        try:
+            address = ipaddr.IPAddress(address)
+        except ValueError:
+            return None
+
+        for name, matcher in self.views:
+            if matcher.match(address):
+                return name
+
+        return None
+
+    def lookup(self, view, name, qtype):
+        """
+        Find the answer to a question.
+
+        Returns (rcode, count, answer, authority).
+        """
+        answers = self.answers.get(view)
+
+        if answers is None:
+            return REFUSED, 0, "", ""
+
+        names = self.names[view]
+
+        if name not in names:
+            wildcard = "*." + name[name.find(".") + 1:]
+
+            if wildcard in names:
+                name = wildcard
+
+        answer = answers.get((name, qtype))
+
+        if answer is None and qtype != TYPE_ANY:
+            answer = answers.get((name, TYPE_CNAME))
+
+        if answer is not None:
+            return NOERROR, answer[0], answer[1], ""
+
+        zones = self.authority.get(view, {})
+        label = name
+
+        while True:
+            soa = zones.get(label)
+
+            if soa is not None:
+                break
+
+            if label == ".":
+                return REFUSED, 0, "", ""
+
+            label = label[label.find(".") + 1:] or "."
+
+        if name in names:
+            return NOERROR, 0, "", soa
+
+        return NXDOMAIN, 0, "", soa
+
+    def respond(self, packet, address, max_size=None):
+        """
+        Build the response to a query packet from address, or None if the
+        packet can not be answered at all.
+        """
+        try:
+            query_id, flags, name, qtype, end = parse_query(packet)
+        except (ValueError, IndexError, struct.error):
+            if len(packet) < 2:
+                return None
+
+            return packet[:2] + struct.pack(
+                "!HHHHH", FLAG_QR | FORMERR, 0, 0, 0, 0)
+
+        question = packet[HEADER.size:end]
+        response_flags = FLAG_QR | (flags & (OPCODE_MASK | FLAG_RD))
+
+        if flags & OPCODE_MASK:
+            return HEADER.pack(query_id, response_flags | NOTIMP, 1, 0, 0,
+                               0) + question
+
+        view = self.select_view(address)
+        rcode, count, answer, authority = self.lookup(view, name, qtype)
+
+        if rcode != REFUSED:
+            response_flags |= FLAG_AA
+
+        response = HEADER.pack(
+            query_id, response_flags | rcode, 1, count,
+            1 if authority else 0, 0) + question + answer + authority
+
+        if max_size is not None and len(response) > max_size:
+            return HEADER.pack(
+                query_id, response_flags | rcode | FLAG_TC, 1, 0, 0, 0) + \
+                question
+
+        return response
+
+
+class UDPHandler(SocketServer.BaseRequestHandler):
+    def handle(self):
+        packet, sock = self.request
+        response = self.server.responder.respond(
+            packet, self.client_address[0], max_size=MAX_UDP_SIZE)
+
+        if response is not None:
+            sock.sendto(response, self.client_address)
+
+
+class TCPHandler(SocketServer.StreamRequestHandler):
+    def handle(self):
+        responder = self.server.responder
+
+        while True:
+            length = self.rfile.read(2)
+
+            if len(length) < 2:
+                return
+
+            packet = self.rfile.read(struct.unpack("!H", length)[0])
+            response = responder.respond(packet, self.client_address[0])
+
+            if response is None:
+                return
+
+            self.wfile.write(struct.pack("!H", len(response)) + response)
+            self.wfile.flush()
+
+
+def address_family(address):
+    if ":" in address:
+        return socket.AF_INET6
+
+    return socket.AF_INET
+
+
+class UDPServer(SocketServer.UDPServer):
+    allow_reuse_address = True
+
+    def __init__(self, server_address, handler):
+        self.address_family = address_family(server_address[0])
+        SocketServer.UDPServer.__init__(self, server_address, handler)
+
+
+class TCPServer(SocketServer.ThreadingMixIn, SocketServer.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, server_address, handler):
+        self.address_family = address_family(server_address[0])
+        SocketServer.TCPServer.__init__(self, server_address, handler)
+
+
+def make_servers(responder, address="127.0.0.1", port=53):
+    """
+    Build a UDP and a TCP server answering with responder.
+
+    With port 0, the TCP server listens on the port picked for UDP.
+    """
+    udp = UDPServer((address, port), UDPHandler)
+    tcp = TCPServer((address, udp.server_address[1]), TCPHandler)
+    udp.responder = tcp.responder = responder
+    return [udp, tcp]
+
+
+def serve(servers):
+    """
+    Serve all servers, each in its own thread, until interrupted.
+    """
+    threads = list()
+
+    for server in servers[1:]:
+        thread = threading.Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        threads.append(thread)
+
+    try:
+        servers[0].serve_forever()
+    finally:
+        for server in servers:
+            server.server_close()
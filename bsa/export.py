@@ -0,0 +1,243 @@
+"""
+Export the records of a configuration to SQLite, and query the export.
+
+The export is normalized into the following tables:
+
+    views(id, name) - Every configuration serving zones, the name of the
+                      root configuration is NULL.
+    zones(id, origin, path) - Every loaded zone.
+    zone_views(zone_id, view_id) - The views serving every zone.
+    records(id, record_id, zone_id, name, type, ttl, class, target, address,
+            data, path) - Every record. record_id is the stable content based
+                          id of the record, target is the name that CNAME,
+                          NS, MX, SRV and PTR records refer to and address the
+                          address of A and AAAA records.
+
+record_views joins records with the views serving them.
+
+    #> bsa export /etc/bind/named.conf --sqlite bind.db
+    #> bsa sql bind.db "SELECT type, count(*) FROM records GROUP BY type"
+"""
+
+import os
+import csv
+import json
+import sqlite3
+import logging
+import itertools
+
+from bsa.bind import FakeBind
+
+log = logging.getLogger(__name__)
+
+# number of rows inserted with every executemany.
+BATCH_SIZE = 10000
+
+SCHEMA = [
+    "CREATE TABLE views ("
+    "id INTEGER PRIMARY KEY, name TEXT)",
+    "CREATE TABLE zones ("
+    "id INTEGER PRIMARY KEY, origin TEXT NOT NULL, path TEXT)",
+    "CREATE TABLE zone_views ("
+    "zone_id INTEGER NOT NULL REFERENCES zones(id), "
+    "view_id INTEGER NOT NULL REFERENCES views(id))",
+    "CREATE TABLE records ("
+    "id INTEGER PRIMARY KEY, record_id INTEGER NOT NULL, "
+    "zone_id INTEGER NOT NULL REFERENCES zones(id), name TEXT NOT NULL, "
+    "type TEXT NOT NULL, ttl INTEGER, class TEXT, target TEXT, "
+    "address TEXT, data TEXT, path TEXT)",
+    "CREATE VIEW record_views AS "
+    "SELECT records.*, views.name AS view FROM records "
+    "JOIN zone_views ON zone_views.zone_id = records.zone_id "
+    "JOIN views ON views.id = zone_views.view_id",
+]
+
+# created once all rows are inserted, which is cheaper than maintaining them
+# for every insert.
+INDEXES = [
+    "CREATE INDEX records_name ON records (name)",
+    "CREATE INDEX records_type_name ON records (type, name)",
+    "CREATE INDEX records_target ON records (target)",
+    "CREATE INDEX records_address ON records (address)",
+    "CREATE INDEX records_zone ON records (zone_id)",
+    "CREATE INDEX records_record_id ON records (record_id)",
+    "CREATE INDEX zone_views_zone ON zone_views (zone_id)",
+    "CREATE INDEX zone_views_view ON zone_views (view_id)",
+]
+
+INSERT_RECORD = (
+    "INSERT INTO records (record_id, zone_id, name, type, ttl, class, "
+    "target, address, data, path) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)")
+
+
+def zone_origin(zone):
+    """
+    Get the origin and path of a zone, as given by its SOA record.
+    """
+    for rr in zone:
+        if rr.record_type == "SOA":
+            return rr.resolved_label, rr.path
+
+    if zone:
+        return zone[0].origin, zone[0].path
+
+    return ".", None
+
+
+def record_row(zone_id, rr):
+    target = None
+    address = None
+
+    if rr.record_type in FakeBind.REFERENCE_TYPES:
+        target = rr.resolved_target
+    elif rr.record_type in FakeBind.ADDRESS_TYPES:
+        address = str(rr.address)
+
+    return (
+        rr.id, zone_id, rr.resolved_label, rr.record_type, rr.ttl,
+        rr.class_type, target, address,
+        " ".join(map(str, rr.origin_values())), rr.path)
+
+
+def batches(iterable, size=BATCH_SIZE):
+    iterator = iter(iterable)
+
+    while True:
+        batch = list(itertools.islice(iterator, size))
+
+        if not batch:
+            return
+
+        yield batch
+
+
+def export_sqlite(zones, path):
+    """
+    Export zones, a list of (records, configs) tuples, to a SQLite database
+    at path. An existing database is replaced.
+
+    Rows are streamed in batches within a single transaction, indexes are
+    created at the end.
+
+    Returns the number of exported records.
+    """
+    if os.path.exists(path):
+        os.unlink(path)
+
+    connection = sqlite3.connect(path)
+
+    try:
+        # the export is rebuilt from scratch if anything fails.
+        connection.execute("PRAGMA journal_mode = OFF")
+        connection.execute("PRAGMA synchronous = OFF")
+
+        for statement in SCHEMA:
+            connection.execute(statement)
+
+        count = insert_zones(connection, zones)
+
+        for statement in INDEXES:
+            connection.execute(statement)
+
+        connection.commit()
+    finally:
+        connection.close()
+
+    return count
+
+
+def insert_zones(connection, zones):
+    views = dict()
+    count = [0]
+
+    def view_id(config):
+        key = id(config)
+        value = views.get(key)
+
+        if value is not None:
+            return value
+
+        value = views[key] = len(views) + 1
+        connection.execute(
+            "INSERT INTO views (id, name) VALUES (?, ?)",
+            (value, FakeBind.config_name(config)))
+        return value
+
+    def rows():
+        for zone_id, (zone, configs) in enumerate(zones, 1):
+            origin, path = zone_origin(zone)
+
+            connection.execute(
+                "INSERT INTO zones (id, origin, path) VALUES (?, ?, ?)",
+                (zone_id, origin, path))
+
+            connection.executemany(
+                "INSERT INTO zone_views (zone_id, view_id) VALUES (?, ?)",
+                [(zone_id, view_id(config)) for config in configs])
+
+            count[0] += len(zone)
+
+            for rr in zone:
+                yield record_row(zone_id, rr)
+
+    for batch in batches(rows()):
+        connection.executemany(INSERT_RECORD, batch)
+
+    return count[0]
+
+
+class TextWriter(object):
+    """
+    Write rows as tab separated text, with a header.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, columns, rows):
+        writer = csv.writer(self.stream, delimiter="\t", lineterminator="\n")
+        writer.writerow(columns)
+
+        for row in rows:
+            writer.writerow([
+                "" if v is None else unicode(v).encode("utf-8") for v in row])
+
+
+class JSONWriter(object):
+    """
+    Write rows as JSON objects, one per line.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, columns, rows):
+        for row in rows:
+            self.stream.write(json.dumps(dict(zip(columns, row)),
+                                         sort_keys=True))
+            self.stream.write("\n")
+
+
+SQL_FORMATS = {
+    "text": TextWriter,
+    "jsonl": JSONWriter,
+}
+
+
+def run_sql(path, query, writer):
+    """
+    Run a query against an export, writing the resulting rows to writer.
+    """
+    connection = sqlite3.connect(path)
+
+    try:
+        cursor = connection.execute(query)
+
+        if cursor.description is None:
+            connection.commit()
+            return
+
+        columns = [d[0] for d in cursor.description]
+        writer.write(columns, cursor)
+    finally:
+        connection.close()
@@ -0,0 +1,438 @@
+import os
+import sys
+import fnmatch
+import hashlib
+import logging
+
+try:
+    import cPickle as pickle
+    assert pickle
+except ImportError:
+    import pickle
+
+from bsa.reporter import RecordingReporter
+from bsa.suite import get_suite
+from bsa.suite import run_fused
+from bsa.utils import normalize_label
+
+log = logging.getLogger(__name__)
+
+# Bumped whenever the format of stored state changes, older state is ignored.
+STATE_VERSION = 2
+
+
+def short_digest(value):
+    return hashlib.sha1(repr(value)).digest()[:8]
+
+
+class Snapshot(object):
+    """
+    Digests of the content of a database, used to find which names changed
+    between two runs.
+
+    Digests are kept per file and per name within each file, so files which
+    did not change are skipped in O(1).
+    """
+
+    def __init__(self, files, zone_cuts):
+        """
+        files - A dict mapping path to (digest, {name: digest}).
+        zone_cuts - A digest of all zone cuts in the database.
+        """
+        self.files = files
+        self.zone_cuts = zone_cuts
+
+    @classmethod
+    def build(cls, db):
+        entries = dict()
+
+        for (zone, configs) in db.zones:
+            views = tuple(sorted(map(str, map(db.config_name, configs))))
+
+            for rr in zone:
+                names = entries.setdefault(rr.path, dict())
+                values = names.setdefault(rr.resolved_label, [])
+                values.append((rr.id, views))
+
+        files = dict()
+
+        for path, names in entries.iteritems():
+            digests = dict(
+                (name, short_digest(sorted(values)))
+                for (name, values) in names.iteritems())
+
+            files[path] = (short_digest(sorted(digests.items())), digests)
+
+        zone_cuts = short_digest(sorted(
+            (origin, sorted(map(str, map(db.config_name, configs))))
+            for (origin, configs) in db.zone_index.origins.iteritems()))
+
+        return cls(files, zone_cuts)
+
+    def changes(self, other):
+        """
+        Compute the changes from another (older) snapshot to this one.
+        """
+        names = set()
+
+        for path in set(self.files) | set(other.files):
+            new_digest, new_names = self.files.get(path, (None, {}))
+            old_digest, old_names = other.files.get(path, (None, {}))
+
+            if new_digest == old_digest:
+                continue
+
+            for name in set(new_names) | set(old_names):
+                if new_names.get(name) != old_names.get(name):
+                    names.add(name)
+
+        return Changes(names, self.zone_cuts != other.zone_cuts)
+
+    @property
+    def digest(self):
+        return short_digest(
+            (sorted((p, d) for (p, (d, _)) in self.files.iteritems()),
+             self.zone_cuts))
+
+
+class Changes(object):
+    """
+    The names which changed between two snapshots, and if the set of zone
+    cuts changed.
+    """
+
+    def __init__(self, names, zone_cuts):
+        self.names = names
+        self.zone_cuts = zone_cuts
+
+    def affects(self, deps):
+        if deps.volatile:
+            return True
+
+        if deps.zone_cuts and self.zone_cuts:
+            return True
+
+        if not self.names.isdisjoint(deps.names):
+            return True
+
+        for pattern in deps.patterns:
+            if fnmatch.filter(self.names, pattern):
+                return True
+
+        return False
+
+
+class Dependencies(object):
+    """
+    Everything a single verdict depended on.
+
+    names - Exact names that were looked up.
+    patterns - Wildcard patterns that were looked up.
+    zone_cuts - If the set of authoritative zones was consulted.
+    volatile - If anything that cannot be tracked was used, in which case the
+               verdict can never be reused.
+    """
+
+    __slots__ = ("names", "patterns", "zone_cuts", "volatile")
+
+    def __init__(self):
+        self.names = set()
+        self.patterns = set()
+        self.zone_cuts = False
+        self.volatile = False
+
+
+class RecordingDB(object):
+    """
+    A proxy for FakeBind which records the dependencies of all lookups made
+    through it.
+
+    Lookups through query, iquery and exists depend on the looked up name
+    (and the wildcard which could answer for it), rrsets depends on the name
+    only and authoritative zone lookups depend on the set of zone cuts. Any
+    other use of the database is volatile.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.deps = None
+
+    def begin(self):
+        self.deps = Dependencies()
+
+    def end(self):
+        deps, self.deps = self.deps, None
+        return deps
+
+    def depend(self, label):
+        label = normalize_label(label)
+
+        if self.deps is None:
+            return label
+
+        if '*' in label:
+            self.deps.patterns.add(label)
+        else:
+            self.deps.names.add(label)
+            self.deps.names.add("*." + label.split(".", 1)[-1])
+
+        return label
+
+    def iquery(self, label, **kw):
+        return self.db.iquery(self.depend(label), **kw)
+
+    def exists(self, label, record, view=None):
+        return self.db.exists(self.depend(label), record, view=view)
+
+    def rrsets(self, label, record=None):
+        if self.deps is not None:
+            self.deps.names.add(normalize_label(label))
+
+        return self.db.rrsets(label, record=record)
+
+    def query(self, label, **kw):
+        return list(self.iquery(label, **kw))
+
+    def authoritative_zone(self, label, view=None):
+        if self.deps is not None:
+            self.deps.zone_cuts = True
+
+        return self.db.authoritative_zone(label, view=view)
+
+    def is_authoritative(self, label, view=None):
+        return self.authoritative_zone(label, view=view) is not None
+
+    def __getattr__(self, name):
+        if self.deps is not None:
+            self.deps.volatile = True
+
+        return getattr(self.db, name)
+
+
+class IncrementalSuite(object):
+    """
+    Wraps a visitor suite, reusing the verdicts of a previous run for all
+    records whose dependencies did not change.
+
+    The wrapped suite reports through a recording reporter, findings are
+    passed on as they arrive and the ones belonging to each verdict are kept
+    to be stored and replayed later.
+    """
+
+    def __init__(self, suite_type, db, reporter, previous, changes):
+        self.proxy = RecordingDB(db)
+        self.capture = RecordingReporter(reporter)
+        self.suite = suite_type(self.proxy, self.capture)
+        self.reporter = reporter
+        self.previous = previous
+        self.changes = changes
+        self.verdicts = dict()
+        self.reused = 0
+        self.evaluated = 0
+
+    def visitors(self):
+        return dict(
+            (record_type, self.wrap(visitor))
+            for (record_type, visitor) in self.suite.visitors().items())
+
+    def wrap(self, visitor):
+        def visit(rr):
+            verdict = self.verdicts.get(rr.id)
+
+            if verdict is None:
+                verdict = self.lookup(rr)
+
+            if verdict is None:
+                self.verdicts[rr.id] = self.evaluate(visitor, rr)
+                return
+
+            self.verdicts[rr.id] = verdict
+            self.replay(verdict)
+
+        return visit
+
+    def lookup(self, rr):
+        if self.changes is None:
+            return None
+
+        verdict = self.previous.get(rr.id)
+
+        if verdict is None:
+            return None
+
+        if self.changes.affects(verdict[2]):
+            return None
+
+        self.reused += 1
+        return verdict
+
+    def evaluate(self, visitor, rr):
+        ok = self.suite.ok
+        self.suite.ok = True
+
+        self.proxy.begin()
+        visitor(rr)
+        deps = self.proxy.end()
+
+        verdict = (self.suite.ok, tuple(self.capture.findings), deps)
+
+        self.suite.ok = ok and self.suite.ok
+        self.capture.clear()
+        self.evaluated += 1
+        return verdict
+
+    def replay(self, verdict):
+        ok, findings, _ = verdict
+
+        if not ok:
+            self.suite.ok = False
+
+        self.reporter.replay(findings)
+
+    def finish(self):
+        result = self.suite.finish()
+        self.capture.clear()
+        return result
+
+
+def module_digest(mod):
+    """
+    Digest the source of a module, cached results are discarded when a suite
+    changes.
+    """
+    path = getattr(mod, "__file__", None)
+
+    if path is None:
+        return None
+
+    if path.endswith((".pyc", ".pyo")):
+        path = path[:-1]
+
+    try:
+        with open(path) as f:
+            return short_digest(f.read())
+    except IOError:
+        return None
+
+
+class IncrementalState(object):
+    """
+    The stored state of a single module, kept in a file per module in the
+    state directory.
+    """
+
+    def __init__(self, state_dir, module):
+        self.path = os.path.join(state_dir, module + ".state")
+
+    def load(self):
+        if not os.path.isfile(self.path):
+            return None
+
+        try:
+            with open(self.path, "rb") as f:
+                state = pickle.load(f)
+        except Exception as e:
+            log.warning("ignoring broken state file: {0}: {1}".format(
+                self.path, str(e)))
+            return None
+
+        if state.get("version") != STATE_VERSION:
+            return None
+
+        return state
+
+    def store(self, state):
+        state["version"] = STATE_VERSION
+
+        try:
+            with open(self.path, "wb") as f:
+                pickle.dump(state, f, pickle.HIGHEST_PROTOCOL)
+        except:
+            log.error("could not store state: {0}".format(self.path),
+                      exc_info=sys.exc_info())
+
+
+def execute_incremental(bootstrap, modules, state_dir, no_report=False):
+    """
+    Execute modules, reusing the results of the previous run stored in
+    state_dir where their inputs did not change.
+
+    Visitor suites are re-evaluated per record, only records whose
+    dependencies (looked up names, zone cuts) changed are visited again.
+    Suites that set 'incremental = False', and old-style modules, are only
+    reused when nothing in the database changed.
+
+    Returns a list of results in the same order as the modules.
+    """
+    db = bootstrap.db
+    snapshot = Snapshot.build(db)
+
+    results = [None] * len(modules)
+    reporters = [bootstrap.reporter_type(name=module) for module in modules]
+    incremental = list()
+    stores = list()
+
+    for i, module in enumerate(modules):
+        mod = bootstrap.get_refresh_module(module)
+        store = IncrementalState(state_dir, module)
+        previous = store.load()
+        digest = module_digest(mod)
+
+        if previous is not None and previous["module"] != digest:
+            previous = None
+
+        suite_type = get_suite(mod)
+
+        if suite_type is not None and suite_type.incremental:
+            changes = None
+            verdicts = dict()
+
+            if previous is not None and "verdicts" in previous:
+                changes = snapshot.changes(previous["snapshot"])
+                verdicts = previous["verdicts"]
+
+            suite = IncrementalSuite(
+                suite_type, db, reporters[i], verdicts, changes)
+
+            incremental.append((i, suite))
+            stores.append((store, digest, suite))
+            continue
+
+        if previous is not None and \
+                previous["snapshot"].digest == snapshot.digest:
+            log.info("{0}: reusing previous result".format(module))
+            results[i] = previous["result"]
+            reporters[i].replay(previous["findings"])
+            continue
+
+        capture = RecordingReporter(reporters[i])
+        results[i] = bootstrap.run_module(module, capture)
+
+        store.store({
+            "module": digest,
+            "snapshot": snapshot,
+            "result": results[i],
+            "findings": capture.findings,
+        })
+
+    if incremental:
+        fused_results = run_fused(db, [s for (_, s) in incremental])
+
+        for (i, _), result in zip(incremental, fused_results):
+            results[i] = result
+
+    for store, digest, suite in stores:
+        log.info("{0}: reused {1} verdict(s), evaluated {2}".format(
+            suite.reporter.name, suite.reused, suite.evaluated))
+
+        store.store({
+            "module": digest,
+            "snapshot": snapshot,
+            "verdicts": suite.verdicts,
+        })
+
+    if not no_report:
+        for reporter in reporters:
+            reporter.print_all()
+
+    return results
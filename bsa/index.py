@@ -0,0 +1,166 @@
+import array
+import bisect
+
+
+class AddressIndex(object):
+    """
+    A sorted, array-backed index of integer addresses.
+
+    Range queries are answered with binary search over the sorted keys, which
+    makes looking up all addresses within a network O(log n + k).
+    """
+
+    def __init__(self, entries, typecode=None):
+        """
+        entries - An iterable of (key, value) tuples, where key is the integer
+                  form of an address.
+        typecode - If specified, store keys in an array of this type instead
+                   of a list.
+        """
+        entries = sorted(entries, key=lambda e: e[0])
+
+        keys = [k for (k, _) in entries]
+
+        if typecode is not None:
+            self.keys = array.array(typecode, keys)
+        else:
+            self.keys = keys
+
+        self.values = [v for (_, v) in entries]
+
+    def range(self, first, last):
+        """
+        Generate all values with keys in the inclusive range first - last.
+        """
+        lo = bisect.bisect_left(self.keys, first)
+        hi = bisect.bisect_right(self.keys, last)
+
+        for i in xrange(lo, hi):
+            yield self.values[i]
+
+    def count(self, first, last):
+        lo = bisect.bisect_left(self.keys, first)
+        hi = bisect.bisect_right(self.keys, last)
+        return hi - lo
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __repr__(self):
+        return "<AddressIndex size={0}>".format(len(self))
+
+
+class ZoneIndex(object):
+    """
+    An index of zone cuts, mapping each zone origin to the configurations
+    which are authoritative for it.
+
+    Finding the enclosing zones of a name walks its suffixes from the longest
+    to the shortest, which is O(depth) dictionary lookups regardless of the
+    number of zones.
+    """
+
+    def __init__(self):
+        self.origins = dict()
+
+    def add(self, origin, configs):
+        values = self.origins.setdefault(origin, [])
+
+        for config in configs:
+            if config not in values:
+                values.append(config)
+
+    def enclosing(self, label):
+        """
+        Generate (origin, configs) for all zones enclosing the given label,
+        closest first.
+        """
+        while True:
+            configs = self.origins.get(label)
+
+            if configs is not None:
+                yield label, configs
+
+            if label == ".":
+                return
+
+            label = label[label.find(".") + 1:] or "."
+
+    def __len__(self):
+        return len(self.origins)
+
+    def __repr__(self):
+        return "<ZoneIndex size={0}>".format(len(self))
+
+
+class NameIndex(object):
+    """
+    An index of entries sorted by their reversed labels.
+
+    This places every subtree in a contiguous range, so all names under a
+    given domain can be found with two binary searches.
+    """
+
+    def __init__(self, groups):
+        """
+        groups - An iterable of (label, values) tuples, where values is a list
+                 of entries for that label.
+        """
+        groups = sorted(
+            ((self.name_key(label), values) for (label, values) in groups),
+            key=lambda g: g[0])
+
+        self.keys = list()
+        self.values = list()
+
+        for key, values in groups:
+            self.keys.extend([key] * len(values))
+            self.values.extend(values)
+
+    @classmethod
+    def name_key(cls, label):
+        """
+        Build the sort key for a label.
+
+            www.example.com. -> ('com', 'example', 'www')
+        """
+        label = label.rstrip(".")
+
+        if not label:
+            return ()
+
+        return tuple(reversed(label.split(".")))
+
+    def subtree_range(self, label):
+        """
+        Get the range of positions of all entries at or under label.
+        """
+        key = self.name_key(label)
+
+        if not key:
+            return 0, len(self.keys)
+
+        upper = key[:-1] + (key[-1] + "\x00",)
+
+        lo = bisect.bisect_left(self.keys, key)
+        hi = bisect.bisect_left(self.keys, upper)
+        return lo, hi
+
+    def subtree(self, label):
+        """
+        Generate all entries at or under label, in name order.
+        """
+        lo, hi = self.subtree_range(label)
+
+        for i in xrange(lo, hi):
+            yield self.values[i]
+
+    def count(self, label):
+        lo, hi = self.subtree_range(label)
+        return hi - lo
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __repr__(self):
+        return "<NameIndex size={0}>".format(len(self))
@@ -0,0 +1,221 @@
+import logging
+
+from bsa.utils import normalize_label
+
+log = logging.getLogger(__name__)
+
+HASH = "hash"
+INDEX = "index"
+
+# Relative cost of probing the name cache for a single source, compared to
+# adding a single target record to a hash table.
+PROBE_COST = 4
+
+
+def as_list(value):
+    if isinstance(value, (list, tuple, set)):
+        return list(value)
+
+    return [value]
+
+
+class Join(object):
+    """
+    Joins records of a source type against the names of target records.
+
+    For every source record, key_fn computes the name it refers to (or None
+    to skip the record). A source matches if that name, or the wildcard which
+    would answer for it, has a record of any of the target types.
+
+    Two strategies are available:
+
+    hash - Build a set of the names of all target records from the type
+           index, then probe it for every source. The set is memoized on the
+           database, so suites joining against the same target types share
+           it.
+    index - Probe the existing name cache for every source.
+
+    The cheaper strategy is picked depending on the number of target and
+    source records.
+    """
+
+    def __init__(self, db, source_type, key_fn, target_types, view=None,
+                 sources=None, strategy=None):
+        """
+        sources - Join these records instead of all records of source_type,
+                  used when sharding.
+        strategy - Force the join strategy, HASH or INDEX.
+        """
+        from bsa.bind import config_filter
+
+        self.db = db
+        self.source_types = as_list(source_type)
+        self.key_fn = key_fn
+        self.target_types = tuple(sorted(as_list(target_types)))
+        self.view = view
+        self.cfg_filter = config_filter(view)
+        self.sources = sources
+        self.strategy = strategy
+
+    def visible(self, configs):
+        return any(filter(self.cfg_filter, configs))
+
+    def iter_sources(self):
+        if self.sources is not None:
+            for rr in self.sources:
+                yield rr
+            return
+
+        for source_type in self.source_types:
+            for (rr, configs) in self.db.type_cache.get(source_type, []):
+                if self.visible(configs):
+                    yield rr
+
+    def count_sources(self):
+        if self.sources is not None:
+            if hasattr(self.sources, "__len__"):
+                return len(self.sources)
+
+            return None
+
+        return sum(
+            len(self.db.type_cache.get(t, [])) for t in self.source_types)
+
+    def count_targets(self):
+        return sum(
+            len(self.db.type_cache.get(t, [])) for t in self.target_types)
+
+    def target_names(self):
+        """
+        Get the memoized set of names of all target records.
+        """
+        cache_key = (self.target_types, self.db.view_key(self.view))
+        names = self.db.join_cache.get(cache_key)
+
+        if names is not None:
+            self.db.counters["join_cache.hit"] += 1
+            return names
+
+        self.db.counters["join_cache.miss"] += 1
+        names = set()
+
+        for target_type in self.target_types:
+            values = self.db.type_cache.get(target_type, [])
+            self.db.counters["scanned"] += len(values)
+
+            for (rr, configs) in values:
+                if self.visible(configs):
+                    names.add(rr.resolved_label)
+
+        self.db.join_cache[cache_key] = names
+        return names
+
+    def choose_strategy(self):
+        if self.strategy is not None:
+            return self.strategy
+
+        cache_key = (self.target_types, self.db.view_key(self.view))
+
+        if cache_key in self.db.join_cache:
+            return HASH
+
+        sources = self.count_sources()
+
+        if sources is None:
+            return HASH
+
+        if self.count_targets() <= sources * PROBE_COST:
+            return HASH
+
+        return INDEX
+
+    def hash_match(self):
+        names = self.target_names()
+
+        def match(label):
+            label = normalize_label(label)
+
+            if label in names:
+                return True
+
+            return "*." + label[label.find(".") + 1:] in names
+
+        return match
+
+    def index_match(self):
+        cache = self.db.cache
+        map_label = self.db.map_label
+        any_key = self.db.ANY
+        target_types = set(self.target_types)
+
+        def exists(key):
+            for (rr, configs) in cache.get(key, []):
+                if rr.record_type in target_types and self.visible(configs):
+                    return True
+
+            return False
+
+        def match(label):
+            key = tuple(map_label(label))
+            return exists(key) or exists((any_key,) + key[1:])
+
+        return match
+
+    def __iter__(self):
+        """
+        Generate (rr, label, matched) for every source record with a key, in
+        source order.
+
+        Sources are streamed and never collected, which keeps memory flat and
+        avoids triggering garbage collection over a large heap.
+        """
+        strategy = self.choose_strategy()
+        self.db.counters["query.join"] += 1
+
+        log.debug("join {0} -> {1} using {2}".format(
+            self.source_types, self.target_types, strategy))
+
+        if strategy == HASH:
+            match = self.hash_match()
+        else:
+            match = self.index_match()
+
+        key_fn = self.key_fn
+        counters = self.db.counters
+
+        for rr in self.iter_sources():
+            counters["scanned"] += 1
+            label = key_fn(rr)
+
+            if label is None:
+                continue
+
+            yield rr, label, match(label)
+
+
+def join(db, source_type, key_fn, target_types, **kw):
+    """
+    Generate (rr, label, matched) for all source records, see Join.
+    """
+    return iter(Join(db, source_type, key_fn, target_types, **kw))
+
+
+def semi_join(db, source_type, key_fn, target_types, **kw):
+    """
+    Generate (rr, label) for all source records whose key has a target.
+    """
+    for rr, label, matched in join(db, source_type, key_fn, target_types,
+                                   **kw):
+        if matched:
+            yield rr, label
+
+
+def anti_join(db, source_type, key_fn, target_types, **kw):
+    """
+    Generate (rr, label) for all source records whose key has no target,
+    in other words all dangling references.
+    """
+    for rr, label, matched in join(db, source_type, key_fn, target_types,
+                                   **kw):
+        if not matched:
+            yield rr, label
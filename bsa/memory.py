@@ -0,0 +1,307 @@
+"""
+Attribute the memory used by a loaded configuration.
+
+Objects are sized with sys.getsizeof and walked through their containers,
+slots and attributes. Every object is only counted once, by the first
+consumer that reaches it, so the consumers add up to the total:
+
+    zones - The records of every zone, and everything they refer to.
+    FakeBind indexes - The container overhead of every index, the records
+                       themselves are already counted by their zones.
+    parser caches - The packrat cache of pyparsing, when enabled.
+
+The same records are also broken down per record type, and strings are
+summarized on their own: how many references there are, how many are
+distinct and how much memory interning the duplicates would save.
+
+If tracemalloc is available, the allocation sites using the most memory are
+also reported.
+
+    report = MemoryReport()
+    report.add_zones(zones)
+    report.add_database(db)
+    sys.stderr.write(report.format_table())
+"""
+
+import sys
+import json
+import collections
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+from bsa.named import BindConfig
+from bsa.stats import max_rss
+
+# objects which are never walked into, they refer to the whole configuration.
+OPAQUE_TYPES = (BindConfig, type)
+
+STRING_TYPES = (str, unicode)
+
+INDEXES = (
+    "cache",
+    "type_cache",
+    "view_cache",
+    "name_index",
+    "reverse_cache",
+    "address_cache",
+    "zone_index",
+    "resolve_cache",
+    "join_cache",
+    "authority_cache",
+    "delegation_cache",
+)
+
+
+def slot_names(cls):
+    """
+    Get the names of all slots of a class, including those of its bases.
+    """
+    names = list()
+
+    for base in cls.__mro__:
+        slots = base.__dict__.get("__slots__", ())
+
+        if isinstance(slots, basestring):
+            slots = (slots,)
+
+        names.extend(slots)
+
+    return names
+
+
+def start_tracing():
+    """
+    Start tracing allocations if tracemalloc is available.
+    """
+    if tracemalloc is not None and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+class Strings(object):
+    """
+    Summary of the strings reached while sizing.
+    """
+
+    def __init__(self):
+        self.references = 0
+        self.size = 0
+        self.copies = dict()
+
+    def add(self, value, size, new):
+        self.references += 1
+
+        if not new:
+            return
+
+        self.size += size
+
+        copy = self.copies.get(value)
+
+        if copy is None:
+            self.copies[value] = (1, size)
+        else:
+            self.copies[value] = (copy[0] + 1, size)
+
+    @property
+    def distinct(self):
+        return len(self.copies)
+
+    @property
+    def duplicate_size(self):
+        """
+        The memory that would be saved by interning all strings.
+        """
+        return sum((n - 1) * size for (n, size) in self.copies.itervalues())
+
+    def to_dict(self):
+        return {
+            "references": self.references,
+            "distinct": self.distinct,
+            "size": self.size,
+            "duplicate_size": self.duplicate_size,
+        }
+
+
+class MemoryReport(object):
+    """
+    Collect the memory used by zones, record types, indexes and caches.
+    """
+
+    def __init__(self):
+        self.seen = set()
+        self.consumers = collections.Counter()
+        self.zones = collections.Counter()
+        self.types = collections.Counter()
+        self.strings = Strings()
+
+    def sizeof(self, root):
+        """
+        Get the size of all objects reachable from root which have not been
+        counted yet.
+        """
+        seen = self.seen
+        strings = self.strings
+        stack = [root]
+        total = 0
+
+        while stack:
+            obj = stack.pop()
+            new = id(obj) not in seen
+
+            if isinstance(obj, STRING_TYPES):
+                size = sys.getsizeof(obj)
+                strings.add(obj, size, new)
+
+                if new:
+                    seen.add(id(obj))
+                    total += size
+
+                continue
+
+            if not new or isinstance(obj, OPAQUE_TYPES):
+                continue
+
+            seen.add(id(obj))
+            total += sys.getsizeof(obj)
+
+            if isinstance(obj, dict):
+                stack.extend(obj.iterkeys())
+                stack.extend(obj.itervalues())
+                continue
+
+            if isinstance(obj, (list, tuple, set, frozenset)):
+                stack.extend(obj)
+                continue
+
+            for name in slot_names(type(obj)):
+                value = getattr(obj, name, None)
+
+                if value is not None:
+                    stack.append(value)
+
+            attributes = getattr(obj, "__dict__", None)
+
+            if attributes is not None:
+                stack.append(attributes)
+
+        return total
+
+    def add(self, consumer, obj):
+        size = self.sizeof(obj)
+        self.consumers[consumer] += size
+        return size
+
+    def add_zones(self, zones):
+        """
+        Add the records of zones, a list of (records, configs) tuples as
+        returned by BindConfig.parse_zones.
+        """
+        for (zone, configs) in zones:
+            origin = None
+            size = sys.getsizeof(zone)
+            self.seen.add(id(zone))
+
+            for rr in zone:
+                rr_size = self.sizeof(rr)
+                self.types[rr.record_type] += rr_size
+                size += rr_size
+
+                if origin is None and rr.record_type == "SOA":
+                    origin = rr.resolved_label
+
+            if origin is None:
+                origin = "<no SOA {0:x}>".format(id(zone))
+
+            self.zones[origin] += size
+            self.consumers["zones"] += size
+
+    def add_database(self, db):
+        """
+        Add the indexes and memoizing caches of a FakeBind database.
+        """
+        for name in INDEXES:
+            self.add("FakeBind." + name, getattr(db, name))
+
+    def add_parser_caches(self):
+        import pyparsing
+
+        cache = getattr(pyparsing.ParserElement, "packrat_cache", None)
+
+        if cache is not None:
+            self.add("parser.packrat_cache", cache)
+
+    @property
+    def total(self):
+        return sum(self.consumers.values())
+
+    def allocation_sites(self, limit):
+        """
+        Get the allocation sites using the most memory, as (site, size)
+        tuples, if allocations are being traced.
+        """
+        if tracemalloc is None or not tracemalloc.is_tracing():
+            return []
+
+        snapshot = tracemalloc.take_snapshot()
+        stats = snapshot.statistics("lineno")[:limit]
+        return [(str(s.traceback), s.size) for s in stats]
+
+    def to_dict(self, limit=10):
+        return {
+            "total": self.total,
+            "max_rss": max_rss(),
+            "consumers": dict(self.consumers),
+            "zones": dict(self.zones.most_common(limit)),
+            "types": dict(self.types),
+            "strings": self.strings.to_dict(),
+            "allocation_sites": self.allocation_sites(limit),
+        }
+
+    def format_table(self, limit=10):
+        lines = list()
+
+        def section(title, items, unit="bytes"):
+            lines.append("{0:<40} {1:>14}".format(title, unit))
+
+            for key, size in items:
+                lines.append("{0:<40} {1:>14}".format(key, size))
+
+            lines.append("")
+
+        section("consumer", self.consumers.most_common())
+        section("zone", self.zones.most_common(limit))
+        section("record type", self.types.most_common())
+
+        strings = self.strings
+        section("strings", [
+            ("references", strings.references),
+            ("distinct", strings.distinct),
+            ("size", strings.size),
+            ("saved by interning", strings.duplicate_size),
+        ], unit="value")
+
+        sites = self.allocation_sites(limit)
+
+        if sites:
+            section("allocation site", sites)
+
+        rss = max_rss()
+
+        lines.append("{0:<40} {1:>14}".format("total", self.total))
+
+        if rss is not None:
+            lines.append("{0:<40} {1:>14}".format("max rss", rss * 1024))
+
+        return "\n".join(lines)
+
+    def format_json(self, limit=10):
+        return json.dumps(self.to_dict(limit=limit), sort_keys=True)
+
+
+MEMORY_FORMATS = {
+    "table": MemoryReport.format_table,
+    "json": MemoryReport.format_json,
+}
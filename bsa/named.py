@@ -1,5 +1,6 @@
 import os
 import logging
+import collections
 
 import ipaddr
 import hashlib
@@ -31,7 +32,9 @@ def convert_ident_list(section, converter=str):
 
 class BindConfig(object):
     def __init__(self, parser_cache=None):
-        self.views = dict()
+        # views in the order they are defined, which is the order they are
+        # matched against clients in.
+        self.views = collections.OrderedDict()
         self.zones = dict()
         self.options = {
             "directory": "/etc/bind",
@@ -44,6 +47,8 @@ class BindConfig(object):
         }
         self.acl = dict()
         self.parser_cache = parser_cache
+        # counts zones parsed and parser cache use, see bsa.stats.
+        self.counters = collections.Counter()
 
         super(BindConfig, self).__init__()
 
@@ -53,7 +58,7 @@ class BindConfig(object):
             return
 
         if ident == "acl":
-            self.acl[ident] = convert_ident_list(section)
+            self.acl[args[0]] = convert_ident_list(section)
             return
 
         if ident == "logging":
@@ -158,6 +163,12 @@ class BindConfig(object):
         return os.path.join(self.parser_cache, cache_name)
 
     def get_cached(self, zone):
+        """
+        Load the cached AST of a zone, unless any of the files read for it
+        changed since it was cached.
+
+        Returns a (paths, ast) tuple, or None.
+        """
         if self.parser_cache is None:
             return None
 
@@ -171,20 +182,39 @@ class BindConfig(object):
 
         try:
             with open(cache_path) as f:
-                return pickle.load(f)
+                value = pickle.load(f)
         except Exception as e:
             log.warning("ignoring broken cache file: {0}: {1}".format(
                 cache_path, str(e)))
             return None
 
-    def put_cache(self, zone, ast):
+        # written before included files were tracked.
+        if not isinstance(value, tuple):
+            return None
+
+        paths, ast = value
+
+        try:
+            if any(self.is_newer(path, cache_path) for path in paths):
+                return None
+        except OSError:
+            return None
+
+        return paths, ast
+
+    def put_cache(self, zone, ast, paths=None):
         if self.parser_cache is None:
             return
 
+        if paths is None:
+            paths = [zone.file]
+
         cache_path = self.get_cache_path(zone)
 
         with open(cache_path, "w") as f:
-            return pickle.dump(ast, f)
+            pickle.dump((paths, ast), f)
+
+        self.counters["parser_cache.write"] += 1
 
     def parse_zones(self, root_directory, fake_root=None, file_reader=None,
                     reporter=None):
@@ -220,22 +250,49 @@ class BindConfig(object):
                 ast, configs = value
                 configs.append(config)
                 cache[key] = (ast, configs)
+                self.counters["zones.shared"] += 1
                 continue
 
-            ast = self.get_cached(zone)
+            ast = self.load_zone(zone, root_directory, fake_root,
+                                 file_reader=file_reader)
+            cache[key] = (ast, [config])
 
-            if ast is None:
-                ast = parse_zone(
-                    zone.file, zone.origin,
-                    fake_root=fake_root,
-                    root_directory=root_directory,
-                    file_reader=file_reader)
+        return cache.values()
 
-                self.put_cache(zone, ast)
+    def load_zone(self, zone, root_directory, fake_root, file_reader=None,
+                  paths=None):
+        """
+        Parse a single zone, or load it from the parser cache.
 
-            cache[key] = (ast, [config])
+        paths - If specified, a list which every file the zone was read from
+                is appended to, including $INCLUDEs.
+        """
+        if paths is None:
+            paths = list()
 
-        return cache.values()
+        cached = self.get_cached(zone)
+
+        if cached is not None:
+            self.counters["parser_cache.hit"] += 1
+            paths.extend(cached[0])
+            return cached[1]
+
+        if self.parser_cache is not None:
+            self.counters["parser_cache.miss"] += 1
+
+        zone_paths = list()
+
+        ast = parse_zone(
+            zone.file, zone.origin,
+            fake_root=fake_root,
+            root_directory=root_directory,
+            file_reader=file_reader,
+            paths=zone_paths)
+
+        self.counters["zones.parsed"] += 1
+        self.put_cache(zone, ast, zone_paths)
+        paths.extend(zone_paths)
+        return ast
 
     def __repr__(self):
         return "<BindConfig (root)>"
@@ -307,7 +364,7 @@ def build_parser(root_directory, path, fake_root=os.getcwd(), file_reader=None):
         file_reader=file_reader)
 
     # relaxed grammar
-    identifier = Word(alphanums + "-_.:/")
+    identifier = Word(alphanums + "-_.:/!")
 
     comment = ("//" + restOfLine).suppress() \
         | ("#" + restOfLine).suppress() \
@@ -0,0 +1,155 @@
+import itertools
+import multiprocessing
+
+from bsa.reporter import DefaultReporter
+from bsa.reporter import ERROR
+from bsa.reporter import MaxErrorsReached
+from bsa.suite import is_shardable
+from bsa.utils import Shard
+
+# Shardable modules are split into shards of about this many records, which
+# bounds the findings a worker hands back at once.
+SHARD_RECORDS = 50000
+
+# The bootstrap is stored here before the worker pool is created, forked
+# workers inherit it and share the loaded database copy-on-write instead of
+# receiving a pickled copy of it.
+shared_bootstrap = None
+
+# The number of errors reported by all workers together, inherited the same
+# way, and the most they may report.
+shared_errors = None
+shared_max_errors = None
+
+
+def budget_exceeded():
+    return MaxErrorsReached(
+        "More than {0} error(s) reported".format(shared_max_errors))
+
+
+class BudgetReporter(DefaultReporter):
+    """
+    Collects the findings of a task in a worker, and stops the task once the
+    errors reported by all workers are over the error budget.
+    """
+
+    def emit(self, finding):
+        if finding.level == ERROR and shared_errors is not None:
+            with shared_errors.get_lock():
+                if shared_errors.value >= shared_max_errors:
+                    raise budget_exceeded()
+
+                shared_errors.value += 1
+
+        super(BudgetReporter, self).emit(finding)
+
+
+def run_task(task):
+    """
+    Run a task in a worker, returns (result, findings, stopped) where stopped
+    is True if the task ran out of error budget.
+    """
+    module, shard = task
+    reporter = BudgetReporter(name=module)
+
+    try:
+        result = shared_bootstrap.run_module(module, reporter, shard=shard)
+    except MaxErrorsReached:
+        return False, reporter.findings, True
+
+    return result, reporter.findings, False
+
+
+def shard_count(db, jobs):
+    """
+    Number of shards to split shardable modules into, at least one per job.
+    """
+    return max(jobs, (db.size + SHARD_RECORDS - 1) // SHARD_RECORDS)
+
+
+def build_tasks(bootstrap, modules, shards):
+    """
+    Build a list of (module, shard) tasks.
+
+    Modules which can be sharded are split into the given number of shards,
+    the rest are run as a whole (with a shard of None).
+    """
+    tasks = list()
+
+    for module in modules:
+        mod = bootstrap.get_refresh_module(module)
+
+        if is_shardable(mod):
+            tasks.extend((module, Shard(i, shards)) for i in range(shards))
+        else:
+            tasks.append((module, None))
+
+    return tasks
+
+
+def execute_parallel(bootstrap, modules, jobs, no_report=False,
+                     max_errors=None):
+    """
+    Execute modules in a pool of forked worker processes.
+
+    Shardable modules are split into shards of at most SHARD_RECORDS
+    records, their results are combined and their findings reported in shard
+    order.
+
+    The findings of every task are reported by the parent as soon as all
+    tasks before it are done, so output is deterministic regardless of
+    scheduling.
+
+    max_errors - Stop all workers once they have reported more than this
+                 many errors together, and raise MaxErrorsReached.
+
+    Returns a list of results in the same order as the modules.
+    """
+    global shared_bootstrap, shared_errors, shared_max_errors
+
+    tasks = build_tasks(
+        bootstrap, modules, shard_count(bootstrap.db, jobs))
+
+    reporters = dict(
+        (module, bootstrap.reporter_type(name=module)) for module in modules)
+    combined = dict()
+
+    shared_bootstrap = bootstrap
+
+    if max_errors is not None:
+        shared_errors = multiprocessing.Value('l', 0)
+        shared_max_errors = max_errors
+
+    pool = multiprocessing.Pool(jobs)
+
+    try:
+        outcomes = pool.imap(run_task, tasks)
+
+        for (module, shard), (result, findings, stopped) in \
+                itertools.izip(tasks, outcomes):
+            reporters[module].replay(findings)
+
+            if stopped:
+                raise budget_exceeded()
+
+            combined[module] = combined.get(module, True) and result
+
+        pool.close()
+    except:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+        shared_bootstrap = None
+        shared_errors = None
+        shared_max_errors = None
+
+    results = list()
+
+    for module in modules:
+        if not no_report:
+            reporters[module].print_all()
+
+        results.append(combined[module])
+
+    return results
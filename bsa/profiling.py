@@ -0,0 +1,135 @@
+"""
+Profile the phases of a run.
+
+Every phase is profiled on its own with cProfile, and written to
+<directory>/<n>-<phase>.pstats in the order that phases were entered:
+
+    #> python -m pstats /tmp/profile/03-parse_zones.pstats
+
+Phases may be nested, the enclosing phase is paused while a nested phase
+runs so no time is counted twice.
+
+A sampling profiler can also be enabled, which periodically records the
+stack of the running code using an interval timer. The samples are written
+to <directory>/samples.collapsed in the collapsed stack format used by
+flamegraph tools:
+
+    #> flamegraph.pl /tmp/profile/samples.collapsed > profile.svg
+"""
+
+import os
+import signal
+import cProfile
+import contextlib
+import collections
+
+SAMPLES = "samples.collapsed"
+
+
+def frame_name(frame):
+    code = frame.f_code
+    return "{0}:{1}".format(os.path.basename(code.co_filename), code.co_name)
+
+
+class Sampler(object):
+    """
+    Sample the stack of the running code every interval seconds of CPU time.
+
+    Only available on platforms with signal.setitimer, and only in the main
+    thread.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.stacks = collections.Counter()
+        self.previous = None
+
+    def start(self):
+        self.previous = signal.signal(signal.SIGPROF, self.sample)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+
+    def stop(self):
+        signal.setitimer(signal.ITIMER_PROF, 0, 0)
+        signal.signal(signal.SIGPROF, self.previous or signal.SIG_DFL)
+
+    def sample(self, signum, frame):
+        stack = list()
+
+        while frame is not None:
+            stack.append(frame_name(frame))
+            frame = frame.f_back
+
+        self.stacks[";".join(reversed(stack))] += 1
+
+    def write(self, f):
+        for stack, count in sorted(self.stacks.items()):
+            f.write("{0} {1}\n".format(stack, count))
+
+
+class Profiler(object):
+    """
+    Write a pstats file for every phase of a run to a directory.
+
+        profiler = Profiler("/tmp/profile", interval=0.001)
+        profiler.start()
+
+        with profiler.phase("parse_zones"):
+            ...
+
+        profiler.stop()
+
+    interval - If specified, also sample stacks every interval seconds.
+    """
+
+    def __init__(self, directory, interval=None):
+        self.directory = directory
+        self.stack = list()
+        self.paths = list()
+
+        if interval is not None:
+            self.sampler = Sampler(interval)
+        else:
+            self.sampler = None
+
+    def start(self):
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+
+        if self.sampler is not None:
+            self.sampler.start()
+
+    def stop(self):
+        """
+        Stop sampling and write the samples, if enabled.
+        """
+        if self.sampler is None:
+            return
+
+        self.sampler.stop()
+
+        with open(os.path.join(self.directory, SAMPLES), "w") as f:
+            self.sampler.write(f)
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        path = os.path.join(self.directory, "{0:02}-{1}.pstats".format(
+            len(self.paths) + 1, name))
+        self.paths.append(path)
+
+        profile = cProfile.Profile()
+
+        if self.stack:
+            self.stack[-1].disable()
+
+        self.stack.append(profile)
+        profile.enable()
+
+        try:
+            yield
+        finally:
+            profile.disable()
+            self.stack.pop()
+            profile.dump_stats(path)
+
+            if self.stack:
+                self.stack[-1].enable()
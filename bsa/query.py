@@ -0,0 +1,387 @@
+import operator
+
+import ipaddr
+
+from bsa.named import BindView
+from bsa.utils import domain_in
+from bsa.utils import normalize_label
+
+
+def as_list(value):
+    if isinstance(value, (list, tuple, set)):
+        return list(value)
+
+    return [value]
+
+
+class AccessPath(object):
+    """
+    A way of producing candidate rows, with an estimated cost in rows.
+    """
+
+    __slots__ = ("description", "cost", "generator")
+
+    def __init__(self, description, cost, generator):
+        self.description = description
+        self.cost = cost
+        self.generator = generator
+
+    def __iter__(self):
+        return self.generator()
+
+    def __repr__(self):
+        return "<AccessPath {0} cost={1}>".format(self.description, self.cost)
+
+
+class Predicate(object):
+    """
+    Base class for predicates.
+
+    A predicate is called with a (record, configs) entry and returns True if
+    it matches, it may also provide an access path into an index.
+
+    Predicates are bound to the database they are evaluated against before
+    being used, which is where anything depending on it is computed.
+    """
+
+    def bind(self, db):
+        return self
+
+    def access(self, db):
+        return None
+
+    def __call__(self, entry):
+        raise NotImplementedError()
+
+
+class TypePredicate(Predicate):
+    def __init__(self, types):
+        self.types = as_list(types)
+
+    def access(self, db):
+        values = [db.type_cache.get(t, []) for t in self.types]
+
+        def generator():
+            for v in values:
+                for entry in v:
+                    yield entry
+
+        return AccessPath(
+            "type({0!r})".format(self.types),
+            sum(map(len, values)),
+            generator)
+
+    def __call__(self, entry):
+        return entry[0].record_type in self.types
+
+    def __str__(self):
+        return "type in {0!r}".format(self.types)
+
+
+class ViewPredicate(Predicate):
+    def __init__(self, views):
+        self.views = as_list(views)
+
+    def access(self, db):
+        root = db.view_cache.get(None, [])
+        values = [db.view_cache.get(v, []) for v in self.views]
+
+        def generator():
+            for entry in root:
+                yield entry
+
+            # entries served by several views should only be produced once.
+            for i, v in enumerate(values):
+                seen = set(self.views[:i])
+
+                for entry in v:
+                    if any(self.seen_in(c, seen) for c in entry[1]):
+                        continue
+
+                    yield entry
+
+        return AccessPath(
+            "view({0!r})".format(self.views),
+            len(root) + sum(map(len, values)),
+            generator)
+
+    @classmethod
+    def seen_in(cls, config, seen):
+        return not isinstance(config, BindView) or config.name in seen
+
+    def __call__(self, entry):
+        for config in entry[1]:
+            if not isinstance(config, BindView) or config.name in self.views:
+                return True
+
+        return False
+
+    def __str__(self):
+        return "view in {0!r}".format(self.views)
+
+
+class NamePredicate(Predicate):
+    def __init__(self, name):
+        self.name = normalize_label(name)
+
+    def access(self, db):
+        values = db.cache.get(tuple(db.map_label(self.name)), [])
+        return AccessPath(
+            "name({0!r})".format(self.name), len(values),
+            lambda: iter(values))
+
+    def __call__(self, entry):
+        return entry[0].resolved_label == self.name
+
+    def __str__(self):
+        return "name = {0!r}".format(self.name)
+
+
+class NameUnderPredicate(Predicate):
+    def __init__(self, name):
+        self.name = normalize_label(name)
+        self.domains = [self.name]
+
+    def access(self, db):
+        return AccessPath(
+            "name_under({0!r})".format(self.name),
+            db.name_index.count(self.name),
+            lambda: db.name_index.subtree(self.name))
+
+    def __call__(self, entry):
+        return domain_in(entry[0].resolved_label, self.domains)
+
+    def __str__(self):
+        return "name under {0!r}".format(self.name)
+
+
+class TargetPredicate(Predicate):
+    def __init__(self, target):
+        self.target = target
+        self.key = None
+        self.reference_key = None
+
+    def bind(self, db):
+        self.key = db.lookup_reference_key(self.target)
+        self.reference_key = db.reference_key
+        return self
+
+    def access(self, db):
+        values = db.reverse_cache.get(db.lookup_reference_key(self.target), [])
+        return AccessPath(
+            "reverse({0!r})".format(self.target), len(values),
+            lambda: iter(values))
+
+    def __call__(self, entry):
+        if self.reference_key is None:
+            raise ValueError("Predicate is not bound: {0}".format(self))
+
+        try:
+            return self.reference_key(entry[0]) == self.key
+        except ValueError:
+            return False
+
+    def __str__(self):
+        return "target = {0!r}".format(self.target)
+
+
+class TargetUnderPredicate(Predicate):
+    def __init__(self, name):
+        self.name = normalize_label(name)
+        self.domains = [self.name]
+
+    def __call__(self, entry):
+        target = getattr(entry[0], "resolved_target", None)
+
+        if target is None:
+            return False
+
+        return domain_in(target, self.domains)
+
+    def __str__(self):
+        return "target under {0!r}".format(self.name)
+
+
+class AddressInPredicate(Predicate):
+    def __init__(self, network):
+        if isinstance(network, basestring):
+            network = ipaddr.IPNetwork(network)
+
+        self.network = network
+        self.first = int(network.network)
+        self.last = int(network.broadcast)
+
+    def access(self, db):
+        index = db.address_cache[self.network.version]
+
+        return AccessPath(
+            "address({0})".format(self.network),
+            index.count(self.first, self.last),
+            lambda: index.range(self.first, self.last))
+
+    def __call__(self, entry):
+        rr = entry[0]
+
+        if rr.record_type not in ("A", "AAAA"):
+            return False
+
+        try:
+            address = ipaddr.IPAddress(rr.address)
+        except ValueError:
+            return False
+
+        return address.version == self.network.version and \
+            self.first <= int(address) <= self.last
+
+    def __str__(self):
+        return "address in {0}".format(self.network)
+
+
+class AttributePredicate(Predicate):
+    """
+    Compare a record attribute using an operator, these are always evaluated
+    as filters.
+    """
+
+    def __init__(self, attribute, op, symbol, value):
+        self.attribute = attribute
+        self.op = op
+        self.symbol = symbol
+        self.value = value
+
+    def __call__(self, entry):
+        return self.op(getattr(entry[0], self.attribute), self.value)
+
+    def __str__(self):
+        return "{0} {1} {2!r}".format(self.attribute, self.symbol, self.value)
+
+
+def attribute_predicate(attribute, op, symbol):
+    return lambda value: AttributePredicate(attribute, op, symbol, value)
+
+
+PREDICATES = {
+    "type": TypePredicate,
+    "view": ViewPredicate,
+    "name": NamePredicate,
+    "name_under": NameUnderPredicate,
+    "target": TargetPredicate,
+    "target_under": TargetUnderPredicate,
+    "address_in": AddressInPredicate,
+    "path": attribute_predicate("path", operator.eq, "="),
+    "ttl": attribute_predicate("ttl", operator.eq, "="),
+    "ttl_lt": attribute_predicate("ttl", operator.lt, "<"),
+    "ttl_le": attribute_predicate("ttl", operator.le, "<="),
+    "ttl_gt": attribute_predicate("ttl", operator.gt, ">"),
+    "ttl_ge": attribute_predicate("ttl", operator.ge, ">="),
+}
+
+
+class Select(object):
+    """
+    A declarative query against a FakeBind database.
+
+    The planner asks every predicate for an access path into one of the
+    available indexes, picks the cheapest one and evaluates the remaining
+    predicates as filters on the rows it produces.
+
+        select = db.select(type='A', name_under='corp.', view='internal',
+                           ttl_lt=300)
+        print select.explain()
+
+        for rr in select:
+            ...
+
+    Available predicates:
+        type - A record type, or a list of record types.
+        view - A view name, or a list of view names.
+        name - An exact owner name.
+        name_under - Owner name at or under the given domain.
+        target - Records referring to the given name or address.
+        target_under - Records with a target at or under the given domain.
+        address_in - A and AAAA records within the given network.
+        path - Records read from the given file.
+        ttl, ttl_lt, ttl_le, ttl_gt, ttl_ge - TTL comparisons.
+    """
+
+    def __init__(self, db, **predicates):
+        self.db = db
+        self.arguments = predicates
+        self.predicates = list()
+
+        for key, value in sorted(predicates.items()):
+            factory = PREDICATES.get(key)
+
+            if factory is None:
+                raise ValueError("Unknown predicate: {0}".format(key))
+
+            self.predicates.append(factory(value).bind(db))
+
+        self.access, self.filters, self.candidates = self.plan()
+
+    def scan(self):
+        db = self.db
+
+        def generator():
+            for values in db.cache.itervalues():
+                for entry in values:
+                    yield entry
+
+        return AccessPath("scan", db.size, generator)
+
+    def plan(self):
+        """
+        Pick the cheapest access path, every other predicate becomes a filter.
+        """
+        candidates = [(self.scan(), None)]
+
+        for predicate in self.predicates:
+            access = predicate.access(self.db)
+
+            if access is not None:
+                candidates.append((access, predicate))
+
+        access, chosen = min(candidates, key=lambda c: c[0].cost)
+        filters = [p for p in self.predicates if p is not chosen]
+        return access, filters, [c for (c, _) in candidates]
+
+    def iter_entries(self):
+        filters = self.filters
+
+        for entry in self.access:
+            if all(f(entry) for f in filters):
+                yield entry
+
+    def __iter__(self):
+        for (rr, _) in self.iter_entries():
+            yield rr
+
+    def all(self):
+        return list(self)
+
+    def explain(self):
+        """
+        Describe the chosen plan, its estimated cost and the alternatives.
+        """
+        arguments = " ".join(
+            "{0}={1!r}".format(k, v) for (k, v)
+            in sorted(self.arguments.items()))
+
+        lines = [
+            "select {0}".format(arguments),
+            "  access: {0} (cost={1})".format(
+                self.access.description, self.access.cost),
+        ]
+
+        if self.filters:
+            lines.append("  filter: {0}".format(
+                ", ".join(map(str, self.filters))))
+
+        lines.append("  candidates: {0}".format(", ".join(
+            "{0} (cost={1})".format(c.description, c.cost)
+            for c in sorted(self.candidates, key=lambda c: c.cost))))
+
+        return "\n".join(lines)
+
+    def __repr__(self):
+        return "<Select access={0!r}>".format(self.access)
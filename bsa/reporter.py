@@ -0,0 +1,310 @@
+"""
+Reporters collect the findings of test suites.
+
+A finding is structured, it consists of a code, the record it concerns and
+the arguments used to describe it. Suites register the message format of
+each code up front, findings are only formatted when they are written.
+
+    MISSING_TARGET = register(
+        "missing-target", "Missing target: {lookup} ({rr!r})")
+
+    reporter.report(MISSING_TARGET, rr, lookup=lookup)
+"""
+
+import sys
+import json
+import logging
+import collections
+
+ERROR = "error"
+WARNING = "warning"
+INFO = "info"
+
+LEVELS = {
+    ERROR: logging.ERROR,
+    WARNING: logging.WARNING,
+    INFO: logging.INFO,
+}
+
+# The code used for plain messages, as reported through Reporter.error.
+MESSAGE = "message"
+
+FORMATS = {
+    MESSAGE: "{message}",
+}
+
+
+def register(code, fmt):
+    """
+    Register the message format of a finding code, the format is called with
+    the record as 'rr' and the arguments of the finding.
+
+    Returns the code.
+    """
+    if FORMATS.get(code, fmt) != fmt:
+        raise ValueError("Conflicting format for code: {0}".format(code))
+
+    FORMATS[code] = fmt
+    return code
+
+
+class MaxErrorsReached(Exception):
+    pass
+
+
+class Finding(object):
+    """
+    A single finding, the message is formatted when it is accessed.
+    """
+
+    __slots__ = ("level", "code", "record", "args")
+
+    def __init__(self, level, code, record, args):
+        self.level = level
+        self.code = code
+        self.record = record
+        self.args = args
+
+    @property
+    def message(self):
+        fmt = FORMATS.get(self.code)
+
+        if fmt is None:
+            return "{0}: {1!r} {2!r}".format(self.code, self.record, self.args)
+
+        return fmt.format(rr=self.record, **self.args)
+
+    def to_dict(self):
+        result = {
+            "level": self.level,
+            "code": self.code,
+            "message": self.message,
+            "args": self.args,
+        }
+
+        if self.record is not None:
+            result["record"] = self.record.to_dict()
+
+        return result
+
+    def __getstate__(self):
+        return (self.level, self.code, self.record, self.args)
+
+    def __setstate__(self, state):
+        (self.level, self.code, self.record, self.args) = state
+
+    def __repr__(self):
+        return "<Finding {self.level} {self.code}>".format(self=self)
+
+
+class Reporter(object):
+    """
+    Base class for reporters.
+
+    Subclasses implement emit(finding), which is called for every finding.
+    """
+
+    ERROR = ERROR
+    WARNING = WARNING
+    INFO = INFO
+
+    def __init__(self, name=None):
+        if name is None:
+            self.name = "SUITE"
+        else:
+            self.name = name
+
+        self.counts = collections.Counter()
+
+    def report(self, code, rr=None, level=ERROR, **args):
+        self.submit(Finding(level, code, rr, args))
+
+    def error(self, message):
+        self.report(MESSAGE, level=ERROR, message=message)
+
+    def warning(self, message):
+        self.report(MESSAGE, level=WARNING, message=message)
+
+    def info(self, message):
+        self.report(MESSAGE, level=INFO, message=message)
+
+    def submit(self, finding):
+        self.counts[finding.code] += 1
+        self.emit(finding)
+
+    def replay(self, findings):
+        """
+        Submit findings collected by another reporter.
+        """
+        for finding in findings:
+            self.submit(finding)
+
+    def emit(self, finding):
+        raise NotImplementedError()
+
+    def print_all(self):
+        pass
+
+
+class DefaultReporter(Reporter):
+    """
+    Keep all findings in memory until print_all is called, which logs them.
+
+    Useful interactively, and to capture the findings of a suite.
+    """
+
+    def __init__(self, name=None):
+        super(DefaultReporter, self).__init__(name=name)
+        self.findings = list()
+
+    def emit(self, finding):
+        self.findings.append(finding)
+
+    @property
+    def messages(self):
+        return [(f.level, f.message) for f in self.findings]
+
+    def clear(self):
+        self.findings = []
+
+    def print_all(self):
+        sink = LogSink()
+
+        for finding in self.findings:
+            sink.write(self.name, finding)
+
+        self.clear()
+
+
+class RecordingReporter(Reporter):
+    """
+    Pass findings on to another reporter as they arrive, and keep a copy of
+    them, e.g. to store them for later runs.
+    """
+
+    def __init__(self, reporter):
+        super(RecordingReporter, self).__init__(name=reporter.name)
+        self.reporter = reporter
+        self.findings = list()
+
+    def emit(self, finding):
+        self.findings.append(finding)
+        self.reporter.submit(finding)
+
+    def clear(self):
+        self.findings = []
+
+
+class LogSink(object):
+    """
+    Write findings through the logger of each suite.
+    """
+
+    def write(self, name, finding):
+        logging.getLogger(name).log(LEVELS[finding.level], finding.message)
+
+    def close(self):
+        pass
+
+
+class TextSink(object):
+    """
+    Write findings as lines of text.
+    """
+
+    def __init__(self, stream=None):
+        if stream is None:
+            stream = sys.stdout
+
+        self.stream = stream
+
+    def write(self, name, finding):
+        self.stream.write("{0} {1} [{2}] {3}\n".format(
+            finding.level.upper(), name, finding.code, finding.message))
+
+    def close(self):
+        self.stream.flush()
+
+
+class JSONSink(object):
+    """
+    Write findings as JSON objects, one per line.
+    """
+
+    def __init__(self, stream=None):
+        if stream is None:
+            stream = sys.stdout
+
+        self.stream = stream
+
+    def write(self, name, finding):
+        data = finding.to_dict()
+        data["suite"] = name
+        self.stream.write(json.dumps(data, sort_keys=True, default=str))
+        self.stream.write("\n")
+
+    def close(self):
+        self.stream.flush()
+
+
+SINKS = {
+    "log": LogSink,
+    "text": TextSink,
+    "jsonl": JSONSink,
+}
+
+
+class ReportContext(object):
+    """
+    State shared by the streaming reporters of all suites in a run: where
+    findings are written, counters per code and the error limit.
+
+        context = ReportContext([JSONSink(f)], max_errors=1000)
+        bootstrap = DefaultBootstrap(db, reporter_type=context.reporter)
+
+    max_errors - Raise MaxErrorsReached when more than this many errors have
+                 been reported, None for no limit.
+    """
+
+    def __init__(self, sinks=None, max_errors=None):
+        if sinks is None:
+            sinks = [LogSink()]
+
+        self.sinks = sinks
+        self.max_errors = max_errors
+        self.counts = collections.Counter()
+        self.errors = 0
+
+    def reporter(self, name=None):
+        return StreamingReporter(self, name=name)
+
+    def write(self, name, finding):
+        if finding.level == ERROR:
+            if self.max_errors is not None and self.errors >= self.max_errors:
+                raise MaxErrorsReached(
+                    "More than {0} error(s) reported".format(self.max_errors))
+
+            self.errors += 1
+
+        self.counts[finding.code] += 1
+
+        for sink in self.sinks:
+            sink.write(name, finding)
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
+
+
+class StreamingReporter(Reporter):
+    """
+    Write findings to the sinks of a ReportContext as they arrive, nothing is
+    kept in memory.
+    """
+
+    def __init__(self, context, name=None):
+        super(StreamingReporter, self).__init__(name=name)
+        self.context = context
+
+    def emit(self, finding):
+        self.context.write(self.name, finding)
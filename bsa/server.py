@@ -0,0 +1,336 @@
+"""
+Serve a loaded database to other processes over a local socket.
+
+The database is loaded once, and queried through a simple protocol: every
+request is a JSON object on a single line, answered by one response line.
+
+    {"id": 1, "method": "query", "params": {"label": "www.example.com"}}
+    {"id": 1, "result": [{"name": "www.example.com.", ...}]}
+
+Failed requests are answered with {"id": 1, "error": "<message>"}.
+
+Methods:
+
+    query(label, record=None, view=None) - Records matching a label.
+    iquery(label, record=None, view=None) - Same as query, but every record
+                                           is sent as its own line,
+                                           {"id": 1, "record": {...}},
+                                           followed by the number of records
+                                           as the result.
+    resolve(name, record_type="A", view=None) - See FakeBind.resolve.
+    run(modules) - Run test suites, returns their results and findings.
+                   Only modules matching the allowed patterns of the
+                   service can be run, by default bsa.suites.*.
+    reload() - Reload all zones which changed on disk.
+    stats() - The size of the database and its query counters.
+
+Running a module imports and executes it in the server, and any client that
+can reach the socket may request it. A listening port is reachable by every
+local user, so extend the allowed modules (bsa serve --allow-module) only
+with modules that are safe to run on their behalf.
+
+Reloading only parses the zones whose files changed, the indexes are then
+rebuilt and swapped in without interrupting requests in flight.
+
+See bsa.client for a client.
+"""
+
+import os
+import json
+import time
+import fnmatch
+import types
+import logging
+import threading
+import SocketServer
+
+from bsa.bind import FakeBind
+from bsa.named import BindConfig
+from bsa.reporter import DefaultReporter
+from bsa.stats import PhaseStats
+
+log = logging.getLogger(__name__)
+
+
+class ReloadingConfig(BindConfig):
+    """
+    A configuration which reuses the records of zones that did not change
+    since they were last loaded.
+
+    loaded - A dict mapping (file, origin) to (files, records) of the zones
+             loaded previously, where files is a tuple of (path, mtime) for
+             every file the zone was read from, including $INCLUDEs.
+    """
+
+    def __init__(self, loaded, parser_cache=None):
+        super(ReloadingConfig, self).__init__(parser_cache=parser_cache)
+        self.loaded = loaded
+        self.reloaded = dict()
+
+    @classmethod
+    def unchanged(cls, files):
+        try:
+            return all(cls.get_mtime(path) == mtime for (path, mtime) in files)
+        except OSError:
+            return False
+
+    def load_zone(self, zone, root_directory, fake_root, file_reader=None,
+                  paths=None):
+        key = (zone.file, zone.origin)
+        value = self.loaded.get(key)
+
+        if value is not None and self.unchanged(value[0]):
+            self.counters["zones.reused"] += 1
+            files, ast = value
+        else:
+            zone_paths = list()
+            ast = super(ReloadingConfig, self).load_zone(
+                zone, root_directory, fake_root, file_reader=file_reader,
+                paths=zone_paths)
+            files = tuple(
+                (path, self.get_mtime(path)) for path in zone_paths)
+
+        if paths is not None:
+            paths.extend(path for (path, _) in files)
+
+        self.reloaded[key] = (files, ast)
+        return ast
+
+
+class Database(object):
+    """
+    Holds the served FakeBind, and reloads it when files change.
+
+    load - A function called with a BindConfig and a bsa.stats.PhaseStats,
+           which loads the served configuration into the config and returns
+           the zones, see bsa.load_zones. Files read through the file reader
+           of the stats, such as included configuration files, are checked
+           for changes.
+    paths - The configuration files, which are checked for changes.
+    """
+
+    def __init__(self, load, paths=(), parser_cache=None):
+        self.load = load
+        self.paths = list(paths)
+        self.parser_cache = parser_cache
+        self.loaded = dict()
+        self.mtimes = dict()
+        self.db = None
+        self.lock = threading.Lock()
+
+    def reload(self):
+        """
+        Load all zones, reusing the ones which did not change.
+
+        Returns the counters of the load.
+        """
+        with self.lock:
+            config = ReloadingConfig(self.loaded,
+                                     parser_cache=self.parser_cache)
+            stats = PhaseStats()
+            mtimes = dict((path, config.get_mtime(path)) for path in self.paths)
+            db = FakeBind(self.load(config, stats))
+            mtimes.update(stats.read_files)
+
+            for (files, _) in config.reloaded.itervalues():
+                mtimes.update(files)
+
+            self.loaded = config.reloaded
+            self.mtimes = mtimes
+            self.db = db
+
+        log.info("loaded {0} record(s)".format(db.size))
+        return dict(config.counters)
+
+    def changed(self):
+        """
+        Check if any of the loaded files changed.
+        """
+        return not ReloadingConfig.unchanged(self.mtimes.items())
+
+
+class Service(object):
+    """
+    Implements the methods of the protocol, every method is a handle_<name>
+    function taking the parameters of the request.
+
+    allowed_modules - fnmatch patterns of the modules which may be run.
+    """
+
+    HANDLE_PREFIX = "handle_"
+
+    DEFAULT_ALLOWED_MODULES = ["bsa.suites.*"]
+
+    def __init__(self, database, allowed_modules=None):
+        if allowed_modules is None:
+            allowed_modules = self.DEFAULT_ALLOWED_MODULES
+
+        self.database = database
+        self.allowed_modules = list(allowed_modules)
+        self.run_lock = threading.Lock()
+
+    def is_allowed(self, module):
+        return any(fnmatch.fnmatchcase(module, pattern)
+                   for pattern in self.allowed_modules)
+
+    def call(self, method, params):
+        handler = getattr(self, self.HANDLE_PREFIX + method, None)
+
+        if handler is None:
+            raise ValueError("No such method: {0}".format(method))
+
+        return handler(**params)
+
+    def handle_query(self, label, record=None, view=None):
+        return list(self.handle_iquery(label, record=record, view=view))
+
+    def handle_iquery(self, label, record=None, view=None):
+        db = self.database.db
+
+        for rr in db.iquery(label, record=record, view=view):
+            yield rr.to_dict()
+
+    def handle_resolve(self, name, record_type="A", view=None):
+        result = self.database.db.resolve(name, record_type, view=view)
+
+        return {
+            "name": result.name,
+            "type": result.record_type,
+            "status": result.status,
+            "path": [rr.to_dict() for rr in result.path],
+            "answer": [rr.to_dict() for rr in result.answer],
+        }
+
+    def handle_run(self, modules):
+        from bsa import DefaultBootstrap
+
+        for module in modules:
+            if not self.is_allowed(module):
+                raise ValueError("Module not allowed: {0}".format(module))
+
+        reporters = list()
+
+        def reporter_type(name=None):
+            reporter = DefaultReporter(name=name)
+            reporters.append(reporter)
+            return reporter
+
+        # suite modules are reloaded for every run.
+        with self.run_lock:
+            bootstrap = DefaultBootstrap(self.database.db,
+                                         reporter_type=reporter_type)
+            results = bootstrap.execute_all(modules, no_report=True)
+
+        findings = list()
+
+        for reporter in reporters:
+            for finding in reporter.findings:
+                data = finding.to_dict()
+                data["suite"] = reporter.name
+                findings.append(data)
+
+        return {
+            "results": dict(zip(modules, results)),
+            "findings": findings,
+        }
+
+    def handle_reload(self):
+        return self.database.reload()
+
+    def handle_stats(self):
+        db = self.database.db
+
+        return {
+            "records": db.size,
+            "names": len(db.cache),
+            "counters": dict(db.counters),
+        }
+
+
+class RequestHandler(SocketServer.StreamRequestHandler):
+    def handle(self):
+        service = self.server.service
+
+        for line in iter(self.rfile.readline, ""):
+            if not line.strip():
+                continue
+
+            request_id = None
+
+            try:
+                request = json.loads(line)
+                request_id = request.get("id")
+                result = service.call(
+                    request["method"], request.get("params") or {})
+
+                if isinstance(result, types.GeneratorType):
+                    count = 0
+
+                    for record in result:
+                        self.send({"id": request_id, "record": record})
+                        count += 1
+
+                    result = count
+            except Exception as e:
+                log.debug("request failed", exc_info=True)
+                self.send({"id": request_id, "error": str(e)})
+                continue
+
+            self.send({"id": request_id, "result": result})
+
+    def send(self, message):
+        self.wfile.write(json.dumps(message, default=str))
+        self.wfile.write("\n")
+        self.wfile.flush()
+
+
+class UnixServer(SocketServer.ThreadingMixIn,
+                 SocketServer.UnixStreamServer):
+    daemon_threads = True
+
+
+class TCPServer(SocketServer.ThreadingMixIn, SocketServer.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def make_server(service, path=None, port=None):
+    """
+    Build a server for service, listening on the unix socket path or on
+    localhost:port.
+    """
+    if path is not None:
+        if os.path.exists(path):
+            os.unlink(path)
+
+        server = UnixServer(path, RequestHandler)
+    elif port is not None:
+        server = TCPServer(("127.0.0.1", port), RequestHandler)
+    else:
+        raise ValueError("Either a socket path or a port is required")
+
+    server.service = service
+    return server
+
+
+def watch(database, interval):
+    """
+    Reload the database whenever its files change, checking every interval
+    seconds. Runs in a daemon thread.
+    """
+    def run():
+        while True:
+            time.sleep(interval)
+
+            if not database.changed():
+                continue
+
+            try:
+                database.reload()
+            except Exception:
+                log.error("reload failed", exc_info=True)
+
+    thread = threading.Thread(target=run, name="bsa-watch")
+    thread.daemon = True
+    thread.start()
+    return thread
@@ -0,0 +1,270 @@
+"""
+Statistics about where time and memory goes.
+
+FakeBind counts the queries made against it in db.counters:
+
+    query.regular - Exact name lookups through iquery.
+    query.wildcard - Wildcard lookups through iquery.
+    query.join - Bulk joins, see bsa.join.
+    scanned - Records examined to answer queries.
+    <cache>.hit, <cache>.miss - Lookups in the memoizing caches.
+
+SuiteStats combines the delta of those counters over a suite run with its
+wall and CPU time, and its peak memory delta.
+
+PhaseStats times the phases of loading a configuration, and counts what was
+read, parsed and indexed along the way.
+"""
+
+import os
+import json
+import time
+import contextlib
+import collections
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+QUERY_COUNTERS = ("query.regular", "query.wildcard", "query.join",
+                  "scanned")
+
+
+def cpu_time():
+    times = os.times()
+    return times[0] + times[1]
+
+
+def max_rss():
+    """
+    Get the peak resident memory of this process in kilobytes, or None if it
+    is not available.
+    """
+    if resource is None:
+        return None
+
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def hit_rates(counters):
+    """
+    Compute the hit rate of every cache with lookups in counters.
+    """
+    rates = dict()
+
+    for key in counters:
+        if not key.endswith(".hit"):
+            continue
+
+        cache = key[:-len(".hit")]
+        hits = counters[key]
+        total = hits + counters.get(cache + ".miss", 0)
+
+        if total:
+            rates[cache] = float(hits) / total
+
+    for key in counters:
+        if key.endswith(".miss"):
+            rates.setdefault(key[:-len(".miss")], 0.0)
+
+    return rates
+
+
+class SuiteStats(object):
+    """
+    The measurements of a single suite run.
+    """
+
+    __slots__ = ("name", "result", "wall", "cpu", "counters", "max_rss")
+
+    def __init__(self, name):
+        self.name = name
+        self.result = None
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.counters = collections.Counter()
+        self.max_rss = None
+
+    @property
+    def hit_rates(self):
+        return hit_rates(self.counters)
+
+    def to_dict(self):
+        return {
+            "suite": self.name,
+            "result": self.result,
+            "wall": self.wall,
+            "cpu": self.cpu,
+            "counters": dict(self.counters),
+            "hit_rates": self.hit_rates,
+            "max_rss_delta": self.max_rss,
+        }
+
+
+class SuiteMeasurement(object):
+    """
+    Measure a suite run against a database.
+
+        with SuiteMeasurement(db, "bsa.suites.check_ptr") as stats:
+            stats.result = module.run(db, reporter)
+    """
+
+    def __init__(self, db, name):
+        self.db = db
+        self.stats = SuiteStats(name)
+
+    def __enter__(self):
+        self.counters = self.db.counters.copy()
+        self.rss = max_rss()
+        self.cpu = cpu_time()
+        self.wall = time.time()
+        return self.stats
+
+    def __exit__(self, *exc_info):
+        stats = self.stats
+        stats.wall = time.time() - self.wall
+        stats.cpu = cpu_time() - self.cpu
+        stats.counters = self.db.counters - self.counters
+
+        if self.rss is not None:
+            stats.max_rss = max_rss() - self.rss
+
+
+def format_table(stats):
+    """
+    Format a list of SuiteStats as a table.
+    """
+    header = ("suite", "result", "wall", "cpu", "regular", "wildcard",
+              "joins", "scanned", "hit rate", "rss delta")
+
+    rows = [header]
+
+    for s in stats:
+        hits = sum(v for (k, v) in s.counters.items() if k.endswith(".hit"))
+        misses = sum(
+            v for (k, v) in s.counters.items() if k.endswith(".miss"))
+        hit_rate = "-"
+
+        if hits + misses:
+            hit_rate = "{0:.1%}".format(float(hits) / (hits + misses))
+
+        rss = "-"
+
+        if s.max_rss is not None:
+            rss = "{0}k".format(s.max_rss)
+
+        rows.append((
+            s.name, "ok" if s.result else "fail",
+            "{0:.3f}s".format(s.wall), "{0:.3f}s".format(s.cpu),
+        ) + tuple(str(s.counters[k]) for k in QUERY_COUNTERS) + (
+            hit_rate, rss))
+
+    widths = [max(len(row[i]) for row in rows) for i in range(len(header))]
+
+    lines = list()
+
+    for row in rows:
+        lines.append("  ".join(
+            (value.ljust if i == 0 else value.rjust)(widths[i])
+            for (i, value) in enumerate(row)))
+
+    return "\n".join(lines)
+
+
+def format_json(stats):
+    return json.dumps([s.to_dict() for s in stats], sort_keys=True)
+
+
+STATS_FORMATS = {
+    "table": format_table,
+    "json": format_json,
+}
+
+
+class PhaseStats(object):
+    """
+    Timers for the phases of a run, and counters for the work done in them.
+
+        stats = PhaseStats()
+
+        with stats.phase("parse_zones"):
+            ...
+
+        stats.count("files")
+    """
+
+    def __init__(self):
+        self.phases = list()
+        self.counters = collections.Counter()
+        # path -> mtime of every file read through file_reader, when read.
+        self.read_files = dict()
+        # a bsa.profiling.Profiler which also profiles every phase, or None.
+        self.profiler = None
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        wall, cpu = time.time(), cpu_time()
+
+        try:
+            if self.profiler is not None:
+                with self.profiler.phase(name):
+                    yield self
+            else:
+                yield self
+        finally:
+            self.phases.append(
+                (name, time.time() - wall, cpu_time() - cpu))
+
+    def count(self, key, value=1):
+        self.counters[key] += value
+
+    def update(self, counters, prefix=""):
+        for key, value in counters.items():
+            self.counters[prefix + key] += value
+
+    def file_reader(self, file_reader):
+        """
+        Wrap a file reader (see bsa.utils.default_file_reader) to count the
+        files and bytes read through it, and to record which files were
+        read.
+        """
+        @contextlib.contextmanager
+        def reader(root_directory, path):
+            with file_reader(root_directory, path) as f:
+                self.count_file(f)
+                yield f
+
+        return reader
+
+    def count_file(self, f):
+        st = os.fstat(f.fileno())
+        self.count("files")
+        self.count("bytes", st.st_size)
+        self.read_files[f.name] = st.st_mtime
+
+    def to_dict(self):
+        return {
+            "phases": [
+                {"phase": name, "wall": wall, "cpu": cpu}
+                for (name, wall, cpu) in self.phases],
+            "counters": dict(self.counters),
+        }
+
+    def format_table(self):
+        lines = ["{0:<24} {1:>10} {2:>10}".format("phase", "wall", "cpu")]
+
+        for name, wall, cpu in self.phases:
+            lines.append("{0:<24} {1:>9.3f}s {2:>9.3f}s".format(
+                name, wall, cpu))
+
+        lines.append("")
+        lines.append("{0:<24} {1:>21}".format("counter", "value"))
+
+        for key, value in sorted(self.counters.items()):
+            lines.append("{0:<24} {1:>21}".format(key, value))
+
+        return "\n".join(lines)
+
+    def format_json(self):
+        return json.dumps(self.to_dict(), sort_keys=True)
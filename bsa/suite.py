@@ -0,0 +1,148 @@
+class Suite(object):
+    """
+    Base class for visitor style test suites.
+
+    Instead of scanning the database itself, a suite registers callbacks for
+    the record types it is interested in by defining visit_<TYPE> methods.
+    The runner makes a single pass over the database and dispatches every
+    record to all suites interested in it.
+
+    A suite module exposes its suite through a module level 'suite'
+    attribute:
+
+        class CheckMX(Suite):
+            def visit_MX(self, rr):
+                if not self.db.query(rr.resolved_target, record=['A']):
+                    self.error("Missing target: {0!r}".format(rr))
+
+        suite = CheckMX
+
+    Visitors are expected to only depend on the record they are given and on
+    lookups made through self.db, which allows incremental runs to reuse
+    their verdicts. Suites that accumulate state across records must set
+    'incremental' to False.
+
+    Suites are only split by record range when running with several jobs if
+    they set 'shardable' to True, since a shard only sees part of the
+    records.
+    """
+
+    VISIT_PREFIX = "visit_"
+
+    incremental = True
+    shardable = False
+
+    def __init__(self, db, reporter):
+        self.db = db
+        self.reporter = reporter
+        self.ok = True
+
+    @classmethod
+    def record_types(cls):
+        """
+        All record types that this suite has visitors for.
+        """
+        prefix = cls.VISIT_PREFIX
+
+        return [
+            name[len(prefix):] for name in dir(cls)
+            if name.startswith(prefix)
+        ]
+
+    def visitors(self):
+        prefix = self.VISIT_PREFIX
+
+        return dict(
+            (record_type, getattr(self, prefix + record_type))
+            for record_type in self.record_types())
+
+    def error(self, message):
+        self.ok = False
+        self.reporter.error(message)
+
+    def report(self, code, rr=None, **args):
+        """
+        Report a structured error finding, see bsa.reporter.
+        """
+        self.ok = False
+        self.reporter.report(code, rr, **args)
+
+    def finish(self):
+        """
+        Called when all records have been visited, returns if the suite
+        passed or not.
+        """
+        return self.ok
+
+
+def run_fused(db, suites, zones=None):
+    """
+    Run a number of suite instances in a single pass over the database.
+
+    zones - Only visit these (records, configs) tuples instead of all of
+            db.zones, used when sharding.
+
+    Returns a list of the results, in the same order as the suites.
+    """
+    if zones is None:
+        zones = db.zones
+
+    dispatch = dict()
+
+    for suite in suites:
+        for record_type, visitor in suite.visitors().items():
+            dispatch.setdefault(record_type, []).append(visitor)
+
+    for (zone, configs) in zones:
+        for rr in zone:
+            visitors = dispatch.get(rr.record_type)
+
+            if visitors is None:
+                continue
+
+            for visitor in visitors:
+                visitor(rr)
+
+    return [suite.finish() for suite in suites]
+
+
+def run_suite(suite_type, db, reporter, shard=None):
+    """
+    Run a single suite, allows suite modules to also provide an old-style
+    run(db, reporter) function.
+
+    shard - If specified, only visit the records in this bsa.utils.Shard.
+    """
+    zones = None
+
+    if shard is not None:
+        zones = shard.zone_slices(db)
+
+    return run_fused(db, [suite_type(db, reporter)], zones=zones)[0]
+
+
+def get_suite(module):
+    """
+    Get the visitor suite type of a module, or None if it is an old-style
+    module.
+    """
+    suite = getattr(module, "suite", None)
+
+    if isinstance(suite, type) and issubclass(suite, Suite):
+        return suite
+
+    return None
+
+
+def is_shardable(module):
+    """
+    Check if a module can be split into shards, either because it is a
+    visitor suite which sets 'shardable', or because it implements
+    run_shard(db, reporter, shard).
+    """
+    suite = get_suite(module)
+
+    if suite is not None:
+        return suite.shardable
+
+    return hasattr(module, "run_shard")
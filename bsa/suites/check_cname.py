@@ -1,31 +1,37 @@
-from bsa.utils import generate_soa_domains
-from bsa.utils import generate_records
-from bsa.utils import domain_in
+from bsa.reporter import register
+from bsa.suite import Suite
+from bsa.suite import run_suite
 
+TARGETS = ['A', 'NS', 'CNAME', 'PTR']
 
-def run(db, reporter):
+MISSING_TARGET = register(
+    "cname-missing-target",
+    "Missing target [A, NS, CNAME, PTR]: {lookup} ({rr!r})")
+
+
+class CheckCNAME(Suite):
     """
     Check all CNAMEs within the database that they actually point to something.
 
     Decide which domains to check depending on available SOA records.
     """
 
-    all_ok = True
+    shardable = True
+
+    def visit_CNAME(self, rr):
+        lookup = rr.resolved_target
 
-    checked_zones = set(generate_soa_domains(db))
+        if not self.db.is_authoritative(lookup):
+            return
 
-    for rr in generate_records(db, 'CNAME'):
-        if not domain_in(rr.resolved_target, checked_zones):
-            continue
+        if self.db.exists(lookup, TARGETS):
+            return
 
-        lookup = rr.resolved_target
+        self.report(MISSING_TARGET, rr, lookup=lookup)
 
-        if db.query(lookup, record=['A', 'NS', 'CNAME', 'PTR']):
-            continue
 
-        all_ok = False
-        reporter.error(
-            "Missing target [A, NS, CNAME, PTR]: {0} ({1})".format(
-                lookup, repr(rr)))
+suite = CheckCNAME
 
-    return all_ok
+
+def run(db, reporter):
+    return run_suite(CheckCNAME, db, reporter)
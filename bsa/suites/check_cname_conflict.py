@@ -0,0 +1,56 @@
+from bsa.reporter import register
+from bsa.suite import Suite
+from bsa.suite import run_suite
+from bsa.utils import in_view
+
+CNAME_AND_OTHER_DATA = register(
+    "cname-and-other-data",
+    "CNAME and other data [{types}]: {rr.resolved_label}{where} ({rr!r})")
+
+MULTIPLE_CNAMES = register(
+    "multiple-cnames",
+    "Multiple CNAME targets [{targets}]: {rr.resolved_label}{where} "
+    "({rr!r})")
+
+
+class CheckCNAMEConflict(Suite):
+    """
+    Check that names with a CNAME do not have any other data, and that they
+    do not have several CNAMEs with different targets.
+
+    Only the names of CNAME records are looked at, each name is reported once
+    per view by its first CNAME.
+
+    Not incremental, since which record reports depends on the zone it was
+    visited in, while incremental verdicts are shared by all identical records
+    (e.g. the same CNAME served by several views).
+    """
+
+    incremental = False
+    shardable = True
+
+    def visit_CNAME(self, rr):
+        for view, rrsets in self.db.rrsets(rr.resolved_label):
+            cnames = rrsets.get('CNAME')
+
+            if not cnames or cnames[0] is not rr:
+                continue
+
+            other = sorted(t for t in rrsets if t != 'CNAME')
+            targets = sorted(set(c.resolved_target for c in cnames))
+
+            if other:
+                self.report(
+                    CNAME_AND_OTHER_DATA, rr,
+                    types=", ".join(other), where=in_view(view))
+            elif len(targets) > 1:
+                self.report(
+                    MULTIPLE_CNAMES, rr,
+                    targets=", ".join(targets), where=in_view(view))
+
+
+suite = CheckCNAMEConflict
+
+
+def run(db, reporter):
+    return run_suite(CheckCNAMEConflict, db, reporter)
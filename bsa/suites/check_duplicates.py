@@ -0,0 +1,66 @@
+from bsa.reporter import register
+from bsa.suite import Suite
+from bsa.suite import run_suite
+from bsa.utils import in_view
+
+DUPLICATE_RECORD = register(
+    "duplicate-record",
+    "Duplicate record: {rr.resolved_label}{where} ({rr!r})")
+
+
+def duplicate_key(rr):
+    return (rr.class_type, tuple(rr.origin_values()))
+
+
+class CheckDuplicates(Suite):
+    """
+    Check that no RRset contains the same record more than once.
+
+    Records are compared by class and data, ignoring their TTL and the way
+    they were written (relative or absolute names). Every record after the
+    first one with the same data is reported.
+
+    Not incremental, since identical records share their verdicts in
+    incremental runs, which would hide the very duplicates looked for.
+    """
+
+    incremental = False
+    shardable = True
+
+    def visitors(self):
+        # every record type present in the database, including custom ones.
+        return dict((t, self.visit) for t in self.db.type_cache)
+
+    def visit(self, rr):
+        key = None
+
+        for view, rrsets in self.db.rrsets(
+                rr.resolved_label, record=(rr.record_type,)):
+            records = rrsets.get(rr.record_type, [])
+
+            if len(records) < 2 or records[0] is rr:
+                continue
+
+            # the records before this one, if it is served by the view.
+            before = None
+
+            for index, other in enumerate(records):
+                if other is rr:
+                    before = records[:index]
+                    break
+
+            if not before:
+                continue
+
+            if key is None:
+                key = duplicate_key(rr)
+
+            if any(duplicate_key(other) == key for other in before):
+                self.report(DUPLICATE_RECORD, rr, where=in_view(view))
+
+
+suite = CheckDuplicates
+
+
+def run(db, reporter):
+    return run_suite(CheckDuplicates, db, reporter)
@@ -0,0 +1,42 @@
+from bsa.reporter import register
+from bsa.suite import Suite
+from bsa.suite import run_suite
+from bsa.utils import domain_in
+
+TARGETS = ['A', 'AAAA']
+
+MISSING_GLUE = register(
+    "missing-glue", "Missing glue [A, AAAA]: {lookup} ({rr!r})")
+
+
+class CheckGlue(Suite):
+    """
+    Check that all NS records with a target inside the zone they belong to
+    have address records for that target, in other words that in-zone name
+    servers (and delegations to them) have glue.
+    """
+
+    shardable = True
+
+    def visit_NS(self, rr):
+        zone = self.db.authoritative_zone(rr.resolved_label)
+
+        if zone is None:
+            return
+
+        lookup = rr.resolved_target
+
+        if not domain_in(lookup, [zone[0]]):
+            return
+
+        if self.db.exists(lookup, TARGETS):
+            return
+
+        self.report(MISSING_GLUE, rr, lookup=lookup)
+
+
+suite = CheckGlue
+
+
+def run(db, reporter):
+    return run_suite(CheckGlue, db, reporter)
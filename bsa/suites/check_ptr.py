@@ -1,33 +1,37 @@
+from bsa.reporter import register
+from bsa.suite import Suite
+from bsa.suite import run_suite
 from bsa.utils import reversed_address
-from bsa.utils import domain_in
-from bsa.utils import generate_soa_domains
-from bsa.utils import generate_records
 
+TARGETS = ['PTR', 'CNAME']
 
-def run(db, reporter):
+MISSING_REVERSE = register(
+    "missing-reverse", "Missing reverse [PTR, CNAME]: {lookup} ({rr!r})")
+
+
+class CheckPTR(Suite):
     """
     Check that all A-records have a corresponding PTR record.
 
     Decide which domains to check depending on available SOA records.
     """
 
-    checked_zones = set(generate_soa_domains(db))
-
-    all_ok = True
+    shardable = True
 
-    for rr in generate_records(db, 'A'):
-        if not domain_in(rr.resolved_label, checked_zones):
-            continue
+    def visit_A(self, rr):
+        if not self.db.is_authoritative(rr.resolved_label):
+            return
 
         lookup = reversed_address(rr.address)
 
-        if db.query(lookup, record=['PTR', 'CNAME']):
-            continue
+        if self.db.exists(lookup, TARGETS):
+            return
 
-        all_ok = False
+        self.report(MISSING_REVERSE, rr, lookup=lookup)
 
-        reporter.error(
-            "Missing reverse [PTR, CNAME]: {0} ({1})".format(
-                lookup, repr(rr)))
 
-    return all_ok
+suite = CheckPTR
+
+
+def run(db, reporter):
+    return run_suite(CheckPTR, db, reporter)
@@ -1,35 +1,40 @@
-from bsa.utils import generate_soa_domains
-from bsa.utils import generate_records
-from bsa.utils import domain_in
+from bsa.reporter import register
+from bsa.suite import Suite
+from bsa.suite import run_suite
 
+TARGETS = ['A', 'NS', 'CNAME']
 
-def run(db, reporter):
+MISSING_TARGET = register(
+    "srv-missing-target",
+    "Missing target [A, NS, CNAME]: {lookup}: ({rr!r})")
+
+
+class CheckSRV(Suite):
     """
-    Check that all A-records have a corresponding PTR record.
+    Check that all SRV-records within checked zones point to something.
 
     Decide which domains to check depending on available SOA records.
     """
 
-    checked_zones = set(generate_soa_domains(db))
-
-    all_ok = True
+    shardable = True
 
-    for rr in generate_records(db, 'SRV'):
-        if not domain_in(rr.resolved_label, checked_zones):
-            continue
+    def visit_SRV(self, rr):
+        if not self.db.is_authoritative(rr.resolved_label):
+            return
 
         lookup = rr.resolved_target
 
-        if not domain_in(lookup, checked_zones):
-            continue
+        if not self.db.is_authoritative(lookup):
+            return
 
-        if db.query(lookup, record=['A', 'NS', 'CNAME']):
-            continue
+        if self.db.exists(lookup, TARGETS):
+            return
 
-        all_ok = False
+        self.report(MISSING_TARGET, rr, lookup=lookup)
 
-        reporter.error(
-            "Missing target [A, NS, CNAME]: {0}: ({1})".format(
-                lookup, repr(rr)))
 
-    return all_ok
+suite = CheckSRV
+
+
+def run(db, reporter):
+    return run_suite(CheckSRV, db, reporter)
@@ -0,0 +1,33 @@
+from bsa.reporter import register
+from bsa.suite import Suite
+from bsa.suite import run_suite
+
+SOURCES = ['MX', 'NS']
+TARGETS = ['CNAME']
+
+TARGET_CNAME = register(
+    "target-cname", "{rr.record_type} target is a CNAME: {lookup} ({rr!r})")
+
+
+class CheckTargetCNAME(Suite):
+    """
+    Check that no MX or NS record points to an alias, which is not allowed
+    by RFC 2181 (section 10.3).
+    """
+
+    shardable = True
+
+    def visit_MX(self, rr):
+        lookup = rr.resolved_target
+
+        if self.db.exists(lookup, TARGETS):
+            self.report(TARGET_CNAME, rr, lookup=lookup)
+
+    visit_NS = visit_MX
+
+
+suite = CheckTargetCNAME
+
+
+def run(db, reporter):
+    return run_suite(CheckTargetCNAME, db, reporter)
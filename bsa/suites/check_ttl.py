@@ -0,0 +1,52 @@
+from bsa.reporter import register
+from bsa.suite import Suite
+from bsa.suite import run_suite
+from bsa.utils import in_view
+
+INCONSISTENT_TTL = register(
+    "inconsistent-ttl",
+    "Inconsistent TTLs [{ttls}]: {rr.resolved_label} {rr.record_type}{where} "
+    "({rr!r})")
+
+
+class CheckTTL(Suite):
+    """
+    Check that all records within an RRset have the same TTL.
+
+    Each RRset is reported once per view by its first record.
+
+    Not incremental, since which record reports depends on the zone it was
+    visited in, while incremental verdicts are shared by all identical records
+    (e.g. the same record served by several views).
+    """
+
+    incremental = False
+    shardable = True
+
+    def visitors(self):
+        # every record type present in the database, including custom ones.
+        return dict((t, self.visit) for t in self.db.type_cache)
+
+    def visit(self, rr):
+        for view, rrsets in self.db.rrsets(
+                rr.resolved_label, record=(rr.record_type,)):
+            records = rrsets.get(rr.record_type, [])
+
+            if len(records) < 2 or records[0] is not rr:
+                continue
+
+            ttls = sorted(set(r.ttl for r in records))
+
+            if len(ttls) == 1:
+                continue
+
+            self.report(
+                INCONSISTENT_TTL, rr,
+                ttls=", ".join(map(str, ttls)), where=in_view(view))
+
+
+suite = CheckTTL
+
+
+def run(db, reporter):
+    return run_suite(CheckTTL, db, reporter)
@@ -0,0 +1,71 @@
+from bsa.reporter import register
+from bsa.suite import Suite
+from bsa.suite import run_suite
+
+VIEW_MISMATCH = register(
+    "view-mismatch", "{type} mismatch between views: {origin} ({values})")
+
+
+def apex(rrsets):
+    """
+    Summarize the SOA and NS records at a zone apex, as served by one view.
+
+    The serial and timers of the SOA are not compared, since they commonly
+    differ between split views of the same zone.
+    """
+    soa = ", ".join(sorted(set(
+        "{0} {1}".format(rr.resolved_primary, rr.mail)
+        for rr in rrsets.get('SOA', []))))
+    ns = ", ".join(sorted(set(
+        rr.resolved_target for rr in rrsets.get('NS', []))))
+    return soa, ns
+
+
+class CheckViews(Suite):
+    """
+    Check that zones served by several views agree on their SOA and NS
+    records.
+
+    Each zone is reported once, by the SOA record of the first view serving
+    it.
+
+    Not incremental, since which record reports depends on the view it was
+    visited in, while incremental verdicts are shared by all identical records
+    (split views commonly serve identical SOA records).
+    """
+
+    incremental = False
+    shardable = True
+
+    def visit_SOA(self, rr):
+        origin = rr.resolved_label
+        views = dict(self.db.rrsets(origin, record=('SOA', 'NS')))
+
+        if len(views) < 2:
+            return
+
+        first = min(view for view in views if 'SOA' in views[view])
+
+        if views[first]['SOA'][0] is not rr:
+            return
+
+        summaries = dict(
+            (view, apex(rrsets)) for (view, rrsets) in views.iteritems())
+
+        for index, name in enumerate(("SOA", "NS")):
+            values = set(value[index] for value in summaries.itervalues())
+
+            if len(values) < 2:
+                continue
+
+            self.report(
+                VIEW_MISMATCH, type=name, origin=origin, values="; ".join(
+                    "{0}: [{1}]".format(view, value[index])
+                    for (view, value) in sorted(summaries.items())))
+
+
+suite = CheckViews
+
+
+def run(db, reporter):
+    return run_suite(CheckViews, db, reporter)
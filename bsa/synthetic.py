@@ -0,0 +1,258 @@
+"""
+Generate synthetic, but realistic BIND configurations.
+
+The generated tree is deterministic for a given seed, so it can be used to
+compare the performance of different versions of bsa.
+
+    tree = generate_tree("/tmp/tree", records=100000, views=2)
+    config = parse_config(tree.config)
+"""
+
+import os
+import random
+
+# relative weights of the record types in forward zones.
+DEFAULT_MIX = {
+    "A": 50,
+    "AAAA": 5,
+    "CNAME": 15,
+    "MX": 5,
+    "TXT": 10,
+    "SRV": 5,
+    "NS": 2,
+}
+
+SRV_SERVICES = ["_ldap._tcp", "_sip._udp", "_xmpp-server._tcp"]
+
+
+class Tree(object):
+    """
+    Describes a generated tree.
+
+    config - Path to the generated named.conf.
+    zones - Number of zone statements, counting every view.
+    records - Number of records in all zone files, with $GENERATE expanded.
+              Zones served by several views are only counted once.
+    files - Number of generated files.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.zones = 0
+        self.records = 0
+        self.files = 0
+
+    def __repr__(self):
+        return (
+            "<Tree config={self.config} zones={self.zones} "
+            "records={self.records} files={self.files}>"
+        ).format(self=self)
+
+
+class ZoneWriter(object):
+    """
+    Write a single zone file, keeping count of the records written.
+    """
+
+    def __init__(self, tree, directory, name):
+        self.tree = tree
+        self.directory = directory
+        self.name = name
+        self.path = os.path.join(directory, name)
+        self.f = open(self.path, "w")
+        self.records = 0
+        tree.files += 1
+
+    def header(self, origin):
+        self.line("$TTL 3600")
+        self.line("$ORIGIN {0}".format(origin))
+        self.record("@ IN SOA ns1 hostmaster 2014010100 3600 900 604800 300")
+        self.record("@ IN NS ns1")
+        self.record("ns1 IN A 10.255.255.1")
+
+    def line(self, line):
+        self.f.write(line)
+        self.f.write("\n")
+
+    def record(self, line, count=1):
+        self.line(line)
+        self.records += count
+
+    def include(self, name, lines):
+        """
+        Write lines of records to a separate file, included from this zone.
+        """
+        path = os.path.join(self.directory, name)
+
+        with open(path, "w") as f:
+            for line in lines:
+                f.write(line)
+                f.write("\n")
+
+        self.tree.files += 1
+        self.records += len(lines)
+        self.line("$INCLUDE {0}".format(name))
+
+    def close(self):
+        self.f.close()
+
+
+def pick(rng, mix):
+    total = sum(mix.values())
+    value = rng.uniform(0, total)
+
+    for record_type, weight in sorted(mix.items()):
+        value -= weight
+
+        if value <= 0:
+            return record_type
+
+    return record_type
+
+
+def forward_record(rng, mix, i):
+    """
+    Build the line of a single forward record, and the address of it if it
+    is an A record.
+    """
+    label = "host{0}".format(i)
+    record_type = pick(rng, mix)
+    address = "10.{0}.{1}.{2}".format(
+        (i >> 16) & 0xff, (i >> 8) & 0xff, i & 0xff)
+
+    if record_type == "A":
+        return "{0} IN A {1}".format(label, address), address
+
+    if record_type == "AAAA":
+        return "{0} IN AAAA fd00::{1:x}:{2:x}".format(
+            label, i >> 16, i & 0xffff), None
+
+    if record_type == "CNAME":
+        return "{0} IN CNAME host{1}".format(
+            label, rng.randint(0, max(i - 1, 0))), None
+
+    if record_type == "MX":
+        return "{0} IN MX {1} mx{2}".format(
+            label, rng.choice([10, 20]), i % 4), None
+
+    if record_type == "TXT":
+        return "{0} IN TXT \"v=spf1 -all host {1}\"".format(label, i), None
+
+    if record_type == "SRV":
+        return "{0}.{1} IN SRV 0 5 389 host{2}".format(
+            rng.choice(SRV_SERVICES), label, rng.randint(0, i)), None
+
+    return "{0} IN NS ns.{0}".format(label), None
+
+
+def generate_tree(directory, records=10000, zones=10, views=0,
+                  reverse=True, include_ratio=0.05, generate_ratio=0.01,
+                  mix=None, seed=0):
+    """
+    Generate a BIND configuration with zone files in directory.
+
+    records - Approximate number of forward records, spread over the zones.
+    zones - Number of forward zones.
+    views - Number of views, all zones are served by every view. With zero
+            views, zones are defined at the top level.
+    reverse - Also generate reverse zones with PTRs for all A records.
+    include_ratio - Fraction of the records of a zone written to a separate
+                    file and pulled in with $INCLUDE.
+    generate_ratio - Number of records, as a fraction of the total, produced
+                     with $GENERATE.
+    mix - Relative weights of forward record types, see DEFAULT_MIX.
+    seed - Seed of the random generator.
+
+    Returns a Tree.
+    """
+    if mix is None:
+        mix = DEFAULT_MIX
+
+    rng = random.Random(seed)
+
+    zone_directory = os.path.join(directory, "zones")
+
+    if not os.path.isdir(zone_directory):
+        os.makedirs(zone_directory)
+
+    tree = Tree(os.path.join(directory, "named.conf"))
+
+    per_zone = max(records // max(zones, 1), 1)
+    generated = int(per_zone * generate_ratio)
+    included = int(per_zone * include_ratio)
+
+    definitions = list()
+    reverse_records = dict()
+
+    for z in range(zones):
+        origin = "zone{0}.example.com.".format(z)
+        name = "db.zone{0}".format(z)
+        writer = ZoneWriter(tree, zone_directory, name)
+        writer.header(origin)
+
+        lines = list()
+
+        for i in range(z * per_zone, (z + 1) * per_zone):
+            line, address = forward_record(rng, mix, i)
+            lines.append(line)
+
+            if address is not None:
+                reverse_records.setdefault(address.rsplit(".", 2)[0], []) \
+                    .append((address, "host{0}.{1}".format(i, origin)))
+
+        for line in lines[included:]:
+            writer.record(line)
+
+        if included:
+            writer.include(name + ".inc", lines[:included])
+
+        if generated:
+            writer.record(
+                "$GENERATE 1-{0} $ IN CNAME host{1}".format(
+                    generated, z * per_zone), count=generated)
+
+        writer.close()
+        tree.records += writer.records
+        definitions.append((origin, "zones/" + name))
+
+    if reverse:
+        for prefix, entries in sorted(reverse_records.items()):
+            origin = ".".join(reversed(prefix.split("."))) + ".in-addr.arpa."
+            name = "db." + prefix
+            writer = ZoneWriter(tree, zone_directory, name)
+            writer.header(origin)
+
+            for address, target in entries:
+                writer.record("{0} IN PTR {1}".format(
+                    ".".join(reversed(address.split(".")[2:])), target))
+
+            writer.close()
+            tree.records += writer.records
+            definitions.append((origin, "zones/" + name))
+
+    with open(tree.config, "w") as f:
+        f.write("options {\n    directory \"/etc/bind\";\n};\n\n")
+
+        if views:
+            for v in range(views):
+                f.write("view \"view{0}\" {{\n".format(v))
+                f.write("    match-clients {{ 10.{0}.0.0/16; }};\n".format(v))
+
+                for origin, path in definitions:
+                    write_zone(f, origin, path, indent="    ")
+
+                f.write("};\n\n")
+        else:
+            for origin, path in definitions:
+                write_zone(f, origin, path)
+
+    tree.files += 1
+    tree.zones = len(definitions) * max(views, 1)
+    return tree
+
+
+def write_zone(f, origin, path, indent=""):
+    f.write("{0}zone \"{1}\" {{\n".format(indent, origin.rstrip(".")))
+    f.write("{0}    type master;\n".format(indent))
+    f.write("{0}    file \"{1}\";\n".format(indent, path))
+    f.write("{0}}};\n".format(indent))
@@ -2,6 +2,31 @@ import ipaddr
 import contextlib
 
 
+def reversed_ipv4(address):
+    """
+    Fast path for reversing a dotted quad IPv4 address string without parsing
+    it into an address object.
+
+    Returns None if the string is not a plain dotted quad.
+    """
+    parts = address.split(".")
+
+    if len(parts) != 4:
+        return None
+
+    try:
+        octets = map(int, parts)
+    except ValueError:
+        return None
+
+    for octet in octets:
+        if not 0 <= octet <= 255:
+            return None
+
+    octets.reverse()
+    return "{0}.{1}.{2}.{3}.in-addr.arpa".format(*octets)
+
+
 def reversed_address(address):
     """
     Generate the reverse address assuming that the argument has an attribute
@@ -12,6 +37,11 @@ def reversed_address(address):
         16: IPv6
     """
     if isinstance(address, basestring):
+        reverse = reversed_ipv4(address)
+
+        if reverse is not None:
+            return reverse
+
         address = ipaddr.IPAddress(address)
 
     tuples = tuple(reversed(map(str, map(ord, address.packed))))
@@ -49,7 +79,31 @@ def join_origin(label, origin):
 
 
 def domain_in(label, domains):
-    return any(label.endswith(domain) for domain in domains)
+    """
+    Check if label is equal to, or a subdomain of any of the given domains.
+
+    This is linear in the number of domains, prefer
+    FakeBind.is_authoritative when checking against SOA records.
+    """
+    for domain in domains:
+        if domain == "." or label == domain:
+            return True
+
+        if label.endswith("." + domain):
+            return True
+
+    return False
+
+
+def in_view(view):
+    """
+    Describe where a view name from FakeBind.irrsets applies, for use in
+    messages.
+    """
+    if view is None:
+        return ""
+
+    return " in view {0}".format(view)
 
 
 def generate_records(db, record_type):
@@ -68,3 +122,119 @@ def generate_soa_domains(db):
 def default_file_reader(root_directory, path):
     with open(path) as f:
         yield f
+
+
+class Shard(object):
+    """
+    Describes one out of count slices of the work done by a suite.
+
+    Suites that implement run_shard(db, reporter, shard) use the helpers
+    below to partition their work, either by whole zones or by record range.
+    Visitor style suites are sharded automatically by record range.
+    """
+
+    __slots__ = ("index", "count")
+
+    def __init__(self, index, count):
+        if not 0 <= index < count:
+            raise ValueError("Invalid shard: {0}/{1}".format(index, count))
+
+        self.index = index
+        self.count = count
+
+    def bounds(self, length):
+        """
+        Get the range of positions of this shard in a sequence of the given
+        length.
+        """
+        lo = length * self.index // self.count
+        hi = length * (self.index + 1) // self.count
+        return lo, hi
+
+    def slice(self, sequence):
+        lo, hi = self.bounds(len(sequence))
+        return sequence[lo:hi]
+
+    def records(self, db, record_type):
+        """
+        Generate this shard's range of records of the given type.
+        """
+        for (rr, configs) in self.slice(db.type_cache.get(record_type, [])):
+            yield rr
+
+    def names(self, db):
+        """
+        Get this shard's range of name keys in the cache, see
+        FakeBind.irrsets.
+        """
+        return self.slice(db.cache.keys())
+
+    def zones(self, db):
+        """
+        Get the whole zones belonging to this shard.
+
+        Zones are assigned greedily by size, so shards are balanced by number
+        of records.
+        """
+        sizes = [0] * self.count
+        assigned = list()
+
+        order = sorted(
+            range(len(db.zones)), key=lambda i: -len(db.zones[i][0]))
+
+        for i in order:
+            shard = sizes.index(min(sizes))
+            sizes[shard] += len(db.zones[i][0])
+
+            if shard == self.index:
+                assigned.append(i)
+
+        return [db.zones[i] for i in sorted(assigned)]
+
+    def zone_slices(self, db):
+        """
+        Get this shard's range of all records in the database, as a list of
+        (records, configs) tuples in the same form as db.zones.
+        """
+        total = sum(len(zone) for (zone, configs) in db.zones)
+        lo, hi = self.bounds(total)
+
+        result = list()
+        offset = 0
+
+        for (zone, configs) in db.zones:
+            start, end = offset, offset + len(zone)
+            offset = end
+
+            if end <= lo or start >= hi:
+                continue
+
+            result.append(
+                (zone[max(lo - start, 0):hi - start], configs))
+
+        return result
+
+    def __repr__(self):
+        return "<Shard {0}/{1}>".format(self.index, self.count)
+
+
+class BoundedCache(dict):
+    """
+    A dict for memoized lookups which is emptied once it holds limit entries,
+    keeping the memory of long running processes bounded.
+
+    Lookups are plain dict lookups, only storing an entry costs more.
+    """
+
+    def __init__(self, limit):
+        super(BoundedCache, self).__init__()
+        self.limit = limit
+        # number of times the cache was emptied.
+        self.clears = 0
+
+    def __setitem__(self, key, value):
+        if len(self) >= self.limit and key not in self:
+            self.clear()
+            self.clears += 1
+
+        super(BoundedCache, self).__setitem__(key, value)
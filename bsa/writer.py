@@ -0,0 +1,239 @@
+"""
+Write records as zone files in a canonical form.
+
+Records are sorted in DNS order (by their reversed labels, then type and
+data), names are written relative to the $ORIGIN of the zone, the owner is
+left out when it repeats, and TTLs are only written when they differ from
+the $TTL of the zone, which is the most common TTL.
+
+Lines are built by concatenation and written in large chunks, so writing is
+cheap compared to parsing. The output can be read back with
+bsa.zone.ZoneParser.
+
+    with open("db.example.com", "w") as f:
+        write_zone(f, records, "example.com.")
+"""
+
+import os
+import logging
+import collections
+
+from bsa.utils import join_origin
+
+log = logging.getLogger(__name__)
+
+# number of lines buffered before writing them out.
+BUFFER_LINES = 4096
+
+# SOA records go first at the apex.
+TYPE_ORDER = {
+    "SOA": 0,
+}
+
+
+def name_key(name):
+    """
+    The sort key of a name, in DNS order.
+
+        www.example.com. -> ('com', 'example', 'www')
+    """
+    name = name.lower().rstrip(".")
+
+    if not name:
+        return ()
+
+    return tuple(reversed(name.split(".")))
+
+
+def relative_name(name, origin):
+    """
+    Write name relative to origin, if it is inside of it.
+    """
+    lower = name.lower()
+
+    if lower == origin:
+        return "@"
+
+    if origin == ".":
+        return name
+
+    if lower.endswith("." + origin):
+        return name[:-len(origin) - 1]
+
+    return name
+
+
+def quote(value):
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def target_rdata(rr, origin):
+    return relative_name(rr.resolved_target, origin)
+
+
+def mx_rdata(rr, origin):
+    return str(rr.priority) + " " + relative_name(
+        join_origin(rr.target, rr.origin), origin)
+
+
+def srv_rdata(rr, origin):
+    return " ".join((
+        str(rr.priority), str(rr.weight), str(rr.port),
+        relative_name(rr.resolved_target, origin)))
+
+
+def txt_rdata(rr, origin):
+    return " ".join(quote(label) for label in rr.labels)
+
+
+def soa_rdata(rr, origin):
+    return " ".join((
+        relative_name(rr.resolved_primary, origin),
+        relative_name(join_origin(rr.mail, rr.origin), origin),
+    ) + tuple(str(n) for n in rr.numbers))
+
+
+def address_rdata(rr, origin):
+    return str(rr.address)
+
+
+def default_rdata(rr, origin):
+    return " ".join(str(v) for v in rr.origin_values())
+
+
+RDATA_FORMATS = {
+    "A": address_rdata,
+    "AAAA": address_rdata,
+    "CNAME": target_rdata,
+    "NS": target_rdata,
+    "PTR": target_rdata,
+    "MX": mx_rdata,
+    "AFSDB": mx_rdata,
+    "SRV": srv_rdata,
+    "TXT": txt_rdata,
+    "SOA": soa_rdata,
+}
+
+
+def zone_origin(records):
+    for rr in records:
+        if rr.record_type == "SOA":
+            return rr.resolved_label
+
+    return None
+
+
+def default_ttl(ttls):
+    """
+    Pick the most common TTL, the lowest one if there is a tie.
+    """
+    if not ttls:
+        return None
+
+    return max(ttls.items(), key=lambda (ttl, n): (n, -ttl))[0]
+
+
+def write_zone(f, records, origin=None):
+    """
+    Write records to the file f, in canonical form.
+
+    records - Any iterable of records, for example a list returned by
+              bsa.zone.parse_zone.
+    origin - The $ORIGIN of the zone, by default the name of the SOA record.
+
+    Returns the number of records written.
+    """
+    if origin is None:
+        records = list(records)
+        origin = zone_origin(records)
+
+        if origin is None:
+            raise ValueError("No origin specified, and no SOA record found")
+
+    origin = join_origin(origin, ".").lower()
+
+    entries = list()
+    ttls = collections.Counter()
+
+    for rr in records:
+        name = rr.resolved_label
+        record_type = rr.record_type
+        rdata = RDATA_FORMATS.get(record_type, default_rdata)(rr, origin)
+        entries.append((
+            name_key(name), TYPE_ORDER.get(record_type, 1), record_type,
+            rdata, name, rr.ttl, rr.class_type))
+        ttls[rr.ttl] += 1
+
+    entries.sort()
+
+    ttl = default_ttl(ttls)
+
+    lines = ["$ORIGIN " + origin + "\n"]
+
+    if ttl is not None:
+        lines.append("$TTL " + str(ttl) + "\n")
+
+    previous = None
+
+    for (_, _, record_type, rdata, name, rr_ttl, class_type) in entries:
+        if name == previous:
+            owner = ""
+        else:
+            owner = relative_name(name, origin)
+            previous = name
+
+        if rr_ttl == ttl:
+            prefix = owner + "\t" + class_type + "\t"
+        else:
+            prefix = owner + "\t" + str(rr_ttl) + "\t" + class_type + "\t"
+
+        lines.append(prefix + record_type + "\t" + rdata + "\n")
+
+        if len(lines) >= BUFFER_LINES:
+            f.write("".join(lines))
+            lines = []
+
+    f.write("".join(lines))
+    return len(entries)
+
+
+def zone_file_name(origin):
+    return "db." + (origin.rstrip(".") or "root")
+
+
+def write_zones(zones, directory):
+    """
+    Write zones, a list of (records, configs) tuples, to one file each in
+    directory named after their origin.
+
+    Returns a list of the written paths.
+    """
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+
+    paths = list()
+    names = collections.Counter()
+
+    for (zone, configs) in zones:
+        origin = zone_origin(zone)
+
+        if origin is None:
+            log.warning("no SOA record, not writing zone with {0} "
+                        "record(s)".format(len(zone)))
+            continue
+
+        name = zone_file_name(origin)
+        names[name] += 1
+
+        # zones with the same origin in different views.
+        if names[name] > 1:
+            name = "{0}.{1}".format(name, names[name])
+
+        path = os.path.join(directory, name)
+
+        with open(path, "w") as f:
+            write_zone(f, zone, origin)
+
+        paths.append(path)
+
+    return paths
@@ -1,4 +1,6 @@
 import os
+import struct
+import hashlib
 import logging
 
 import ipaddr
@@ -51,6 +53,8 @@ class Record(object):
         "class_type",
         "origin",
         "path",
+        "_id",
+        "_hash",
     )
 
     VALID_CLASS_TYPES = set(["IN", "CH"])
@@ -85,11 +89,50 @@ class Record(object):
         else:
             self.origin = origin
 
+        self._id = None
+        self._hash = None
+
+    @property
+    def id(self):
+        """
+        A stable integer identifier for this record.
+
+        The identifier is derived from the content of the record, so it is
+        identical across runs. It is computed once and then cached, records
+        must not be modified after it has been accessed.
+        """
+        if self._id is None:
+            self.compute_id()
+
+        return self._id
+
+    def compute_id(self):
+        """
+        Compute and cache the identifier of this record, unless it already
+        is, see id.
+        """
+        if self._id is not None:
+            return
+
+        key = repr((self.record_type, self.__full_key__()))
+        digest = hashlib.sha1(key).digest()
+        self._id = struct.unpack(">q", digest[:8])[0]
+        self._hash = hash(self._id)
+
     def __eq__(self, o):
+        if self.id != o.id:
+            return False
+
         return self.__full_key__() == o.__full_key__()
 
+    def __ne__(self, o):
+        return not self.__eq__(o)
+
     def __hash__(self):
-        return hash(self.__full_key__())
+        if self._hash is None:
+            self.compute_id()
+
+        return self._hash
 
     def __full_key__(self):
         return (
@@ -126,11 +169,22 @@ class Record(object):
     def resolved_label(self):
         return join_origin(self.label, self.origin)
 
+    def to_dict(self):
+        return {
+            "name": self.resolved_label,
+            "type": self.record_type,
+            "path": self.path,
+            "id": self.id,
+            "text": str(self),
+        }
+
     def __getstate__(self):
         return (self.label, self.ttl, self.class_type, self.origin, self.path)
 
     def __setstate__(self, state):
         (self.label, self.ttl, self.class_type, self.origin, self.path) = state
+        self._id = None
+        self._hash = None
 
 
 class A(Record):
@@ -420,6 +474,10 @@ class PTR(Record):
     def __key__(self):
         return (self.target,)
 
+    @property
+    def resolved_target(self):
+        return join_origin(self.target, self.origin)
+
     def values(self):
         return (
             self.target,
@@ -468,7 +526,7 @@ class SOA(Record):
         return self.serial, self.refresh, self.retry, self.expire, self.minimum
 
     @numbers.setter
-    def set_numbers(self, numbers):
+    def numbers(self, numbers):
         (self.serial,
          self.refresh,
          self.retry,
@@ -550,6 +608,8 @@ class RecordBuilder(IncludeStack):
 
         # Maintain a stack of all traversed paths and origins.
         self.stack = [(path, origin)]
+        # every file read for the zone, including $INCLUDEs.
+        self.paths = [path]
 
     def update_origin(self, origin):
         path, previous_origin = self.stack[-1]
@@ -590,6 +650,9 @@ class RecordBuilder(IncludeStack):
         _, origin = self.stack[-1]
         self.stack.append((path, origin))
 
+        if path not in self.paths:
+            self.paths.append(path)
+
     def pop_stack(self):
         path, _ = self.stack.pop()
         return path
@@ -820,9 +883,20 @@ class ZoneParser(object):
         generator = (c for c in string)
         return self.parse_generator(generator)
 
+    @property
+    def paths(self):
+        """
+        All files read by the parser, including $INCLUDEs.
+        """
+        return self.rb.paths
+
 
 def parse_zone(path, origin, fake_root=None, root_directory=None,
-               file_reader=None):
+               file_reader=None, paths=None):
+    """
+    paths - If specified, a list which every file read for the zone is
+            appended to, including $INCLUDEs.
+    """
     if fake_root is None:
         fake_root = os.getcwd()
 
@@ -833,4 +907,9 @@ def parse_zone(path, origin, fake_root=None, root_directory=None,
         fake_root=fake_root,
         file_reader=file_reader)
 
-    return parser.parse_path(path)
+    result = parser.parse_path(path)
+
+    if paths is not None:
+        paths.extend(parser.paths)
+
+    return result
@@ -0,0 +1,285 @@
+import unittest
+
+from bsa.bind import FakeBind
+from bsa.bind import Resolution
+from bsa.named import BindConfig
+from bsa.named import BindView
+from bsa.query import TargetPredicate
+from bsa.zone import ZoneParser
+
+ZONE1 = """
+$ORIGIN example.com.
+@ 3600 IN SOA ns1 hostmaster 1 2 3 4 5
+@ NS ns1
+ns1 A 10.0.0.1
+www CNAME web
+alias CNAME www
+web A 10.0.0.2
+loop1 CNAME loop2
+loop2 CNAME loop1
+txt TXT "hello"
+sub NS ns.sub
+ns.sub A 10.0.0.3
+"""
+
+
+def build_db(*zones):
+    config = BindConfig()
+    parsed = list()
+
+    for origin, zone in zones:
+        parser = ZoneParser("test.zone", origin)
+        parsed.append((parser.parse_string(zone), [config]))
+
+    return FakeBind(parsed)
+
+
+class TestResolve(unittest.TestCase):
+    def setUp(self):
+        self.db = build_db(("example.com.", ZONE1))
+
+    def test_direct(self):
+        result = self.db.resolve("web.example.com")
+        self.assertEquals(Resolution.NOERROR, result.status)
+        self.assertEquals(["10.0.0.2"], [rr.address for rr in result.answer])
+
+    def test_cname_chain(self):
+        result = self.db.resolve("alias.example.com.")
+        self.assertEquals(Resolution.NOERROR, result.status)
+        self.assertEquals("alias.example.com.", result.name)
+        self.assertEquals(
+            ["CNAME", "CNAME", "A"],
+            [rr.record_type for rr in result.path])
+
+    def test_memoized_segments(self):
+        self.db.resolve("alias.example.com.")
+        self.assertTrue(
+            ("www.example.com.", "A", None) in self.db.resolve_cache)
+
+    def test_bounded_memo(self):
+        self.db.resolve_cache.limit = 2
+        self.db.resolve("alias.example.com.")
+        self.assertEquals(1, len(self.db.resolve_cache))
+        self.assertEquals(1, self.db.resolve_cache.clears)
+
+        result = self.db.resolve("alias.example.com.")
+        self.assertEquals(["10.0.0.2"], [rr.address for rr in result.answer])
+
+    def test_loop(self):
+        result = self.db.resolve("loop1.example.com.")
+        self.assertEquals(Resolution.LOOP, result.status)
+        self.assertEquals(2, len(result.path))
+
+    def test_referral(self):
+        result = self.db.resolve("host.sub.example.com.")
+        self.assertEquals(Resolution.REFERRAL, result.status)
+        self.assertEquals(
+            ["NS", "A"], [rr.record_type for rr in result.path])
+
+    def test_nodata_and_nxdomain(self):
+        self.assertEquals(
+            Resolution.NODATA,
+            self.db.resolve("txt.example.com.").status)
+        self.assertEquals(
+            Resolution.NXDOMAIN,
+            self.db.resolve("missing.example.com.").status)
+
+
+class TestReferences(unittest.TestCase):
+    def setUp(self):
+        self.db = build_db(("example.com.", ZONE1))
+
+    def test_name(self):
+        result = self.db.references("web.example.com")
+        self.assertEquals(
+            ["www.example.com."], [rr.resolved_label for rr in result])
+
+    def test_record_filter(self):
+        self.assertEquals(
+            [], self.db.references("ns1.example.com.", record=["CNAME"]))
+        result = self.db.references("ns1.example.com.")
+        self.assertEquals(["NS"], [rr.record_type for rr in result])
+
+    def test_address(self):
+        self.assertEquals(
+            ["web.example.com."],
+            [rr.resolved_label for rr in self.db.references("10.0.0.2")])
+
+
+class TestExists(unittest.TestCase):
+    def setUp(self):
+        hosts = "".join("host{0} A 10.0.1.{0}\n".format(i) for i in range(9))
+        self.db = build_db(
+            ("example.com.", ZONE1 + hosts + "*.wild A 10.0.0.4\n"))
+
+    def probe(self):
+        return [
+            self.db.exists("web.example.com", ['A']),
+            self.db.exists("www.example.com.", ['A']),
+            self.db.exists("any.wild.example.com.", ['A']),
+        ]
+
+    def test_strategies(self):
+        # 13 targets, the name cache is probed until it costs more than
+        # hashing all target names would.
+        expected = [True, False, True]
+        self.assertEquals(expected, self.probe())
+        self.assertEquals({}, self.db.join_cache)
+        self.assertEquals(expected, self.probe())
+        self.assertEquals(1, len(self.db.join_cache))
+        self.assertEquals(expected, self.probe())
+        self.assertTrue(self.db.exists("www.example.com.", ['A', 'CNAME']))
+
+    def test_rrsets(self):
+        self.assertEquals(
+            [(None, {"CNAME": ["web.example.com."]})],
+            [(view, dict((t, [rr.resolved_target for rr in records])
+                         for (t, records) in rrsets.items()))
+             for (view, rrsets) in self.db.rrsets("www.example.com")])
+        self.assertEquals([], self.db.rrsets("www.example.com", ('A',)))
+
+
+class TestQueryNetwork(unittest.TestCase):
+    def setUp(self):
+        self.db = build_db(("example.com.", ZONE1))
+
+    def test_range(self):
+        result = self.db.query_network("10.0.0.2/31")
+        self.assertEquals(
+            ["10.0.0.2", "10.0.0.3"], [rr.address for rr in result])
+
+    def test_empty(self):
+        self.assertEquals([], self.db.query_network("10.1.0.0/16"))
+        self.assertEquals([], self.db.query_network("fe80::/64"))
+
+
+class TestAuthoritativeZone(unittest.TestCase):
+    def setUp(self):
+        self.db = build_db(("example.com.", ZONE1))
+
+    def test_closest(self):
+        origin, configs = self.db.authoritative_zone("www.example.com")
+        self.assertEquals("example.com.", origin)
+        self.assertEquals("example.com.",
+                          self.db.authoritative_zone("example.com.")[0])
+
+    def test_label_boundary(self):
+        self.assertFalse(self.db.is_authoritative("badexample.com."))
+        self.assertFalse(self.db.is_authoritative("com."))
+
+
+class TestSelect(unittest.TestCase):
+    def setUp(self):
+        self.db = build_db(("example.com.", ZONE1))
+
+    def test_name_under(self):
+        select = self.db.select(type='A', name_under='sub.example.com')
+        self.assertEquals(
+            ["ns.sub.example.com."], [rr.resolved_label for rr in select])
+        self.assertTrue(select.explain().startswith(
+            "select name_under='sub.example.com' type='A'\n"
+            "  access: name_under('sub.example.com.') (cost=2)\n"))
+
+    def test_address_in(self):
+        select = self.db.select(address_in='10.0.0.0/30', ttl_gt=3600)
+        self.assertEquals("address(10.0.0.0/30)", select.access.description)
+        self.assertEquals(
+            ["10.0.0.1", "10.0.0.2", "10.0.0.3"],
+            [rr.address for rr in select])
+
+    def test_target(self):
+        select = self.db.select(target='web.example.com.', view='public')
+        self.assertEquals(
+            ["www.example.com."], [rr.resolved_label for rr in select])
+
+    def test_target_filter(self):
+        predicate = TargetPredicate("web.example.com")
+        self.assertEquals(1, predicate.access(self.db).cost)
+        self.assertEquals(None, predicate.key)
+        self.assertRaises(ValueError, predicate, self.db.cache.values()[0][0])
+
+        predicate.bind(self.db)
+        self.assertEquals(
+            ["www.example.com."],
+            [entry[0].resolved_label for entry in self.db.view_cache[None]
+             if predicate(entry)])
+
+    def test_scan(self):
+        select = self.db.select(ttl_lt=86400)
+        self.assertEquals("scan", select.access.description)
+        self.assertEquals(["SOA"], [rr.record_type for rr in select])
+
+    def test_views(self):
+        root = BindConfig()
+        internal = BindView(root, "internal")
+        external = BindView(root, "external")
+        records = ZoneParser("test.zone", "example.com.").parse_string(ZONE1)
+        db = FakeBind([(records, [internal, external])])
+
+        select = db.select(view=["internal", "external"], type="CNAME")
+        self.assertEquals(4, len(select.all()))
+        self.assertEquals([], db.select(view="other").all())
+
+    def test_unknown(self):
+        self.assertRaises(ValueError, self.db.select, foo=1)
+
+
+class TestCursor(unittest.TestCase):
+    def setUp(self):
+        # the same zone loaded twice produces duplicate records.
+        self.db = build_db(("example.com.", ZONE1), ("example.com.", ZONE1))
+
+    def labels(self, records):
+        return [rr.resolved_label for rr in records]
+
+    def test_wildcard(self):
+        result = self.db.query("*.sub.example.com")
+        self.assertEquals(["ns.sub.example.com."] * 2, self.labels(result))
+
+    def test_unique(self):
+        result = self.db.query("*.sub.example.com", unique=True)
+        self.assertEquals(["ns.sub.example.com."], self.labels(result))
+
+    def test_pages(self):
+        expected = self.labels(
+            self.db.cursor(under="example.com", unique=True))
+
+        pages = list()
+        cursor = self.db.cursor(under="example.com", unique=True, limit=3)
+
+        while True:
+            pages.extend(self.labels(cursor))
+
+            if cursor.token is None:
+                break
+
+            cursor = self.db.cursor(under="example.com", unique=True,
+                                    limit=3, token=cursor.token)
+
+        self.assertEquals(expected, pages)
+        self.assertEquals(len(set(self.db.query(
+            "*example.com", unique=True))), len(pages))
+
+    def test_offset(self):
+        result = self.db.cursor("*.example.com", record=["A"], offset=1,
+                                limit=2, unique=True).fetch()
+        self.assertEquals(
+            ["ns.sub.example.com.", "web.example.com."], self.labels(result))
+
+    def test_stale_token(self):
+        cursor = self.db.cursor(under="example.com", limit=1)
+        cursor.fetch()
+        self.assertRaises(ValueError, self.db.cursor, "*.example.com",
+                          token=cursor.token)
+        self.assertRaises(ValueError, self.db.cursor, under="example.com",
+                          offset=1, token=cursor.token)
+
+        # same size, different content.
+        db = build_db(("example.com.", ZONE1),
+                      ("example.com.", ZONE1.replace("10.0.0.2", "10.0.0.9")))
+        self.assertEquals(self.db.size, db.size)
+        self.assertRaises(ValueError, db.cursor, under="example.com",
+                          token=cursor.token)
+        self.assertEquals(
+            1, len(self.db.cursor(under="example.com", limit=1,
+                                  token=cursor.token).fetch()))
@@ -0,0 +1,99 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from bsa.diff import ADDED
+from bsa.diff import CHANGED
+from bsa.diff import REMOVED
+from bsa.diff import diff
+from bsa.diff import load_sources
+from bsa.synthetic import generate_tree
+
+
+class TestDiff(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.old = os.path.join(self.directory, "old")
+        self.new = os.path.join(self.directory, "new")
+        self.cache = os.path.join(self.directory, "cache")
+        os.mkdir(self.cache)
+
+        generate_tree(self.old, records=200, zones=2, views=2)
+        generate_tree(self.new, records=200, zones=2, views=2)
+
+        path = os.path.join(self.new, "zones", "db.zone1")
+
+        with open(path) as f:
+            lines = f.read().splitlines()
+
+        lines = [l.replace("10.255.255.1", "10.255.255.2") for l in lines]
+        lines.append("added IN MX 10 mail")
+
+        with open(path, "w") as f:
+            f.write("\n".join(lines) + "\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def load(self, root):
+        return load_sources(os.path.join(root, "named.conf"), root,
+                            parser_cache=self.cache)
+
+    def test_diff(self):
+        counters = dict()
+        changes = list(diff(self.load(self.old), self.load(self.new),
+                            counters=counters))
+
+        self.assertEquals(
+            [(ADDED, "added.zone1.example.com.", "MX", "view0"),
+             (CHANGED, "ns1.zone1.example.com.", "A", "view0"),
+             (ADDED, "added.zone1.example.com.", "MX", "view1"),
+             (CHANGED, "ns1.zone1.example.com.", "A", "view1")],
+            [(c.kind, c.name, c.record_type, c.view) for c in changes])
+
+        self.assertEquals(
+            "+ ns1.zone1.example.com. 3600 IN A 10.255.255.2",
+            changes[1].format().splitlines()[-1])
+
+        # every view compares zone1, everything else is the same.
+        self.assertEquals(2, counters["zones.compared"])
+        self.assertTrue(counters["zones.skipped"] > 0)
+
+    def test_reversed(self):
+        changes = list(diff(self.load(self.new), self.load(self.old)))
+        self.assertEquals(REMOVED, changes[0].kind)
+
+    def test_cached_digests(self):
+        list(diff(self.load(self.old), self.load(self.new)))
+
+        old = self.load(self.old)
+        new = self.load(self.new)
+        list(diff(old, new))
+
+        # unchanged zones are never loaded once their digests are cached.
+        loaded = [key for (key, source) in old.items()
+                  if source._records is not None]
+        self.assertEquals(
+            [("view0", "zone1.example.com."),
+             ("view1", "zone1.example.com.")],
+            sorted(loaded))
+
+    def test_cached_include(self):
+        list(diff(self.load(self.old), self.load(self.new)))
+
+        path = os.path.join(self.new, "zones", "db.zone0.inc")
+
+        with open(path, "a") as f:
+            f.write("zzadded IN A 10.9.9.9\n")
+
+        # newer than the cached digests.
+        later = time.time() + 10
+        os.utime(path, (later, later))
+
+        changes = list(diff(self.load(self.old), self.load(self.new)))
+        self.assertEquals(
+            [(ADDED, "zzadded.zone0.example.com.", "A")] * 2,
+            [(c.kind, c.name, c.record_type) for c in changes
+             if c.name.startswith("zzadded")])
@@ -0,0 +1,215 @@
+import os
+import socket
+import shutil
+import struct
+import tempfile
+import threading
+import unittest
+
+from bsa.bind import FakeBind
+from bsa.dns import HEADER
+from bsa.dns import NOERROR
+from bsa.dns import NOTIMP
+from bsa.dns import NXDOMAIN
+from bsa.dns import REFUSED
+from bsa.dns import FLAG_AA
+from bsa.dns import FLAG_TC
+from bsa.dns import Responder
+from bsa.dns import build_query
+from bsa.dns import make_servers
+from bsa.named import BindConfig
+from bsa.named import parse_config
+
+CONFIG = """
+acl internal { !10.1.0.0/16; 10.0.0.0/8; };
+
+view "internal" {
+    match-clients { !10.2.0.1; internal; localhost; };
+    zone "example.com" { type master; file "db.internal"; };
+};
+
+view "external" {
+    match-clients { any; };
+    zone "example.com" { type master; file "db.external"; };
+};
+"""
+
+INTERNAL = """
+$ORIGIN example.com.
+@ 3600 IN SOA ns1 hostmaster 1 2 3 4 300
+@ NS ns1
+ns1 A 10.0.0.1
+www A 10.0.0.2
+alias CNAME www
+* A 10.0.0.3
+txt TXT "hello" "world"
+@ MX 10 mail
+"""
+
+EXTERNAL = """
+$ORIGIN example.com.
+@ 3600 IN SOA ns1 hostmaster 1 2 3 4 300
+@ NS ns1
+ns1 A 192.0.2.1
+www A 192.0.2.2
+"""
+
+
+def parse_response(response):
+    (query_id, flags, qdcount, ancount, nscount, arcount) = \
+        HEADER.unpack_from(response)
+    return flags & 0xf, flags, ancount, nscount
+
+
+class TestResponder(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        files = {
+            "named.conf": CONFIG,
+            "db.internal": INTERNAL,
+            "db.external": EXTERNAL,
+        }
+
+        for name, content in files.items():
+            with open(os.path.join(self.directory, name), "w") as f:
+                f.write(content)
+
+        config = BindConfig()
+        config.update_from_section(parse_config(
+            os.path.join(self.directory, "named.conf"),
+            fake_root=self.directory, root_directory=self.directory))
+        zones = config.parse_zones(
+            root_directory=self.directory, fake_root=self.directory)
+        self.responder = Responder(FakeBind(zones))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def query(self, name, qtype, address="127.0.0.1"):
+        return self.responder.respond(build_query(name, qtype), address)
+
+    def test_views(self):
+        self.assertEquals(["internal", "external"],
+                          [name for (name, _) in self.responder.views])
+        self.assertEquals("internal", self.responder.select_view("127.0.0.1"))
+        self.assertEquals("internal", self.responder.select_view("10.3.0.1"))
+        self.assertEquals("external", self.responder.select_view("10.1.0.1"))
+        self.assertEquals("external", self.responder.select_view("10.2.0.1"))
+        self.assertEquals("external",
+                          self.responder.select_view("192.0.2.100"))
+
+    def test_default_view(self):
+        with open(os.path.join(self.directory, "default.conf"), "w") as f:
+            f.write("""
+view "internal" {
+    match-clients { 10.0.0.0/8; };
+    zone "example.com" { type master; file "db.internal"; };
+};
+
+view "default" {
+    zone "example.com" { type master; file "db.external"; };
+};
+""")
+
+        config = BindConfig()
+        config.update_from_section(parse_config(
+            os.path.join(self.directory, "default.conf"),
+            fake_root=self.directory, root_directory=self.directory))
+        responder = Responder(FakeBind(config.parse_zones(
+            root_directory=self.directory, fake_root=self.directory)))
+
+        self.assertEquals("internal", responder.select_view("10.1.1.1"))
+        self.assertEquals("default", responder.select_view("127.0.0.1"))
+
+        response = responder.respond(
+            build_query("www.example.com", "A"), "127.0.0.1")
+        self.assertEquals(NOERROR, parse_response(response)[0])
+        self.assertTrue(response.endswith(socket.inet_aton("192.0.2.2")))
+
+    def test_answer(self):
+        response = self.query("WWW.example.com", "A")
+        rcode, flags, ancount, nscount = parse_response(response)
+        self.assertEquals((NOERROR, 1, 0), (rcode, ancount, nscount))
+        self.assertTrue(flags & FLAG_AA)
+        self.assertTrue(response.endswith(socket.inet_aton("10.0.0.2")))
+
+        response = self.query("www.example.com", "A", address="192.0.2.100")
+        self.assertTrue(response.endswith(socket.inet_aton("192.0.2.2")))
+
+    def test_wildcard_and_cname(self):
+        response = self.query("missing.example.com", "A")
+        self.assertEquals((NOERROR, 1), parse_response(response)[::2])
+        self.assertTrue(response.endswith(socket.inet_aton("10.0.0.3")))
+
+        response = self.query("alias.example.com", "A")
+        self.assertEquals((NOERROR, 1), parse_response(response)[::2])
+        self.assertTrue(response.endswith("\3www\7example\3com\0"))
+
+        response = self.query("example.com", "ANY")
+        self.assertEquals(3, parse_response(response)[2])
+
+    def test_negative(self):
+        response = self.query("www.example.com", "AAAA")
+        self.assertEquals((NOERROR, 0, 1), parse_response(response)[::2] +
+                          parse_response(response)[3:])
+
+        response = self.query("missing.example.com", "A",
+                              address="192.0.2.100")
+        rcode, _, ancount, nscount = parse_response(response)
+        self.assertEquals((NXDOMAIN, 0, 1), (rcode, ancount, nscount))
+        self.assertTrue(response.endswith(struct.pack("!IIIII", 1, 2, 3, 4,
+                                                      300)))
+
+        response = self.query("www.example.org", "A")
+        self.assertEquals(REFUSED, parse_response(response)[0])
+
+    def test_notimp(self):
+        packet = build_query("www.example.com", "A", flags=0x2000)
+        response = self.responder.respond(packet, "127.0.0.1")
+        self.assertEquals(NOTIMP, parse_response(response)[0])
+
+    def test_truncated(self):
+        response = self.responder.respond(
+            build_query("txt.example.com", "TXT"), "127.0.0.1", max_size=40)
+        rcode, flags, ancount, _ = parse_response(response)
+        self.assertTrue(flags & FLAG_TC)
+        self.assertEquals(0, ancount)
+
+    def test_servers(self):
+        servers = make_servers(self.responder, port=0)
+        threads = list()
+
+        for server in servers:
+            thread = threading.Thread(target=server.serve_forever)
+            thread.start()
+            threads.append(thread)
+
+        try:
+            packet = build_query("www.example.com", "A", query_id=4711)
+
+            udp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            udp.settimeout(10)
+            udp.sendto(packet, servers[0].server_address)
+            response = udp.recv(512)
+            udp.close()
+
+            self.assertEquals(4711, struct.unpack("!H", response[:2])[0])
+            self.assertTrue(response.endswith(socket.inet_aton("10.0.0.2")))
+
+            tcp = socket.create_connection(servers[1].server_address, 10)
+            tcp.sendall(struct.pack("!H", len(packet)) + packet)
+            length = struct.unpack("!H", tcp.recv(2))[0]
+            data = ""
+
+            while len(data) < length:
+                data += tcp.recv(length - len(data))
+
+            tcp.close()
+            self.assertEquals(response, data)
+        finally:
+            for server in servers:
+                server.shutdown()
+                server.server_close()
+
+            for thread in threads:
+                thread.join()
@@ -0,0 +1,77 @@
+import os
+import json
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from StringIO import StringIO
+
+from bsa import bsa_main
+from bsa.export import export_sqlite
+from bsa.export import run_sql
+from bsa.export import JSONWriter
+from bsa.export import TextWriter
+from bsa.synthetic import generate_tree
+
+from test.test_bind import build_db
+from test.test_bind import ZONE1
+
+
+class TestExport(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "export.db")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def query(self, query):
+        output = StringIO()
+        run_sql(self.path, query, JSONWriter(output))
+        return [json.loads(line) for line in output.getvalue().splitlines()]
+
+    def test_export(self):
+        db = build_db(("example.com.", ZONE1))
+        self.assertEquals(db.size, export_sqlite(db.zones, self.path))
+
+        self.assertEquals(
+            [{"origin": "example.com."}],
+            self.query("SELECT origin FROM zones"))
+        self.assertEquals(
+            [{"name": "www.example.com.", "target": "web.example.com."}],
+            self.query("SELECT name, target FROM records "
+                       "WHERE type = 'CNAME' AND name LIKE 'www.%'"))
+        self.assertEquals(
+            [{"address": "10.0.0.2"}],
+            self.query("SELECT address FROM record_views "
+                       "WHERE name = 'web.example.com.' AND view IS NULL"))
+
+        # exporting again replaces the database.
+        export_sqlite(db.zones, self.path)
+        self.assertEquals(
+            [{"n": db.size}], self.query("SELECT count(*) AS n FROM records"))
+
+    def test_text(self):
+        db = build_db(("example.com.", ZONE1))
+        export_sqlite(db.zones, self.path)
+
+        output = StringIO()
+        run_sql(self.path, "SELECT origin, path FROM zones",
+                TextWriter(output))
+        self.assertEquals("origin\tpath\nexample.com.\ttest.zone\n",
+                          output.getvalue())
+
+    def test_command(self):
+        tree = generate_tree(self.directory, records=100, zones=2, views=2)
+        self.assertEquals(0, bsa_main([
+            "export", tree.config, "-R", self.directory,
+            "--sqlite", self.path]))
+
+        self.assertEquals(
+            [{"n": tree.records * 2}],
+            self.query("SELECT count(*) AS n FROM record_views"))
+
+        connection = sqlite3.connect(self.path)
+        views = connection.execute("SELECT name FROM views").fetchall()
+        self.assertEquals([(u"view0",), (u"view1",)], sorted(views))
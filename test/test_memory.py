@@ -0,0 +1,52 @@
+import sys
+import json
+import unittest
+
+from bsa.memory import MemoryReport
+from bsa.memory import slot_names
+
+from test.test_bind import build_db
+from test.test_bind import ZONE1
+
+
+class TestMemory(unittest.TestCase):
+    def setUp(self):
+        self.db = build_db(("example.com.", ZONE1))
+
+    def test_slot_names(self):
+        rr = self.db.zones[0][0][0]
+        self.assertTrue("label" in slot_names(type(rr)))
+
+    def test_counted_once(self):
+        report = MemoryReport()
+        value = ["a" * 100, "b"]
+
+        self.assertTrue(report.add("first", value) > sys.getsizeof(value))
+        self.assertEquals(0, report.add("second", value))
+        self.assertEquals(report.consumers["first"], report.total)
+
+    def test_strings(self):
+        report = MemoryReport()
+        first = "".join(["x"] * 100)
+        second = "".join(["x"] * 100)
+        report.sizeof([first, second, first])
+
+        strings = report.strings
+        self.assertEquals(3, strings.references)
+        self.assertEquals(1, strings.distinct)
+        self.assertEquals(sys.getsizeof(first), strings.duplicate_size)
+
+    def test_report(self):
+        report = MemoryReport()
+        report.add_zones(self.db.zones)
+        zones = report.consumers["zones"]
+        report.add_database(self.db)
+
+        self.assertEquals(["example.com."], list(report.zones))
+        self.assertEquals(zones, sum(report.types.values()) +
+                          sys.getsizeof(self.db.zones[0][0]))
+        self.assertTrue(report.consumers["FakeBind.cache"] > 0)
+
+        data = json.loads(report.format_json())
+        self.assertEquals(report.total, data["total"])
+        self.assertTrue("FakeBind.cache" in report.format_table())
@@ -0,0 +1,51 @@
+import os
+import sys
+import pstats
+import shutil
+import tempfile
+import unittest
+
+from bsa.profiling import Profiler
+from bsa.profiling import Sampler
+
+
+def inner_work():
+    return sum(range(1000))
+
+
+class TestProfiling(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def functions(self, path):
+        return set(name for (_, _, name) in pstats.Stats(path).stats)
+
+    def test_phases(self):
+        profiler = Profiler(os.path.join(self.directory, "profile"))
+        profiler.start()
+
+        with profiler.phase("outer"):
+            with profiler.phase("inner"):
+                inner_work()
+
+        profiler.stop()
+
+        self.assertEquals(
+            ["01-outer.pstats", "02-inner.pstats"],
+            [os.path.basename(p) for p in profiler.paths])
+
+        outer, inner = profiler.paths
+        self.assertTrue("inner_work" in self.functions(inner))
+        self.assertFalse("inner_work" in self.functions(outer))
+
+    def test_sampler(self):
+        sampler = Sampler(0.01)
+        sampler.sample(None, sys._getframe())
+        sampler.sample(None, sys._getframe())
+
+        stack, count = sampler.stacks.items()[0]
+        self.assertEquals(2, count)
+        self.assertTrue(stack.endswith(";test_profiling.py:test_sampler"))
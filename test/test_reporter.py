@@ -0,0 +1,107 @@
+import sys
+import json
+import pickle
+import unittest
+import StringIO
+
+from bsa import DefaultBootstrap
+from bsa.reporter import DefaultReporter
+from bsa.reporter import Finding
+from bsa.reporter import JSONSink
+from bsa.reporter import MaxErrorsReached
+from bsa.reporter import ReportContext
+from bsa.reporter import TextSink
+from bsa.reporter import register
+
+from test.test_bind import build_db
+from test.test_suites import ZONE1
+
+MISSING = register("test-missing", "Missing: {lookup} ({rr.record_type})")
+
+
+class Lazy(object):
+    formatted = 0
+
+    def __format__(self, spec):
+        Lazy.formatted += 1
+        return "lazy"
+
+
+class TestReporter(unittest.TestCase):
+    def setUp(self):
+        self.db = build_db(("example.com.", ZONE1))
+        self.rr = self.db.query("www.example.com.")[0]
+
+    def test_lazy(self):
+        reporter = DefaultReporter()
+        reporter.report(MISSING, self.rr, lookup=Lazy())
+        self.assertEquals(0, Lazy.formatted)
+        self.assertEquals(
+            [("error", "Missing: lazy (CNAME)")], reporter.messages)
+        self.assertEquals(1, Lazy.formatted)
+        self.assertEquals({MISSING: 1}, dict(reporter.counts))
+
+    def test_levels(self):
+        reporter = DefaultReporter()
+        reporter.warning("foo")
+        reporter.info("bar")
+        self.assertEquals(
+            [("warning", "foo"), ("info", "bar")], reporter.messages)
+        reporter.print_all()
+        self.assertEquals([], reporter.messages)
+
+    def test_conflicting_format(self):
+        self.assertEquals(MISSING, register(
+            "test-missing", "Missing: {lookup} ({rr.record_type})"))
+        self.assertRaises(ValueError, register, "test-missing", "other")
+
+    def test_pickle(self):
+        finding = Finding("error", MISSING, self.rr, {"lookup": "foo"})
+        copy = pickle.loads(pickle.dumps(finding, 2))
+        self.assertEquals(finding.message, copy.message)
+        self.assertEquals(self.rr.id, copy.record.id)
+
+    def test_jsonl(self):
+        stream = StringIO.StringIO()
+        context = ReportContext([JSONSink(stream)])
+        context.reporter(name="suite").report(MISSING, self.rr, lookup="foo")
+        context.reporter(name="suite").error("plain")
+
+        lines = map(json.loads, stream.getvalue().splitlines())
+        self.assertEquals(2, len(lines))
+        self.assertEquals("suite", lines[0]["suite"])
+        self.assertEquals(MISSING, lines[0]["code"])
+        self.assertEquals("www.example.com.", lines[0]["record"]["name"])
+        self.assertEquals("plain", lines[1]["message"])
+        self.assertEquals({MISSING: 1, "message": 1}, dict(context.counts))
+
+    def test_default_stream(self):
+        stream = StringIO.StringIO()
+        stdout, sys.stdout = sys.stdout, stream
+
+        try:
+            context = ReportContext([TextSink()])
+            context.reporter(name="suite").error("redirected")
+        finally:
+            sys.stdout = stdout
+
+        self.assertEquals("ERROR suite [message] redirected\n",
+                          stream.getvalue())
+
+    def test_max_errors(self):
+        stream = StringIO.StringIO()
+        context = ReportContext([TextSink(stream)], max_errors=1)
+        reporter = context.reporter(name="suite")
+        reporter.info("not counted")
+        reporter.error("first")
+        self.assertRaises(MaxErrorsReached, reporter.error, "second")
+        self.assertEquals(2, len(stream.getvalue().splitlines()))
+
+    def test_bootstrap(self):
+        stream = StringIO.StringIO()
+        context = ReportContext([TextSink(stream)])
+        bootstrap = DefaultBootstrap(self.db, reporter_type=context.reporter)
+        self.assertEquals(
+            [False], bootstrap.execute_all(["bsa.suites.check_cname"]))
+        self.assertTrue(stream.getvalue().startswith(
+            "ERROR bsa.suites.check_cname [cname-missing-target] "))
@@ -0,0 +1,148 @@
+import os
+import shutil
+import tempfile
+import time
+import threading
+import unittest
+
+from bsa.client import Client
+from bsa.client import ServerError
+from bsa.named import parse_config
+from bsa.server import Database
+from bsa.server import Service
+from bsa.server import make_server
+from bsa.synthetic import generate_tree
+from bsa.utils import default_file_reader
+
+
+class TestServer(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.tree = generate_tree(self.directory, records=100, zones=2)
+
+        def load(config, stats):
+            file_reader = stats.file_reader(default_file_reader)
+            config.update_from_section(parse_config(
+                self.tree.config, fake_root=self.directory,
+                file_reader=file_reader))
+            return config.parse_zones(
+                root_directory=self.directory, fake_root=self.directory,
+                file_reader=file_reader)
+
+        self.database = Database(load, paths=[self.tree.config])
+        self.database.reload()
+
+        path = os.path.join(self.directory, "bsa.sock")
+        self.server = make_server(Service(self.database), path=path)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+        self.client = Client(path=path, timeout=10)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        shutil.rmtree(self.directory)
+
+    def test_query(self):
+        records = self.client.query("ns1.zone0.example.com", record="A")
+        self.assertEquals(
+            ["ns1.zone0.example.com. 3600 IN A 10.255.255.1"],
+            [r["text"] for r in records])
+
+        records = list(self.client.iquery("*.zone0.example.com"))
+        self.assertTrue(len(records) > 1)
+        self.assertEquals(self.tree.records, self.client.stats()["records"])
+
+    def test_iquery_stopped(self):
+        records = self.client.iquery("*.zone0.example.com")
+        self.assertTrue("text" in next(records))
+        records.close()
+
+        records = self.client.query("ns1.zone0.example.com", record="A")
+        self.assertEquals(1, len(records))
+
+        # abandoned without being closed explicitly.
+        for record in self.client.iquery("*.zone0.example.com"):
+            break
+
+        self.assertEquals(self.tree.records, self.client.stats()["records"])
+
+    def test_error(self):
+        self.assertRaises(ServerError, self.client.call, "missing")
+        # the connection is still usable.
+        self.assertEquals("NXDOMAIN",
+                          self.client.resolve("missing.example.org")["status"])
+
+    def test_run(self):
+        result = self.client.run(["bsa.suites.check_cname"])
+        self.assertEquals(["bsa.suites.check_cname"], result["results"].keys())
+        self.assertRaises(ServerError, self.client.run, ["test.test_suites"])
+
+    def test_reload(self):
+        self.assertFalse(self.database.changed())
+
+        path = os.path.join(self.directory, "zones", "db.zone1")
+
+        with open(path, "a") as f:
+            f.write("reloaded IN A 10.1.1.1\n")
+
+        os.utime(path, (0, 0))
+        self.assertTrue(self.database.changed())
+
+        counters = self.client.reload()
+        self.assertEquals(1, counters["zones.parsed"])
+        self.assertTrue(counters["zones.reused"] > 0)
+        self.assertEquals(
+            1, len(self.client.query("reloaded.zone1.example.com")))
+
+    def test_reload_include(self):
+        cache = os.path.join(self.directory, "cache")
+        os.mkdir(cache)
+        self.database.parser_cache = cache
+        self.database.reload()
+
+        path = os.path.join(self.directory, "zones", "db.zone0.inc")
+        self.assertTrue(path in self.database.mtimes)
+
+        with open(path, "a") as f:
+            f.write("viainclude IN A 10.9.9.9\n")
+
+        # newer than the parser cache, which must not be used either.
+        later = time.time() + 10
+        os.utime(path, (later, later))
+        self.assertTrue(self.database.changed())
+
+        counters = self.client.reload()
+        self.assertEquals(1, counters["zones.parsed"])
+        self.assertEquals(
+            1, len(self.client.query("viainclude.zone0.example.com")))
+
+    def test_reload_config_include(self):
+        extra = os.path.join(self.directory, "extra.conf")
+
+        with open(extra, "w") as f:
+            f.write("// zones added later\n")
+
+        with open(self.tree.config, "a") as f:
+            f.write("include \"extra.conf\";\n")
+
+        self.database.reload()
+        self.assertFalse(self.database.changed())
+
+        with open(os.path.join(self.directory, "db.extra"), "w") as f:
+            f.write("$ORIGIN extra.example.\n"
+                    "@ IN SOA ns1 hostmaster 1 2 3 4 5\n"
+                    "www IN A 10.8.8.8\n")
+
+        with open(extra, "w") as f:
+            f.write("zone \"extra.example\" { type master; "
+                    "file \"db.extra\"; };\n")
+
+        later = time.time() + 10
+        os.utime(extra, (later, later))
+        self.assertTrue(self.database.changed())
+
+        self.client.reload()
+        self.assertEquals(1, len(self.client.query("www.extra.example")))
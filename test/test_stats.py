@@ -0,0 +1,99 @@
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+from bsa import bsa_main
+from bsa import DefaultBootstrap
+from bsa.stats import PhaseStats
+from bsa.stats import format_json
+from bsa.stats import format_table
+from bsa.stats import hit_rates
+from bsa.synthetic import generate_tree
+
+from test.test_bind import build_db
+from test.test_bind import ZONE1
+
+
+class TestStats(unittest.TestCase):
+    def setUp(self):
+        self.db = build_db(("example.com.", ZONE1))
+
+    def test_counters(self):
+        self.db.query("www.example.com.")
+        self.db.query("*.example.com.")
+        self.db.resolve("alias.example.com.")
+        self.db.resolve("alias.example.com.")
+
+        counters = self.db.counters
+        self.assertEquals(1, counters["query.wildcard"])
+        self.assertTrue(counters["query.regular"] > 1)
+        self.assertTrue(counters["scanned"] > 0)
+        self.assertEquals(1, counters["resolve_cache.hit"])
+
+    def test_hit_rates(self):
+        self.assertEquals(
+            {"a": 0.75, "b": 0.0},
+            hit_rates({"a.hit": 3, "a.miss": 1, "b.miss": 2}))
+
+    def test_suite_stats(self):
+        bootstrap = DefaultBootstrap(self.db)
+        bootstrap.suite_stats = list()
+        modules = ["bsa.suites.check_cname", "test.test_suites"]
+        bootstrap.execute_all(modules, no_report=True)
+
+        stats = bootstrap.suite_stats
+        self.assertEquals(modules, [s.name for s in stats])
+        self.assertEquals(4, stats[0].counters["query.exists"])
+        self.assertEquals(1, stats[0].counters["join_cache.miss"])
+        self.assertEquals(0, stats[1].counters["query.exists"])
+        self.assertTrue(stats[1].counters["query.regular"] > 0)
+
+        self.assertEquals(3, len(format_table(stats).splitlines()))
+        self.assertEquals(
+            modules, [s["suite"] for s in json.loads(format_json(stats))])
+
+
+class TestPhaseStats(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_phase(self):
+        stats = PhaseStats()
+
+        with stats.phase("a"):
+            stats.count("files")
+
+        stats.update({"hit": 2}, prefix="cache.")
+        self.assertEquals(["a"], [name for (name, _, _) in stats.phases])
+        self.assertEquals({"files": 1, "cache.hit": 2}, stats.counters)
+        self.assertEquals(["a"], [
+            p["phase"] for p in json.loads(stats.format_json())["phases"]])
+
+    def test_bsa_main(self):
+        tree = generate_tree(self.directory, records=200, zones=2)
+        cache = os.path.join(self.directory, "cache")
+        os.mkdir(cache)
+        args = [tree.config, "-R", self.directory, "-C", cache]
+
+        stats = PhaseStats()
+        self.assertEquals(0, bsa_main(args, stats=stats))
+        self.assertEquals(
+            ["parse_config", "update_from_section", "parse_zones"],
+            [name for (name, _, _) in stats.phases])
+        self.assertEquals(tree.files, stats.counters["files"])
+        self.assertTrue(stats.counters["bytes"] > 0)
+        self.assertEquals(tree.zones, stats.counters["parser_cache.miss"])
+        self.assertEquals(tree.zones, stats.counters["parser_cache.write"])
+        self.assertEquals(tree.records, sum(
+            n for (key, n) in stats.counters.items()
+            if key.startswith("records.")))
+
+        stats = PhaseStats()
+        self.assertEquals(0, bsa_main(args, stats=stats))
+        self.assertEquals(tree.zones, stats.counters["parser_cache.hit"])
+        self.assertEquals(0, stats.counters["parser_cache.miss"])
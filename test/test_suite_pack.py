@@ -0,0 +1,157 @@
+import unittest
+
+from bsa import DefaultReporter
+from bsa.bind import FakeBind
+from bsa.named import BindConfig
+from bsa.named import BindView
+from bsa.suite import run_suite
+from bsa.suites import check_cname_conflict
+from bsa.suites import check_duplicates
+from bsa.suites import check_glue
+from bsa.suites import check_target_cname
+from bsa.suites import check_ttl
+from bsa.suites import check_views
+from bsa.utils import Shard
+from bsa.zone import ZoneParser
+
+from test.test_bind import build_db
+
+ZONE1 = """
+$ORIGIN example.com.
+@ 3600 IN SOA ns1 hostmaster 1 2 3 4 5
+@ NS ns1
+@ NS ns2
+@ MX 10 mail
+ns1 A 10.0.0.1
+mail CNAME web
+web A 10.0.0.2
+web A 10.0.0.2
+www CNAME web
+www TXT "conflict"
+multi CNAME web
+multi CNAME ns1
+ttl 300 A 10.0.0.3
+ttl 600 A 10.0.0.4
+sub NS ns.sub
+sub NS ns.example.org.
+"""
+
+ZONE2 = """
+$ORIGIN example.com.
+@ 3600 IN SOA ns1 hostmaster 1 2 3 4 5
+@ NS ns1
+ns1 A 10.0.0.1
+"""
+
+
+def run(module, db):
+    reporter = DefaultReporter()
+    result = module.run(db, reporter)
+    return result, [m for (_, m) in reporter.messages]
+
+
+class TestSuitePack(unittest.TestCase):
+    def setUp(self):
+        self.db = build_db(("example.com.", ZONE1))
+
+    def test_cname_conflict(self):
+        result, messages = run(check_cname_conflict, self.db)
+        self.assertFalse(result)
+        self.assertEquals(2, len(messages))
+        self.assertTrue(any(
+            m.startswith("CNAME and other data [TXT]: www.example.com.")
+            for m in messages))
+        self.assertTrue(any(
+            m.startswith("Multiple CNAME targets") for m in messages))
+
+    def test_duplicates(self):
+        result, messages = run(check_duplicates, self.db)
+        self.assertFalse(result)
+        self.assertEquals(1, len(messages))
+        self.assertTrue(
+            messages[0].startswith("Duplicate record: web.example.com."))
+
+    def test_ttl(self):
+        result, messages = run(check_ttl, self.db)
+        self.assertFalse(result)
+        self.assertEquals(1, len(messages))
+        self.assertTrue(messages[0].startswith(
+            "Inconsistent TTLs [300, 600]: ttl.example.com. A"))
+
+    def test_target_cname(self):
+        result, messages = run(check_target_cname, self.db)
+        self.assertFalse(result)
+        self.assertEquals(1, len(messages))
+        self.assertTrue(messages[0].startswith(
+            "MX target is a CNAME: mail.example.com."))
+
+    def test_glue(self):
+        result, messages = run(check_glue, self.db)
+        self.assertFalse(result)
+        self.assertEquals(
+            ["ns2.example.com.", "ns.sub.example.com."],
+            [m.split()[4] for m in messages])
+
+    def test_clean(self):
+        db = build_db(("example.com.", ZONE2))
+
+        for module in (check_cname_conflict, check_duplicates, check_ttl,
+                       check_target_cname, check_glue, check_views):
+            self.assertEquals((True, []), run(module, db))
+
+    def test_shards(self):
+        for module in (check_cname_conflict, check_duplicates, check_ttl,
+                       check_target_cname, check_glue, check_views):
+            expected = sorted(run(module, self.db)[1])
+            messages = list()
+
+            for i in range(3):
+                reporter = DefaultReporter()
+                run_suite(module.suite, self.db, reporter, Shard(i, 3))
+                messages.extend(m for (_, m) in reporter.messages)
+
+            self.assertEquals(expected, sorted(messages))
+
+
+class TestViews(unittest.TestCase):
+    def build_db(self, internal_zone, external_zone):
+        root = BindConfig()
+        internal = BindView(root, "internal")
+        external = BindView(root, "external")
+
+        def parse(zone):
+            return ZoneParser("test.zone", "example.com.").parse_string(zone)
+
+        return FakeBind([
+            (parse(internal_zone), [internal]),
+            (parse(external_zone), [external]),
+        ])
+
+    def test_same(self):
+        db = self.build_db(ZONE2, ZONE2.replace("1 2 3 4 5", "2 2 3 4 5"))
+        self.assertEquals((True, []), run(check_views, db))
+
+    def test_mismatch(self):
+        db = self.build_db(ZONE2, ZONE2 + "@ NS ns2\n")
+        result, messages = run(check_views, db)
+        self.assertFalse(result)
+        self.assertEquals(
+            ["NS mismatch between views: example.com. ("
+             "external: [ns1.example.com., ns2.example.com.]; "
+             "internal: [ns1.example.com.])"],
+            messages)
+
+    def test_views_in_messages(self):
+        db = self.build_db(ZONE2 + "ttl 300 A 10.0.0.3\nttl 600 A 10.0.0.4\n",
+                           ZONE2)
+        result, messages = run(check_ttl, db)
+        self.assertEquals(1, len(messages))
+        self.assertTrue(" A in view internal " in messages[0])
+
+    def test_split_duplicates(self):
+        zone = ZONE2 + "web A 10.0.0.2\nweb A 10.0.0.2\n"
+        result, messages = run(check_duplicates, self.build_db(zone, zone))
+        self.assertFalse(result)
+        self.assertEquals(
+            [" in view internal ", " in view external "],
+            [m[m.index(" in "):m.index("(")] for m in messages])
@@ -0,0 +1,204 @@
+import shutil
+import tempfile
+import unittest
+
+from bsa import DefaultBootstrap
+from bsa import DefaultReporter
+from bsa.incremental import IncrementalState
+from bsa.incremental import IncrementalSuite
+from bsa.incremental import Snapshot
+from bsa.join import HASH
+from bsa.join import INDEX
+from bsa.parallel import build_tasks
+from bsa.reporter import MaxErrorsReached
+from bsa.reporter import ReportContext
+from bsa.suite import Suite
+from bsa.suite import is_shardable
+from bsa.suite import run_fused
+from bsa.suite import run_suite
+from bsa.suites import check_cname
+from bsa.utils import Shard
+
+from test.test_bind import build_db
+
+ZONE1 = """
+$ORIGIN example.com.
+@ 3600 IN SOA ns1 hostmaster 1 2 3 4 5
+@ NS ns1
+ns1 A 10.0.0.1
+www CNAME web
+dangling CNAME nowhere
+external CNAME www.example.org.
+web A 10.0.0.2
+"""
+
+
+def run(db, reporter):
+    """
+    An old-style suite, used to test that they run next to visitor suites.
+    """
+    return len(db.query("web.example.com.")) == 1
+
+
+class CountA(Suite):
+    incremental = False
+
+    def visit_A(self, rr):
+        self.count = getattr(self, "count", 0) + 1
+
+
+class CheckCNAME(Suite):
+    shardable = True
+
+    def visit_CNAME(self, rr):
+        if not self.db.is_authoritative(rr.resolved_target):
+            return
+
+        if not self.db.query(rr.resolved_target, record=['A', 'CNAME']):
+            self.error("Missing target: {0!r}".format(rr))
+
+
+class TestSuites(unittest.TestCase):
+    def setUp(self):
+        self.db = build_db(("example.com.", ZONE1))
+
+    def test_check_cname(self):
+        reporter = DefaultReporter()
+        self.assertFalse(check_cname.run(self.db, reporter))
+        self.assertEquals(1, len(reporter.messages))
+        self.assertTrue("nowhere.example.com." in reporter.messages[0][1])
+
+    def test_fused(self):
+        count = CountA(self.db, DefaultReporter())
+        cname = CheckCNAME(self.db, DefaultReporter())
+        self.assertEquals([True, False], run_fused(self.db, [count, cname]))
+        self.assertEquals(2, count.count)
+
+    def test_execute_all(self):
+        bootstrap = DefaultBootstrap(self.db)
+        result = bootstrap.execute_all(
+            ["bsa.suites.check_cname", "test.test_suites"], no_report=True)
+        self.assertEquals([False, True], result)
+
+    def test_execute_parallel(self):
+        bootstrap = DefaultBootstrap(self.db)
+        modules = ["bsa.suites.check_cname", "test.test_suites",
+                   "bsa.suites.check_ptr"]
+        self.assertEquals(
+            bootstrap.execute_all(modules, no_report=True),
+            bootstrap.execute_all(modules, no_report=True, jobs=2))
+
+    def test_parallel_max_errors(self):
+        context = ReportContext([], max_errors=1)
+        bootstrap = DefaultBootstrap(self.db, reporter_type=context.reporter)
+        modules = ["bsa.suites.check_cname", "bsa.suites.check_ptr"]
+
+        with self.assertRaises(MaxErrorsReached):
+            bootstrap.execute_all(modules, no_report=True, jobs=2,
+                                  max_errors=1)
+
+        self.assertEquals(1, context.errors)
+
+    def test_parallel_tasks(self):
+        bootstrap = DefaultBootstrap(self.db)
+        tasks = build_tasks(
+            bootstrap, ["test.test_suites", "bsa.suites.check_cname"], 3)
+        self.assertEquals(
+            [("test.test_suites", None)] +
+            [("bsa.suites.check_cname", (i, 3)) for i in range(3)],
+            [(module, shard and (shard.index, shard.count))
+             for (module, shard) in tasks])
+
+    def test_shards(self):
+        expected = DefaultReporter()
+        self.assertFalse(check_cname.run(self.db, expected))
+
+        messages = list()
+
+        for i in range(3):
+            reporter = DefaultReporter()
+            run_suite(check_cname.suite, self.db, reporter, Shard(i, 3))
+            messages.extend(reporter.messages)
+
+        self.assertEquals(expected.messages, messages)
+
+    def test_visitor_shards(self):
+        results = list()
+
+        for i in range(3):
+            results.append(run_suite(
+                CheckCNAME, self.db, DefaultReporter(), Shard(i, 3)))
+
+        self.assertEquals(1, results.count(False))
+
+    def test_is_shardable(self):
+        class CountModule(object):
+            suite = CountA
+
+        class CheckModule(object):
+            suite = CheckCNAME
+
+        self.assertFalse(is_shardable(CountModule))
+        self.assertTrue(is_shardable(CheckModule))
+        self.assertTrue(is_shardable(check_cname))
+
+    def test_join_strategies(self):
+        def key(rr):
+            return rr.resolved_target
+
+        targets = ['A', 'NS', 'CNAME']
+        hashed = list(self.db.anti_join('CNAME', key, targets,
+                                        strategy=HASH))
+        indexed = list(self.db.anti_join('CNAME', key, targets,
+                                         strategy=INDEX))
+        self.assertEquals(hashed, indexed)
+        self.assertEquals(
+            ["nowhere.example.com.", "www.example.org."],
+            [label for (_, label) in hashed])
+
+    def test_shard_zones(self):
+        db = build_db(("example.com.", ZONE1), ("example.org.", ZONE1))
+        zones = [Shard(i, 2).zones(db) for i in range(2)]
+        self.assertEquals([1, 1], map(len, zones))
+        self.assertFalse(zones[0][0] is zones[1][0])
+
+
+class TestIncremental(unittest.TestCase):
+    def setUp(self):
+        self.state_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.state_dir)
+
+    def execute(self, zone):
+        db = build_db(("example.com.", zone))
+        bootstrap = DefaultBootstrap(db)
+        modules = ["bsa.suites.check_cname", "test.test_suites"]
+        result = bootstrap.execute_all(
+            modules, no_report=True, state_dir=self.state_dir)
+        return result
+
+    def test_reuse(self):
+        self.assertEquals([False, True], self.execute(ZONE1))
+        self.assertEquals([False, True], self.execute(ZONE1))
+        self.assertEquals([True, True],
+                          self.execute(ZONE1 + "nowhere A 10.0.0.3\n"))
+        self.assertEquals([False, True], self.execute(ZONE1))
+
+    def test_verdicts(self):
+        self.execute(ZONE1)
+
+        db = build_db(("example.com.", ZONE1 + "other A 10.0.0.3\n"))
+        bootstrap = DefaultBootstrap(db)
+        reporter = DefaultReporter()
+        previous = IncrementalState(
+            self.state_dir, "bsa.suites.check_cname").load()
+
+        suite = IncrementalSuite(
+            check_cname.CheckCNAME, db, reporter, previous["verdicts"],
+            Snapshot.build(db).changes(previous["snapshot"]))
+
+        self.assertFalse(run_fused(bootstrap.db, [suite])[0])
+        self.assertEquals(3, suite.reused)
+        self.assertEquals(0, suite.evaluated)
+        self.assertEquals(1, len(reporter.messages))
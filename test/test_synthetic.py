@@ -0,0 +1,53 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from bsa.bind import FakeBind
+from bsa.named import BindConfig
+from bsa.named import parse_config
+from bsa.synthetic import generate_tree
+
+
+class TestSynthetic(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def load(self, tree):
+        config = BindConfig()
+        config.update_from_section(
+            parse_config(tree.config, fake_root=self.directory))
+        return config.parse_zones(
+            root_directory=self.directory, fake_root=self.directory)
+
+    def test_generate(self):
+        tree = generate_tree(self.directory, records=500, zones=2, views=2)
+        zones = self.load(tree)
+
+        self.assertEquals(tree.records, sum(len(z) for (z, _) in zones))
+        self.assertEquals(tree.zones, sum(len(c) for (_, c) in zones))
+        self.assertTrue(os.path.isfile(
+            os.path.join(self.directory, "zones", "db.zone0.inc")))
+
+        db = FakeBind(zones)
+        self.assertTrue(db.type_cache["PTR"])
+        self.assertEquals(
+            ["view0", "view1"],
+            sorted(k for k in db.view_cache if k is not None))
+
+    def test_deterministic(self):
+        def read(directory):
+            generate_tree(directory, records=100, zones=1, seed=1)
+
+            with open(os.path.join(directory, "zones", "db.zone0")) as f:
+                return f.read()
+
+        other = tempfile.mkdtemp()
+
+        try:
+            self.assertEquals(read(self.directory), read(other))
+        finally:
+            shutil.rmtree(other)
@@ -0,0 +1,42 @@
+import unittest
+
+from bsa.utils import BoundedCache
+from bsa.utils import domain_in
+from bsa.utils import reversed_address
+
+
+class TestDomainIn(unittest.TestCase):
+    def test_label_boundary(self):
+        domains = set(["example.com."])
+        self.assertTrue(domain_in("example.com.", domains))
+        self.assertTrue(domain_in("www.example.com.", domains))
+        self.assertFalse(domain_in("badexample.com.", domains))
+
+    def test_root(self):
+        self.assertTrue(domain_in("example.com.", set(["."])))
+
+
+class TestBoundedCache(unittest.TestCase):
+    def test_limit(self):
+        cache = BoundedCache(2)
+        cache["a"] = 1
+        cache["b"] = 2
+        cache["b"] = 3
+        self.assertEquals({"a": 1, "b": 3}, cache)
+
+        cache["c"] = None
+        self.assertEquals({"c": None}, cache)
+        self.assertEquals(1, cache.clears)
+
+
+class TestReversedAddress(unittest.TestCase):
+    def test_ipv4(self):
+        self.assertEquals("4.3.2.1.in-addr.arpa", reversed_address("1.2.3.4"))
+        self.assertEquals("4.3.2.1.in-addr.arpa",
+                          reversed_address("01.2.3.4"))
+
+    def test_ipv6(self):
+        self.assertTrue(reversed_address("::1").startswith("1.0.0.0."))
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, reversed_address, "1.2.3.256")
@@ -0,0 +1,68 @@
+import unittest
+
+from StringIO import StringIO
+
+from bsa.writer import relative_name
+from bsa.writer import write_zone
+from bsa.zone import ZoneParser
+
+ZONE = """
+$ORIGIN example.com.
+$TTL 300
+@ 3600 IN SOA ns1 hostmaster 1 2 3 4 5
+@ 3600 NS ns1
+@ MX 10 mail
+ns1 A 10.0.0.1
+www 60 CNAME web.other.org.
+web A 10.0.0.2
+web AAAA fd00::2
+txt TXT "hello \\"world\\"" "two words"
+_ldap._tcp SRV 0 5 389 ns1
+$ORIGIN sub.example.com.
+* A 10.0.0.3
+"""
+
+
+def parse(text, origin="example.com."):
+    return ZoneParser("test.zone", origin).parse_string(text)
+
+
+class TestWriter(unittest.TestCase):
+    def write(self, records, origin="example.com."):
+        f = StringIO()
+        write_zone(f, records, origin)
+        return f.getvalue()
+
+    def test_relative_name(self):
+        self.assertEquals("@", relative_name("example.com.", "example.com."))
+        self.assertEquals("www", relative_name("www.Example.com.",
+                                               "example.com."))
+        self.assertEquals("www.other.org.",
+                          relative_name("www.other.org.", "example.com."))
+
+    def test_round_trip(self):
+        records = parse(ZONE)
+        text = self.write(records)
+
+        self.assertEquals(
+            sorted(str(rr) for rr in records),
+            sorted(str(rr) for rr in parse(text)))
+
+        # writing is stable.
+        self.assertEquals(text, self.write(parse(text)))
+
+    def test_canonical(self):
+        lines = self.write(parse(ZONE)).splitlines()
+
+        self.assertEquals("$ORIGIN example.com.", lines[0])
+        self.assertEquals("$TTL 300", lines[1])
+        self.assertEquals("@\t3600\tIN\tSOA\tns1 hostmaster 1 2 3 4 5",
+                          lines[2])
+        self.assertEquals("\tIN\tMX\t10 mail", lines[3])
+        self.assertTrue("*.sub\tIN\tA\t10.0.0.3" in lines)
+        self.assertTrue("www\t60\tIN\tCNAME\tweb.other.org." in lines)
+        self.assertEquals(lines[-1], "www\t60\tIN\tCNAME\tweb.other.org.")
+
+    def test_origin_from_soa(self):
+        text = self.write(parse(ZONE), origin=None)
+        self.assertTrue(text.startswith("$ORIGIN example.com.\n"))
@@ -1,7 +1,10 @@
+import pickle
 import unittest
 
 from bsa.zone import ZoneParser
 from bsa.zone import A
+from bsa.zone import AAAA
+from bsa.zone import SOA
 
 ZONE1 = """
 $ORIGIN example.com.
@@ -50,3 +53,26 @@ class TestZoneParser(unittest.TestCase):
         parser = ZoneParser("test.zone", ".")
         for ref, actual in zip(ZONE1_EXPECTED, parser.parse_string(ZONE1)):
             self.assertEquals(ref, actual)
+
+
+class TestRecord(unittest.TestCase):
+    def test_stable_id(self):
+        a = A(("www", 42, None, "example.com.", ""), "1.1.1.1")
+        b = A(("www", 42, None, "example.com.", "other.zone"), "1.1.1.1")
+        self.assertEquals(a.id, b.id)
+        self.assertEquals(hash(a), hash(b))
+        self.assertEquals(a, b)
+        self.assertEquals(7052014070572794552, a.id)
+
+    def test_different_type(self):
+        a = A(("www", 42, None, "example.com.", ""), "1.1.1.1")
+        aaaa = AAAA(("www", 42, None, "example.com.", ""), "1.1.1.1")
+        self.assertNotEquals(a, aaaa)
+        self.assertTrue(a != aaaa)
+
+    def test_pickle_soa(self):
+        soa = SOA(("@", None, None, "example.com.", ""),
+                  "ns1", "hostmaster", "1", "2", "3", "4", "5")
+        copy = pickle.loads(pickle.dumps(soa, 2))
+        self.assertEquals(soa.numbers, copy.numbers)
+        self.assertEquals(soa.id, copy.id)